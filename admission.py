@@ -0,0 +1,160 @@
+"""
+Control de admisión de la API.
+- Token bucket por clave (tienda o IP del cliente): cada clave acumula hasta
+  `burst` fichas que se recargan a `rate_per_minute`; una petición sin ficha se
+  rechaza con 429 y Retry-After igual al tiempo hasta la próxima ficha.
+- Límite global de peticiones en curso: con la API saturada se rechaza de
+  inmediato con 503 en lugar de encolar trabajo y alargar la latencia de cola.
+
+Todo se usa desde el event loop, sin locks.
+"""
+
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class RateLimiter:
+    """Token buckets por clave, acotados por LRU (una IP o tienda nueva desaloja la menos usada)"""
+
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int = 100_000):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_keys = max_keys
+        # clave -> [fichas, instante de la última recarga]
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.allowed = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate_per_second > 0 and self.burst > 0
+
+    def acquire(self, key: str, now: Optional[float] = None) -> float:
+        """
+        Consume una ficha de la clave. Retorna 0 si la petición se admite o los
+        segundos hasta la próxima ficha si se rechaza.
+        """
+        if not self.enabled:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.burst), now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate_per_second)
+            bucket[1] = now
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            self.allowed += 1
+            return 0.0
+        self.rejected += 1
+        return (1.0 - bucket[0]) / self.rate_per_second
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "rate_per_minute": round(self.rate_per_second * 60, 3),
+            "burst": self.burst,
+            "allowed_total": self.allowed,
+            "rejected_total": self.rejected,
+            "keys": len(self._buckets),
+        }
+
+
+class InFlightLimiter:
+    """Límite global de peticiones en curso (load shedding)"""
+
+    def __init__(self, max_in_flight: int):
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.peak = 0
+        self.shed = 0
+
+    def try_acquire(self) -> bool:
+        if self.max_in_flight > 0 and self.in_flight >= self.max_in_flight:
+            self.shed += 1
+            return False
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        return True
+
+    def release(self) -> None:
+        self.in_flight -= 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak,
+            "max_in_flight": self.max_in_flight,
+            "shed_total": self.shed,
+        }
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
+
+
+class AdmissionMiddleware:
+    """
+    Middleware ASGI: límite por IP del cliente y límite global de peticiones en
+    curso para las rutas con los prefijos dados. Las rutas de larga duración
+    (SSE y long-poll) solo pasan por el límite por IP: una conexión en espera
+    no ocupa capacidad de procesamiento.
+    """
+
+    def __init__(self, app, ip_limiter: RateLimiter, in_flight: InFlightLimiter,
+                 prefixes: Iterable[str], long_lived_suffixes: Iterable[str] = (),
+                 on_reject: Optional[Callable[[str], None]] = None):
+        self.app = app
+        self.ip_limiter = ip_limiter
+        self.in_flight = in_flight
+        self.prefixes = tuple(prefixes)
+        self.long_lived_suffixes = tuple(long_lived_suffixes)
+        # Recibe el motivo de cada rechazo ("ip" o "in_flight"): este middleware va
+        # por fuera del de métricas y sus respuestas no llegan a las de peticiones
+        self.on_reject = on_reject
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        retry_after = self.ip_limiter.acquire(client[0] if client else "-")
+        if retry_after:
+            self._rejected("ip")
+            await _reject(send, 429, "Demasiadas peticiones desde esta IP", retry_after)
+            return
+
+        if scope["path"].endswith(self.long_lived_suffixes):
+            await self.app(scope, receive, send)
+            return
+
+        if not self.in_flight.try_acquire():
+            self._rejected("in_flight")
+            await _reject(send, 503, "API saturada, intente de nuevo", 1.0)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight.release()
+
+    def _rejected(self, reason: str) -> None:
+        if self.on_reject is not None:
+            self.on_reject(reason)
+
+
+async def _reject(send, status_code: int, detail: str, retry_after: float) -> None:
+    body = json.dumps({"detail": detail}, ensure_ascii=False).encode("utf-8")
+    headers: List[Tuple[bytes, bytes]] = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"retry-after", retry_after_header(retry_after).encode()),
+    ]
+    await send({"type": "http.response.start", "status": status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
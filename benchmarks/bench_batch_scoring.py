@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark de scoring por lotes.
+Compara heuristic_micro_v2 fila por fila con heuristic_micro_v2_batch sobre
+un DataFrame sintético de 10k, 100k y 1M filas.
+
+Uso: python benchmarks/bench_batch_scoring.py [--sizes 10000,100000,1000000] [--scalar-max 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from credit_heuristic import heuristic_micro_v2, heuristic_micro_v2_batch  # noqa: E402
+
+
+def build_frame(n: int, seed: int = 42) -> pd.DataFrame:
+    """Datos sintéticos con el rango de valores que recibe la API"""
+    rng = np.random.default_rng(seed)
+    distance = rng.uniform(0, 80, n)
+    distance[rng.random(n) < 0.2] = np.nan
+    return pd.DataFrame({
+        "know_buyer": rng.integers(0, 6, n),
+        "buy_freq": rng.integers(0, 6, n),
+        "avg_purchase": rng.uniform(500, 300_000, n).round(2),
+        "psych_organized": rng.integers(1, 6, n),
+        "psych_plan": rng.integers(1, 6, n),
+        "distance_km": distance,
+        "address_verified": rng.random(n) < 0.6,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="tamaños de lote separados por coma")
+    parser.add_argument("--scalar-max", type=int, default=100_000,
+                        help="tamaño máximo para medir la versión escalar (se extrapola por encima)")
+    args = parser.parse_args()
+
+    print("📊 Scoring Micro v2: escalar vs lote")
+    print(f"   {'filas':>10} {'escalar (filas/s)':>18} {'lote (filas/s)':>16} {'lote (s)':>9} {'aceleración':>12}")
+    scalar_rate = None
+    for n in (int(size) for size in args.sizes.split(",")):
+        frame = build_frame(n)
+
+        started = time.perf_counter()
+        heuristic_micro_v2_batch(frame)
+        batch_seconds = time.perf_counter() - started
+        batch_rate = n / batch_seconds
+
+        measured = n <= args.scalar_max
+        if measured or scalar_rate is None:
+            rows = frame.head(min(n, args.scalar_max)).to_dict("records")
+            started = time.perf_counter()
+            for row in rows:
+                heuristic_micro_v2(row)
+            scalar_rate = len(rows) / (time.perf_counter() - started)
+        label = f"{scalar_rate:,.0f}" + ("" if measured else "*")
+        print(f"   {n:>10,} {label:>18} {batch_rate:>16,.0f} {batch_seconds:>9.3f} {batch_rate / scalar_rate:>11.1f}x")
+
+    print("   * tasa escalar extrapolada del tamaño medido más grande")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark del motor de calibración.
+Evalúa una grilla de variantes (por defecto 100) sobre un portafolio sintético
+(por defecto 100k registros) y compara con evaluar cada variante por separado
+con heuristic_micro_v2_batch.
+
+Uso: python benchmarks/bench_calibration.py [--rows 100000] [--variants 100] [--baseline 5]
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.bench_batch_scoring import build_frame  # noqa: E402
+from calibration import expand_grid, sweep  # noqa: E402
+from credit_heuristic import heuristic_micro_v2_batch  # noqa: E402
+from scoring_config import merge_config  # noqa: E402
+
+
+def build_grid(variants: int) -> dict:
+    """Grilla de aproximadamente `variants` combinaciones"""
+    side = max(1, math.ceil(variants ** 0.25))
+    grid = {
+        "income_prudence": np.linspace(0.10, 0.26, side).round(3).tolist(),
+        "max_cap": np.linspace(30_000, 60_000, side).round().tolist(),
+        "weights.know_buyer": np.linspace(0.12, 0.24, side).round(3).tolist(),
+        "category_thresholds": [[0.85 - d, 0.70 - d, 0.50 - d, 0.30 - d] for d in np.linspace(0, 0.1, side).round(3)],
+    }
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="registros del portafolio")
+    parser.add_argument("--variants", type=int, default=100, help="variantes aproximadas en la grilla")
+    parser.add_argument("--baseline", type=int, default=5, help="variantes a medir por separado (se extrapola)")
+    args = parser.parse_args()
+
+    portfolio = build_frame(args.rows)
+    variants = expand_grid(build_grid(args.variants))[:args.variants]
+
+    started = time.perf_counter()
+    sweep(portfolio, variants)
+    sweep_seconds = time.perf_counter() - started
+
+    sample = variants[:args.baseline]
+    started = time.perf_counter()
+    for overrides in sample:
+        heuristic_micro_v2_batch(portfolio, merge_config(overrides))
+    per_variant = (time.perf_counter() - started) / len(sample)
+
+    cells = len(variants) * args.rows
+    print(f"📐 Calibración: {len(variants):,} variantes × {args.rows:,} registros")
+    print(f"   sweep (broadcast)           {sweep_seconds:>8.2f} s   {cells / sweep_seconds:>14,.0f} evaluaciones/s")
+    print(f"   lote por variante (estimado) {per_variant * len(variants):>7.2f} s   "
+          f"{args.rows / per_variant:>14,.0f} evaluaciones/s")
+    print(f"   Aceleración: {per_variant * len(variants) / sweep_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
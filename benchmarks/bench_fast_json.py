@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark de latencia por endpoint con respuestas estándar de FastAPI
+(revalidación contra response_model + jsonable_encoder + json.dumps) frente a
+FAST_JSON_RESPONSES (serializador nativo de Pydantic / orjson).
+
+Las peticiones se envían directamente a la aplicación ASGI, sin red: se mide
+el ruteo, el handler y la serialización de la respuesta.
+
+Uso: python benchmarks/bench_fast_json.py [--calls 3000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Sin límites de admisión: todas las peticiones salen de la misma IP y tienda
+os.environ.setdefault("RATE_LIMIT_IP_PER_MINUTE", "0")
+os.environ.setdefault("RATE_LIMIT_STORE_PER_MINUTE", "0")
+
+import config  # noqa: E402
+import main  # noqa: E402
+from models import ClientData, StoreValidation, TransactionStatus  # noqa: E402
+from storage import calculate_credit_score, create_transaction, get_transaction, update_transaction  # noqa: E402
+
+
+async def call(method: str, path: str, body: bytes = b"") -> bytes:
+    """Envía una petición a la aplicación ASGI y retorna el cuerpo de la respuesta"""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80), "root_path": "",
+    }
+    received = False
+    chunks = []
+
+    async def receive():
+        nonlocal received
+        if received:
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start" and message["status"] >= 400:
+            raise RuntimeError(f"{method} {path}: {message['status']}")
+        if message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await main.app(scope, receive, send)
+    return b"".join(chunks)
+
+
+def completed_transactions(store_id: str, count: int) -> str:
+    token = None
+    for i in range(count):
+        token = create_transaction(store_id, "Bench").token
+        update_transaction(
+            token,
+            client_data=ClientData(telefono="3000000000", psych_organized=4, psych_plan=3),
+            store_validation=StoreValidation(cedula_cliente=str(i), nombre_cliente="Bench", know_buyer=4,
+                                             buy_freq=3, avg_purchase=75000, distance_km=2.5, address_verified=True),
+        )
+        update_transaction(token, credit_result=calculate_credit_score(get_transaction(token)),
+                           status=TransactionStatus.COMPLETED)
+    return token
+
+
+async def measure(method, path, body, calls) -> float:
+    for _ in range(min(calls, 200)):
+        await call(method, path, body)
+    started = time.perf_counter()
+    for _ in range(calls):
+        await call(method, path, body)
+    return 1e6 * (time.perf_counter() - started) / calls
+
+
+async def bench(calls: int):
+    token = completed_transactions("BENCH", 50)
+    endpoints = [
+        ("GET", "/health", b""),
+        ("GET", "/admin/stats", b""),
+        ("POST", "/transactions/initiate", json.dumps({"store_id": "INIT", "tendero_name": "Bench"}).encode()),
+        ("POST", "/transactions/validate_token", json.dumps({"token": token}).encode()),
+        ("GET", f"/transactions/{token}/status/wait?since=pending", b""),
+        ("GET", "/stores/BENCH/transactions?limit=50", b""),
+    ]
+
+    print(f"⚡ Latencia por endpoint ({calls:,} llamadas, en proceso)")
+    print(f"   {'endpoint':<52} {'estándar':>10} {'rápido':>10} {'mejora':>8}")
+    for method, path, body in endpoints:
+        config.FAST_JSON_RESPONSES = False
+        standard = await measure(method, path, body, calls)
+        config.FAST_JSON_RESPONSES = True
+        fast = await measure(method, path, body, calls)
+        label = f"{method} {path.replace(token, '{token}')}"
+        print(f"   {label:<52} {standard:>7.1f} µs {fast:>7.1f} µs {standard / fast:>7.2f}x")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=3_000, help="llamadas por endpoint y modo")
+    args = parser.parse_args()
+    main.setup_logging(level="WARNING")
+    asyncio.run(bench(args.calls))
+    main.shutdown_logging()
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark del journal de transacciones: escritura con group commit, tiempo de
+recuperación (replay) de un journal sin snapshot y de un snapshot compactado.
+Cada transacción genera 6 entradas: creación, datos del cliente, validación del
+tendero, PROCESSING, resultado crediticio y COMPLETED.
+
+Uso: python benchmarks/bench_journal_replay.py [--entries 1000000] [--dir /tmp/journal]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from credit_heuristic import heuristic_micro_v2  # noqa: E402
+from journal import TransactionJournal  # noqa: E402
+from models import ClientData, CreditResult, StoreValidation, TransactionStatus  # noqa: E402
+from storage_backends import create_backend  # noqa: E402
+
+ENTRIES_PER_TRANSACTION = 6
+
+
+def write_journal(directory: str, transactions: int) -> float:
+    """Escribe el journal a través del backend en memoria. Retorna segundos."""
+    # snapshot_every alto: el benchmark mide el replay del journal completo
+    journal = TransactionJournal(directory, snapshot_every=10 ** 12)
+    backend = create_backend("memory", 15, 600, journal=journal)
+    credit_result = CreditResult(**heuristic_micro_v2({
+        "know_buyer": 4, "buy_freq": 3, "avg_purchase": 75_000, "psych_organized": 4,
+        "psych_plan": 3, "distance_km": 2.5, "address_verified": True,
+    })).model_dump()
+    client_data = ClientData(telefono="3001234567", psych_organized=4, psych_plan=3)
+
+    started = time.perf_counter()
+    for i in range(transactions):
+        token = backend.create_transaction(f"TIENDA_{i % 500:03d}", "Tendero").token
+        backend.update_transaction(token, client_data=client_data, status=TransactionStatus.CLIENT_DATA_RECEIVED)
+        backend.update_transaction(token, status=TransactionStatus.STORE_VALIDATION_RECEIVED, store_validation=StoreValidation(
+            cedula_cliente=f"{10_000_000 + i}", nombre_cliente=f"Cliente {i}",
+            know_buyer=4, buy_freq=3, avg_purchase=75_000, distance_km=2.5, address_verified=True
+        ))
+        backend.update_transaction(token, status=TransactionStatus.PROCESSING)
+        backend.update_transaction(token, credit_result=credit_result)
+        backend.update_transaction(token, status=TransactionStatus.COMPLETED)
+    journal.flush()
+    elapsed = time.perf_counter() - started
+    journal.close(snapshot=False)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=1_000_000, help="entradas de journal a generar")
+    parser.add_argument("--dir", default=None, help="directorio del journal (por defecto uno temporal)")
+    args = parser.parse_args()
+
+    directory = args.dir or tempfile.mkdtemp(prefix="journal-bench-")
+    transactions = max(1, args.entries // ENTRIES_PER_TRANSACTION)
+    entries = transactions * ENTRIES_PER_TRANSACTION
+    try:
+        print(f"📝 Journal: {entries:,} entradas ({transactions:,} transacciones) en {directory}")
+        write_seconds = write_journal(directory, transactions)
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        print(f"   Escritura: {write_seconds:.2f}s ({entries / write_seconds:,.0f} entradas/s), "
+              f"{size / 1e6:.1f} MB en disco")
+
+        started = time.perf_counter()
+        journal = TransactionJournal(directory)
+        backend = create_backend("memory", 15, 600, journal=journal)
+        replay_seconds = time.perf_counter() - started
+        assert backend.count() == transactions
+        print(f"   Replay journal: {replay_seconds:.2f}s ({entries / replay_seconds:,.0f} entradas/s), "
+              f"{backend.count():,} transacciones recuperadas")
+
+        # Cierre ordenado: el estado queda compactado en un snapshot (una entrada por transacción)
+        journal.close(snapshot=True)
+        started = time.perf_counter()
+        journal = TransactionJournal(directory)
+        backend = create_backend("memory", 15, 600, journal=journal)
+        snapshot_seconds = time.perf_counter() - started
+        assert backend.count() == transactions
+        print(f"   Replay snapshot: {snapshot_seconds:.2f}s ({transactions / snapshot_seconds:,.0f} transacciones/s)")
+        journal.close(snapshot=False)
+    finally:
+        if args.dir is None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga del flujo completo (el de test_e2e.py) con tiendas simuladas
+concurrentes. Cada tienda ejecuta --flows-per-store flujos seguidos:
+initiate → webhook de WhatsApp → webhook del POS → consulta del estado cada
+--poll-interval-ms hasta que el crédito se completa.
+
+Modos:
+- en proceso (por defecto): las peticiones van directo a la aplicación ASGI de
+  main.py, con su lifespan (cola de trabajos, barrido). El generador comparte
+  el event loop y la CPU con la API: mide el costo de la API, no la red.
+  Los límites de tienda e IP se desactivan salvo que se definan en el entorno.
+- --url http://host:puerto: contra un servidor en marcha, con conexiones
+  HTTP/1.1 persistentes (una por tienda como máximo).
+
+Reporta p50/p95/p99 por endpoint, errores por código, créditos completados por
+segundo y la distribución de categorías. Con --json el resultado se guarda
+para compararlo entre commits con --compare.
+
+Uso: python benchmarks/bench_load.py [--stores 50] [--flows-per-store 10] [--url URL]
+                                     [--json resultado.json] [--compare base.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import h11
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Perfiles de cliente de test_e2e.py (categorías altas, medias y bajas)
+PROFILES = [
+    ({"psych_organized": 5, "psych_plan": 5},
+     {"know_buyer": 5, "buy_freq": 5, "avg_purchase": 150000, "distance_km": 1.0, "address_verified": True}),
+    ({"psych_organized": 4, "psych_plan": 3},
+     {"know_buyer": 4, "buy_freq": 3, "avg_purchase": 75000, "distance_km": 2.5, "address_verified": True}),
+    ({"psych_organized": 3, "psych_plan": 3},
+     {"know_buyer": 3, "buy_freq": 2, "avg_purchase": 50000, "distance_km": 5.0, "address_verified": False}),
+    ({"psych_organized": 1, "psych_plan": 1},
+     {"know_buyer": 1, "buy_freq": 1, "avg_purchase": 10000, "distance_km": 50.0, "address_verified": False}),
+]
+FINAL_STATUSES = {"completed", "error", "expired"}
+ENDPOINTS = ("initiate", "whatsapp", "pos", "status")
+
+Response = Tuple[int, bytes]
+
+
+class ASGITransport:
+    """Peticiones directas a la aplicación ASGI (sin red)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method: str, path: str, payload: Optional[dict], client_ip: str) -> Response:
+        body = json.dumps(payload).encode() if payload is not None else b""
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+            "headers": [(b"host", b"load"), (b"content-type", b"application/json")],
+            "client": (client_ip, 50000), "server": ("load", 80), "root_path": "",
+        }
+        received = False
+        status_code, chunks = 0, []
+
+        async def receive():
+            nonlocal received
+            if received:
+                return {"type": "http.disconnect"}
+            received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return status_code, b"".join(chunks)
+
+    async def close(self) -> None:
+        pass
+
+
+class HTTPTransport:
+    """Peticiones HTTP/1.1 con conexiones persistentes (pool del cliente de Sistecrédito)"""
+
+    def __init__(self, url: str, max_connections: int):
+        from sistecredito_client import ConnectionPool
+
+        parts = urlsplit(url)
+        self.base_path = parts.path.rstrip("/")
+        self.host_header = parts.netloc
+        self.pool = ConnectionPool(parts.hostname, parts.port or (443 if parts.scheme == "https" else 80),
+                                   parts.scheme == "https", max_connections, connect_timeout_seconds=5.0)
+
+    async def request(self, method: str, path: str, payload: Optional[dict], client_ip: str) -> Response:
+        body = json.dumps(payload).encode() if payload is not None else b""
+        headers = [("Host", self.host_header), ("Content-Type", "application/json"),
+                   ("Content-Length", str(len(body)))]
+        connection, _ = await self.pool.acquire()
+        ok = False
+        try:
+            response = await connection.request(method, self.base_path + path, headers, body)
+            ok = True
+            return response
+        finally:
+            self.pool.release(connection, reuse=ok)
+
+    async def close(self) -> None:
+        self.pool.close()
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.status_codes: Dict[str, Counter] = defaultdict(Counter)
+        self.errors: Dict[str, int] = Counter()
+        self.flows = Counter()
+        self.categories = Counter()
+
+    def record(self, endpoint: str, started: float, status_code: int) -> None:
+        self.latencies[endpoint].append((time.perf_counter() - started) * 1000)
+        self.status_codes[endpoint][status_code] += 1
+        if status_code >= 400 or status_code == 0:
+            self.errors[endpoint] += 1
+
+
+async def call(transport, stats: LoadStats, endpoint: str, method: str, path: str,
+               payload: Optional[dict], client_ip: str) -> Optional[dict]:
+    """Hace la petición y registra su latencia; retorna el JSON o None si falló"""
+    started = time.perf_counter()
+    try:
+        status_code, body = await transport.request(method, path, payload, client_ip)
+    except (OSError, asyncio.TimeoutError, h11.ProtocolError) as error:
+        stats.record(endpoint, started, 0)
+        stats.status_codes[endpoint][type(error).__name__] += 1
+        return None
+    stats.record(endpoint, started, status_code)
+    if status_code >= 400:
+        return None
+    return json.loads(body) if body else {}
+
+
+async def run_flow(transport, stats: LoadStats, store: int, flow: int, args) -> None:
+    client_ip = f"10.{store // 250}.{store % 250}.1"
+    client, validation = PROFILES[(store + flow) % len(PROFILES)]
+    stats.flows["started"] += 1
+
+    initiated = await call(transport, stats, "initiate", "POST", "/transactions/initiate",
+                           {"store_id": f"LOAD_{store:04d}", "tendero_name": f"Tendero {store}"}, client_ip)
+    if initiated is None:
+        stats.flows["failed"] += 1
+        return
+    token = initiated["token"]
+
+    whatsapp = {"token": token, "telefono": f"300{store:04d}{flow:03d}", "direccion": "Calle 123 #45-67",
+                "ingresos_mensuales": 1500000, "trabajo": "Empleado", **client}
+    pos = {"token": token, "cedula_cliente": f"{store:04d}{flow:04d}", "nombre_cliente": "Cliente de carga",
+           **validation}
+    if (await call(transport, stats, "whatsapp", "POST", "/webhooks/whatsapp", whatsapp, client_ip) is None
+            or await call(transport, stats, "pos", "POST", "/webhooks/pos", pos, client_ip) is None):
+        stats.flows["failed"] += 1
+        return
+
+    deadline = time.perf_counter() + args.flow_timeout
+    while time.perf_counter() < deadline:
+        data = await call(transport, stats, "status", "GET", f"/transactions/{token}/status", None, client_ip)
+        if data is not None and data["status"] in FINAL_STATUSES:
+            if data["status"] == "completed":
+                stats.flows["completed"] += 1
+                stats.categories[data["result"]["category"]] += 1
+            else:
+                stats.flows["failed"] += 1
+            return
+        await asyncio.sleep(args.poll_interval_ms / 1000.0)
+    stats.flows["timed_out"] += 1
+
+
+async def run_store(transport, stats: LoadStats, store: int, args) -> None:
+    for flow in range(args.flows_per_store):
+        await run_flow(transport, stats, store, flow, args)
+
+
+async def run_load(transport, args) -> Tuple[LoadStats, float]:
+    stats = LoadStats()
+    started = time.perf_counter()
+    await asyncio.gather(*(run_store(transport, stats, store, args) for store in range(args.stores)))
+    return stats, time.perf_counter() - started
+
+
+async def run_in_process(args) -> Tuple[LoadStats, float]:
+    import main
+
+    async with main.app.router.lifespan_context(main.app):
+        transport = ASGITransport(main.app)
+        # Calentamiento: un flujo completo fuera de las estadísticas
+        await run_flow(transport, LoadStats(), args.stores, 0, args)
+        return await run_load(transport, args)
+
+
+async def run_against_url(args) -> Tuple[LoadStats, float]:
+    transport = HTTPTransport(args.url, max_connections=args.stores)
+    try:
+        return await run_load(transport, args)
+    finally:
+        await transport.close()
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))] if values else 0.0
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(stats: LoadStats, seconds: float, args) -> Dict[str, Any]:
+    endpoints = {}
+    for endpoint in ENDPOINTS:
+        latencies = stats.latencies.get(endpoint, [])
+        requests_total = len(latencies)
+        endpoints[endpoint] = {
+            "requests": requests_total,
+            "errors": stats.errors[endpoint],
+            "error_rate": round(stats.errors[endpoint] / requests_total, 4) if requests_total else 0.0,
+            "p50_ms": round(percentile(latencies, 0.50), 3),
+            "p95_ms": round(percentile(latencies, 0.95), 3),
+            "p99_ms": round(percentile(latencies, 0.99), 3),
+            "mean_ms": round(statistics.mean(latencies), 3) if latencies else 0.0,
+            "max_ms": round(max(latencies), 3) if latencies else 0.0,
+            "status_codes": {str(code): count for code, count in sorted(stats.status_codes[endpoint].items(),
+                                                                         key=lambda item: str(item[0]))},
+        }
+    requests_total = sum(endpoint["requests"] for endpoint in endpoints.values())
+    return {
+        "label": args.label,
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "mode": args.url or "in-process",
+        "stores": args.stores,
+        "flows_per_store": args.flows_per_store,
+        "poll_interval_ms": args.poll_interval_ms,
+        "duration_seconds": round(seconds, 3),
+        "flows": {key: stats.flows[key] for key in ("started", "completed", "failed", "timed_out")},
+        "credits_per_second": round(stats.flows["completed"] / seconds, 2) if seconds else 0.0,
+        "requests_per_second": round(requests_total / seconds, 1) if seconds else 0.0,
+        "error_rate": round(sum(stats.errors.values()) / requests_total, 4) if requests_total else 0.0,
+        "categories": dict(sorted(stats.categories.items())),
+        "endpoints": endpoints,
+    }
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    flows = result["flows"]
+    print(f"🏪 {result['stores']} tiendas × {result['flows_per_store']} flujos ({result['mode']}), "
+          f"{result['duration_seconds']:.1f} s")
+    print(f"   créditos completados {flows['completed']:,}/{flows['started']:,} "
+          f"({result['credits_per_second']:,.1f}/s), fallidos {flows['failed']}, sin terminar {flows['timed_out']}")
+    print(f"   peticiones {result['requests_per_second']:,.0f}/s, tasa de error {result['error_rate']:.2%}, "
+          f"categorías {result['categories']}")
+    print(f"\n   {'endpoint':<10} {'peticiones':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errores':>8}  códigos")
+    for name, endpoint in result["endpoints"].items():
+        print(f"   {name:<10} {endpoint['requests']:>10,} {endpoint['p50_ms']:>8.2f} {endpoint['p95_ms']:>8.2f} "
+              f"{endpoint['p99_ms']:>8.2f} {endpoint['errors']:>8}  {endpoint['status_codes']}")
+
+
+def print_comparison(result: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    def change(new, old):
+        return f"{(new - old) / old:+.1%}" if old else "n/a"
+
+    print(f"\n📊 Contra {baseline.get('label') or 'la base'} "
+          f"(commit {baseline.get('commit')}, {baseline.get('timestamp')}, {baseline.get('mode')})")
+    print(f"   créditos/s {baseline['credits_per_second']:,.1f} → {result['credits_per_second']:,.1f} "
+          f"({change(result['credits_per_second'], baseline['credits_per_second'])})")
+    for name, endpoint in result["endpoints"].items():
+        old = baseline["endpoints"].get(name)
+        if old is None:
+            continue
+        print(f"   {name:<10} p50 {change(endpoint['p50_ms'], old['p50_ms']):>7}  "
+              f"p95 {change(endpoint['p95_ms'], old['p95_ms']):>7}  p99 {change(endpoint['p99_ms'], old['p99_ms']):>7}  "
+              f"errores {old['error_rate']:.2%} → {endpoint['error_rate']:.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stores", type=int, default=50, help="tiendas simuladas concurrentes")
+    parser.add_argument("--flows-per-store", type=int, default=10)
+    parser.add_argument("--url", default="", help="URL de un servidor en marcha (por defecto: en proceso)")
+    parser.add_argument("--poll-interval-ms", type=float, default=50.0)
+    parser.add_argument("--flow-timeout", type=float, default=30.0, help="segundos de espera del resultado")
+    parser.add_argument("--label", default="", help="nombre de la corrida en el JSON")
+    parser.add_argument("--json", dest="json_path", help="guardar el resultado en este archivo")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args()
+
+    if args.url:
+        stats, seconds = asyncio.run(run_against_url(args))
+    else:
+        # Todas las tiendas y peticiones salen de este proceso: sin límites de admisión ni logs por petición
+        os.environ.setdefault("RATE_LIMIT_STORE_PER_MINUTE", "0")
+        os.environ.setdefault("RATE_LIMIT_IP_PER_MINUTE", "0")
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        stats, seconds = asyncio.run(run_in_process(args))
+
+    result = summarize(stats, seconds, args)
+    print_report(result)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline:
+            print_comparison(result, json.load(baseline))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as output:
+            json.dump(result, output, indent=2, ensure_ascii=False)
+        print(f"\n💾 Resultado guardado en {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
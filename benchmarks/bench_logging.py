@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark del costo de logging por petición en el camino de los webhooks.
+Cada "petición" emite los mismos eventos que un par de webhooks completo
+(recepción, procesamiento, registro en Sistecrédito y cierre) y se mide el
+tiempo en el hilo que emite:
+
+- print: las ~12 líneas con print() que se usaban antes, a un archivo
+- logging apagado: LOG_LEVEL=WARNING (los eventos INFO/DEBUG no se construyen)
+- logging JSON: eventos estructurados encolados y escritos por el listener
+- logging JSON + DEBUG muestreado al 10%
+
+Uso: python benchmarks/bench_logging.py [--requests 50000]
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from structured_logging import get_logger, set_token, setup_logging, shutdown_logging  # noqa: E402
+
+RESULT = {
+    "nombre_cliente": "Juan Pérez", "cedula_cliente": "12345678", "category": "A", "score_conf": 0.8123,
+    "risk_pct": 18.77, "cupo_estimated": 50000.0, "comp_feature": 31234.5, "comp_income": 81234.5,
+}
+
+
+def request_with_print(i: int) -> None:
+    print(f"⏳ ESPERANDO DATOS DEL TENDERO: Solo datos del cliente recibidos")
+    print(f"✅ PROCESANDO CRÉDITO: Ambos datos completos")
+    print(f"🎯 SIMULACIÓN SISTECRÉDITO:")
+    print(f"   Token: tok-{i}")
+    print(f"   Cliente: {RESULT['nombre_cliente']} ({RESULT['cedula_cliente']})")
+    print(f"   Categoría: {RESULT['category']}")
+    print(f"   Puntaje: {RESULT['score_conf']:.4f}")
+    print(f"   Riesgo: {RESULT['risk_pct']:.2f}%")
+    print(f"   Cupo Estimado: ${RESULT['cupo_estimated']:,.2f}")
+    print(f"   Componente Feature: ${RESULT['comp_feature']:,.2f}")
+    print(f"   Componente Income: ${RESULT['comp_income']:,.2f}")
+    print("-" * 50)
+    print(f"✅ CRÉDITO COMPLETADO: Estado cambiado a COMPLETED")
+
+
+log = get_logger("bench")
+
+
+def request_with_logging(i: int) -> None:
+    set_token(f"tok-{i}")
+    log.debug("waiting_store_validation")
+    log.info("credit_processing")
+    log.info("sistecredito_registered", **RESULT)
+    log.info("credit_completed", category=RESULT["category"], cupo_estimated=RESULT["cupo_estimated"])
+
+
+def run(label, fn, requests):
+    started = time.perf_counter()
+    for i in range(requests):
+        fn(i)
+    seconds = time.perf_counter() - started
+    print(f"   {label:<32} {1e6 * seconds / requests:>8.2f} µs/petición", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50_000, help="peticiones simuladas")
+    args = parser.parse_args()
+
+    print(f"📝 Costo de logging por petición ({args.requests:,} peticiones)", file=sys.stderr)
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "print.log"), "w", encoding="utf-8") as out, contextlib.redirect_stdout(out):
+            run("print", request_with_print, args.requests)
+
+        for label, level, rate in (("logging apagado (WARNING)", "WARNING", 1.0),
+                                   ("logging JSON (INFO)", "INFO", 1.0),
+                                   ("logging JSON (DEBUG al 10%)", "DEBUG", 0.1)):
+            with open(os.path.join(tmp, "events.log"), "w", encoding="utf-8") as out:
+                setup_logging(level=level, debug_sample_rate=rate, queue_size=args.requests * 4, stream=out)
+                run(label, request_with_logging, args.requests)
+                shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
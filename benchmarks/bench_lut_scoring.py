@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los modos de scoring de una petición.
+Compara, sobre la misma carga sintética, el cálculo completo por llamada
+(CompiledScorer.score), la tabla precalculada de términos discretos
+(CompiledScorer.score_lut) y el memo LRU de entradas repetidas (ScoreMemo).
+
+Uso: python benchmarks/bench_lut_scoring.py [--calls 200000] [--distinct 5000] [--memo-size 10000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from credit_heuristic import ScoreMemo, compile_config  # noqa: E402
+
+
+def build_rows(calls: int, distinct: int, seed: int = 42) -> list:
+    """`calls` peticiones tomadas de `distinct` entradas distintas (tipos como llegan de la API)"""
+    rng = random.Random(seed)
+    pool = [{
+        "know_buyer": rng.randint(0, 5),
+        "buy_freq": rng.randint(0, 5),
+        "avg_purchase": float(rng.choice([20_000, 50_000, 75_000, rng.randint(1_000, 200_000)])),
+        "psych_organized": rng.randint(1, 5),
+        "psych_plan": rng.randint(1, 5),
+        "distance_km": rng.choice([None, 1.0, 2.5, round(rng.uniform(0, 60), 1)]),
+        "address_verified": rng.random() < 0.6,
+    } for _ in range(distinct)]
+    return [rng.choice(pool) for _ in range(calls)]
+
+
+def run(label, fn, rows, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for row in rows:
+            fn(row)
+        best = min(best, time.perf_counter() - started)
+    rate = len(rows) / best
+    print(f"   {label:<28} {rate:>12,.0f} llamadas/s   {1e6 * best / len(rows):>6.2f} µs/llamada")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200_000, help="llamadas por repetición")
+    parser.add_argument("--distinct", type=int, default=5_000, help="entradas distintas en la carga")
+    parser.add_argument("--memo-size", type=int, default=10_000, help="tamaño máximo del memo")
+    parser.add_argument("--repeat", type=int, default=3, help="repeticiones (se reporta la mejor)")
+    args = parser.parse_args()
+
+    scorer = compile_config()
+    rows = build_rows(args.calls, args.distinct)
+    print(f"🧮 Modos de scoring ({args.calls:,} llamadas sobre {args.distinct:,} entradas distintas)")
+    exact = run("exacto (score)", scorer.score, rows, args.repeat)
+    lut = run("tabla (score_lut)", scorer.score_lut, rows, args.repeat)
+
+    memo = ScoreMemo(args.memo_size)
+    memo_rate = run("tabla + memo LRU", lambda row: memo.score(scorer, row, lut=True), rows, args.repeat)
+    stats = memo.as_dict()
+    print(f"   memo: {stats['hits']:,} aciertos / {stats['misses']:,} fallos "
+          f"(tasa {stats['hit_rate']:.1%}), {stats['evictions']:,} desalojos")
+    print(f"   Aceleración vs exacto: tabla {lut / exact:.2f}x, tabla + memo {memo_rate / exact:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
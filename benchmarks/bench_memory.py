@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memoria por transacción en el almacén en memoria.
+Compara el modelo Pydantic completo (antes) con el registro compacto
+records.TransactionRecord (después) para transacciones completadas.
+
+Uso: python benchmarks/bench_memory.py [--n 1000000]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from credit_heuristic import heuristic_micro_v2  # noqa: E402
+from models import ClientData, CreditResult, StoreValidation, Transaction, TransactionStatus  # noqa: E402
+from records import TransactionRecord  # noqa: E402
+
+
+def build_transaction(i: int, credit_result: dict) -> Transaction:
+    """Transacción completada con datos únicos por registro"""
+    return Transaction(
+        token=str(uuid.uuid4()),
+        status=TransactionStatus.COMPLETED,
+        expires_at=datetime.now() + timedelta(minutes=15),
+        client_data=ClientData(
+            telefono=f"300{i:07d}", direccion=f"Calle {i} #45-67",
+            ingresos_mensuales=1_500_000.0, trabajo="Empleado",
+            psych_organized=4, psych_plan=3
+        ),
+        store_validation=StoreValidation(
+            cedula_cliente=f"{10_000_000 + i}", nombre_cliente=f"Cliente {i}",
+            know_buyer=4, buy_freq=3, avg_purchase=75_000.0 + i % 1000,
+            distance_km=2.5, address_verified=True
+        ),
+        credit_result={**credit_result, "features": dict(credit_result["features"])},
+    )
+
+
+def measure(n: int, compact: bool) -> float:
+    """Bytes asignados por transacción almacenada"""
+    credit_result = CreditResult(**heuristic_micro_v2({
+        "know_buyer": 4, "buy_freq": 3, "avg_purchase": 75_000, "psych_organized": 4,
+        "psych_plan": 3, "distance_km": 2.5, "address_verified": True,
+    })).model_dump()
+
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    storage = {}
+    for i in range(n):
+        transaction = build_transaction(i, credit_result)
+        storage[transaction.token] = TransactionRecord.from_model(transaction) if compact else transaction
+    del transaction
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del storage
+    gc.collect()
+    return used / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=1_000_000, help="número de transacciones")
+    args = parser.parse_args()
+
+    print(f"📦 Memoria por transacción completada ({args.n:,} registros)")
+    results = {}
+    for label, compact in (("Pydantic Transaction (antes)", False), ("TransactionRecord (después)", True)):
+        started = time.perf_counter()
+        results[label] = measure(args.n, compact)
+        print(f"   {label:<30} {results[label]:>8,.0f} bytes/tx   ({time.perf_counter() - started:.1f}s)")
+
+    before, after = results.values()
+    print(f"   Reducción: {100 * (1 - after / before):.1f}%  ({before / after:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark del costo de las métricas de Prometheus en la ruta caliente:
+- costo por operación: observar un histograma, el timer de una etapa e
+  incrementar un contador
+- latencia de GET /transactions/{token}/status con y sin MetricsMiddleware
+  (las peticiones van directo a la aplicación ASGI, sin red)
+- tiempo de exportar /metrics con todas las series creadas
+
+Uso: python benchmarks/bench_metrics.py [--calls 5000]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Sin límites de admisión: todas las peticiones salen de la misma IP
+os.environ.setdefault("RATE_LIMIT_IP_PER_MINUTE", "0")
+
+import main  # noqa: E402
+from metrics import MetricsMiddleware, registry, stage_seconds, status_transitions  # noqa: E402
+from storage import create_transaction  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_fast_json import call  # noqa: E402
+
+
+def per_operation(label, fn, iterations=200_000):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    print(f"   {label:<38} {(time.perf_counter() - started) / iterations * 1e9:>8.0f} ns")
+
+
+def timed_block(child):
+    with child.time():
+        pass
+
+
+async def latencies(path, calls):
+    samples = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        await call("GET", path)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return samples
+
+
+def set_instrumented(enabled):
+    """Reconstruye la pila de middlewares con o sin MetricsMiddleware"""
+    app = main.app
+    if not hasattr(app, "_all_middleware"):
+        app._all_middleware = list(app.user_middleware)
+    app.user_middleware = [m for m in app._all_middleware if enabled or m.cls is not MetricsMiddleware]
+    app.middleware_stack = app.build_middleware_stack()
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=5000)
+    args = parser.parse_args()
+
+    print("⏱️  Costo por operación")
+    child = stage_seconds.labels("bench")
+    counter = status_transitions.labels("bench", "bench")
+    per_operation("histogram.observe()", lambda: child.observe(0.003))
+    per_operation("with stage.time()", lambda: timed_block(child))
+    per_operation("counter.inc()", counter.inc)
+    per_operation("labels() + observe()", lambda: stage_seconds.labels("bench").observe(0.003))
+
+    token = create_transaction("S1", "Ana").token
+    path = f"/transactions/{token}/status"
+    print(f"\n🌐 GET {path.replace(token, '{token}')} ({args.calls:,} peticiones, µs)")
+    for label, enabled in (("sin MetricsMiddleware", False), ("con MetricsMiddleware", True)):
+        set_instrumented(enabled)
+        asyncio.run(latencies(path, 200))  # calentamiento
+        samples = sorted(asyncio.run(latencies(path, args.calls)))
+        print(f"   {label:<38} media {statistics.mean(samples):>7.1f}  "
+              f"p50 {samples[len(samples) // 2]:>7.1f}  p99 {samples[int(len(samples) * 0.99)]:>7.1f}")
+
+    started = time.perf_counter()
+    body = registry.render()
+    print(f"\n📤 Exportar /metrics: {len(body):,} bytes en {(time.perf_counter() - started) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main_bench()
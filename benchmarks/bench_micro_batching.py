@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark del micro-batching de scoring.
+Varios hilos llamadores (como los workers de la cola de trabajos) puntúan la
+misma carga sintética: directamente con CompiledScorer.score y a través de
+ScoringExecutor con distintas ventanas y pools. Reporta el throughput, la
+latencia p50/p95 por llamada y el tamaño medio de los lotes.
+
+Uso: python benchmarks/bench_micro_batching.py [--calls 20000] [--callers 16]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.bench_lut_scoring import build_rows  # noqa: E402
+from credit_heuristic import compile_config  # noqa: E402
+from scoring_executor import ScoringExecutor  # noqa: E402
+
+
+def run(label, score, rows, callers):
+    latencies = []
+
+    def call(row):
+        started = time.perf_counter()
+        score(row)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        list(pool.map(call, rows))
+    seconds = time.perf_counter() - started
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000
+    print(f"   {label:<30} {len(rows) / seconds:>10,.0f} llamadas/s   p50 {p50:6.2f} ms   p95 {p95:6.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20_000, help="llamadas totales")
+    parser.add_argument("--callers", type=int, default=16, help="hilos llamadores concurrentes")
+    parser.add_argument("--max-batch", type=int, default=64, help="tamaño máximo de lote")
+    args = parser.parse_args()
+
+    scorer = compile_config()
+    rows = build_rows(args.calls, args.calls)
+    print(f"📦 Micro-batching ({args.calls:,} llamadas, {args.callers} llamadores concurrentes)")
+    run("directo (score)", scorer.score, rows, args.callers)
+    for pool, window_ms in (("thread", 1.0), ("thread", 5.0), ("process", 5.0)):
+        executor = ScoringExecutor(window_ms=window_ms, max_batch=args.max_batch, pool=pool)
+        try:
+            executor.score(scorer, rows[0])  # arranque del pool fuera de la medición
+            run(f"lotes {pool} {window_ms:g} ms", lambda row: executor.score(scorer, row), rows, args.callers)
+        finally:
+            executor.close()
+        print(f"      lote medio {executor.as_dict()['avg_batch_size']}")
+
+
+if __name__ == "__main__":
+    main()
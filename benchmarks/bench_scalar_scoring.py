@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark del scoring de una sola petición.
+Compara heuristic_micro_v2 (NumPy/pandas sobre escalares) con
+heuristic_micro_v2_fast (Python puro) en llamadas por segundo.
+
+Uso: python benchmarks/bench_scalar_scoring.py [--calls 200000] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from credit_heuristic import heuristic_micro_v2, heuristic_micro_v2_fast  # noqa: E402
+
+ROW = {
+    "know_buyer": 4, "buy_freq": 3, "avg_purchase": 75000.0, "psych_organized": 4,
+    "psych_plan": 3, "distance_km": 2.5, "address_verified": True,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200_000, help="llamadas por repetición")
+    parser.add_argument("--repeat", type=int, default=5, help="repeticiones (se reporta la mejor)")
+    args = parser.parse_args()
+
+    print(f"⚡ Scoring de una petición ({args.calls:,} llamadas, mejor de {args.repeat})")
+    rates = {}
+    for label, fn in (("heuristic_micro_v2 (antes)", heuristic_micro_v2),
+                      ("heuristic_micro_v2_fast (después)", heuristic_micro_v2_fast)):
+        best = min(timeit.repeat(lambda: fn(ROW), number=args.calls, repeat=args.repeat))
+        rates[label] = args.calls / best
+        print(f"   {label:<34} {rates[label]:>12,.0f} llamadas/s   {1e6 * best / args.calls:>7.2f} µs/llamada")
+
+    before, after = rates.values()
+    print(f"   Aceleración: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
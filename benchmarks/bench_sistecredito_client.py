@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark del registro en Sistecrédito contra el stub local (sin red externa).
+Cada escenario registra --registrations créditos con --concurrency llamadas
+simultáneas y reporta el throughput, la latencia por registro (p50/p95/p99)
+y los errores:
+
+- requests sin pool: una conexión nueva por registro (cliente síncrono en hilos)
+- cliente async: pool de conexiones persistentes
+- cliente async + batching: lotes de hasta 16 registros por petición
+- cliente async con 10% de fallas 503: reintentos con backoff y jitter
+- upstream colgado: timeouts y circuit breaker (las llamadas fallan rápido)
+
+Uso: python benchmarks/bench_sistecredito_client.py [--registrations 1000] [--concurrency 50] [--latency-ms 20]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sistecredito_client import SistecreditoClient, SistecreditoError  # noqa: E402
+from sistecredito_stub import StubSettings, create_app, start_in_thread  # noqa: E402
+from structured_logging import setup_logging, shutdown_logging  # noqa: E402
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))] if values else 0.0
+
+
+def report(label, seconds, latencies, errors, extra=""):
+    print(f"   {label:<34} {len(latencies) / seconds:>8,.0f} reg/s   "
+          f"p50 {percentile(latencies, 0.5):>7.1f}  p95 {percentile(latencies, 0.95):>7.1f}  "
+          f"p99 {percentile(latencies, 0.99):>7.1f} ms   errores {errors:>4}{extra}")
+
+
+def payload(i):
+    return {"reference": f"bench-{i}", "category": "A", "cupo_estimated": 50000.0}
+
+
+def run_requests(url, registrations, concurrency):
+    def one(i):
+        started = time.perf_counter()
+        try:
+            requests.post(f"{url}/credits", json=payload(i), timeout=2).raise_for_status()
+            return (time.perf_counter() - started) * 1000, False
+        except requests.RequestException:
+            return (time.perf_counter() - started) * 1000, True
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(registrations)))
+    report("requests sin pool", time.perf_counter() - started,
+           [latency for latency, _ in results], sum(error for _, error in results))
+
+
+async def run_client(label, url, registrations, concurrency, **options):
+    client = SistecreditoClient(url, **options)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await client.register(payload(i))
+            except SistecreditoError:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(registrations)))
+    seconds = time.perf_counter() - started
+    stats = client.as_dict()
+    await client.close()
+    report(label, seconds, latencies, errors,
+           f"   conexiones {stats['pool']['opened_total']}, reintentos {stats['retries_total']}, "
+           f"rechazos breaker {stats['rejected_open_total']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--registrations", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="latencia base del stub")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="latencia aleatoria adicional del stub")
+    args = parser.parse_args()
+    setup_logging(level="ERROR")
+
+    settings = StubSettings(args.latency_ms, args.jitter_ms, seed=7)
+    url, stop = start_in_thread(create_app(settings))
+    n, c = args.registrations, args.concurrency
+    print(f"🏦 Registro en Sistecrédito ({n:,} registros, {c} simultáneos, "
+          f"stub {args.latency_ms:g}±{args.jitter_ms:g} ms)")
+    try:
+        run_requests(url, n, c)
+        asyncio.run(run_client("cliente async (pool)", url, n, c, max_connections=c))
+        asyncio.run(run_client("cliente async + batching (16)", url, n, c, max_connections=c,
+                               batch_max_size=16, batch_window_ms=5))
+
+        settings.failure_rate = 0.1
+        asyncio.run(run_client("cliente async, 10% de fallas", url, n, c, max_connections=c,
+                               backoff_base_seconds=0.02))
+
+        settings.failure_rate, settings.hang_rate, settings.hang_seconds = 0.0, 1.0, 5.0
+        asyncio.run(run_client("upstream colgado (timeout 0.5 s)", url, n, c, max_connections=c,
+                               timeout_seconds=0.5, max_retries=1, breaker_threshold=5))
+    finally:
+        stop()
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
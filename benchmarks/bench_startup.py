@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark de arranque en frío de la API.
+Mide, en procesos nuevos:
+  - el tiempo de importar main (y si NumPy/pandas quedan cargados),
+  - el tiempo desde lanzar uvicorn hasta que /health y /ready responden 200,
+  - la latencia del primer puntaje completo (initiate + webhooks + status).
+
+Uso: python benchmarks/bench_startup.py [--runs 3] [--port 8765]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+IMPORT_PROBE = (
+    "import sys, time; t = time.perf_counter(); import main; "
+    "print(time.perf_counter() - t, 'numpy' in sys.modules, 'pandas' in sys.modules)"
+)
+
+
+def measure_import():
+    output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout.split()
+    return float(output[0]), output[1] == "True", output[2] == "True"
+
+
+def _request(url, payload=None):
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return response.status, json.loads(response.read())
+
+
+def _wait_for(url, started, deadline=30.0):
+    """Segundos hasta que url responde 200 (None si el endpoint no existe en esta versión)"""
+    while time.perf_counter() - started < deadline:
+        try:
+            if _request(url)[0] == 200:
+                return time.perf_counter() - started
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.005)
+    raise RuntimeError(f"{url} no respondió en {deadline}s")
+
+
+def first_score(base):
+    """Latencia de la primera evaluación completa"""
+    started = time.perf_counter()
+    _, initiated = _request(f"{base}/transactions/initiate", {"store_id": "TIENDA_001", "tendero_name": "María"})
+    token = initiated["token"]
+    _request(f"{base}/webhooks/whatsapp", {
+        "token": token, "telefono": "3001234567", "psych_organized": 4, "psych_plan": 3})
+    _request(f"{base}/webhooks/pos", {
+        "token": token, "cedula_cliente": "12345678", "nombre_cliente": "Juan Pérez", "know_buyer": 4,
+        "buy_freq": 3, "avg_purchase": 75000, "distance_km": 2.5, "address_verified": True})
+    _request(f"{base}/transactions/{token}/status")
+    return time.perf_counter() - started
+
+
+def measure_server(port):
+    base = f"http://127.0.0.1:{port}"
+    env = {**os.environ, "JOURNAL_DIR": "", "STORAGE_BACKEND": "memory"}
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        health = _wait_for(f"{base}/health", started)
+        ready = _wait_for(f"{base}/ready", started)
+        return health, ready, first_score(base)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="repeticiones (se reporta la mediana)")
+    parser.add_argument("--port", type=int, default=8765, help="puerto para el servidor de prueba")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    servers = [measure_server(args.port) for _ in range(args.runs)]
+
+    def median(values):
+        values = [value for value in values if value is not None]
+        return statistics.median(values) * 1000 if values else float("nan")
+
+    print(f"🚀 Arranque en frío (mediana de {args.runs})")
+    print(f"   import main                 {median([i[0] for i in imports]):>8.1f} ms")
+    print(f"   NumPy / pandas cargados     {imports[0][1]} / {imports[0][2]}")
+    print(f"   uvicorn → /health 200       {median([s[0] for s in servers]):>8.1f} ms")
+    print(f"   uvicorn → /ready 200        {median([s[1] for s in servers]):>8.1f} ms")
+    print(f"   primer puntaje completo     {median([s[2] for s in servers]):>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark de GET /transactions/{token}/status para una transacción COMPLETED.
+Mide el trabajo del handler (sin HTTP) en tres casos:
+
+- reconstruir: leer la transacción, construir TransactionStatusResponse y
+  serializarla (lo que hacía cada consulta antes del caché)
+- caché: versión sin cambios, se entregan los bytes ya serializados
+- 304: el cliente envía If-None-Match con la versión actual
+
+Uso: python benchmarks/bench_status_etag.py [--calls 20000]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import main  # noqa: E402
+from models import ClientData, StoreValidation, TransactionStatus  # noqa: E402
+from storage import calculate_credit_score, create_transaction, get_transaction, update_transaction  # noqa: E402
+
+
+def completed_token() -> str:
+    token = create_transaction("BENCH", "Bench").token
+    update_transaction(
+        token,
+        client_data=ClientData(telefono="3000000000", psych_organized=4, psych_plan=3),
+        store_validation=StoreValidation(cedula_cliente="1", nombre_cliente="Bench", know_buyer=4, buy_freq=3,
+                                         avg_purchase=75000, distance_km=2.5, address_verified=True),
+    )
+    result = calculate_credit_score(get_transaction(token))
+    update_transaction(token, credit_result=result.model_dump(), status=TransactionStatus.COMPLETED)
+    return token
+
+
+async def run(label, call, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        await call()
+    seconds = time.perf_counter() - started
+    print(f"   {label:<14} {calls / seconds:>10,.0f} consultas/s   {1e6 * seconds / calls:>7.2f} µs/consulta")
+
+
+async def bench(calls: int):
+    token = completed_token()
+    response = await main.get_transaction_status(token, None)
+    etag = response.headers["etag"]
+
+    async def rebuild():
+        main._read_status(token)[0].model_dump_json().encode("utf-8")
+
+    async def cached():
+        await main.get_transaction_status(token, None)
+
+    async def not_modified():
+        await main.get_transaction_status(token, etag)
+
+    print(f"🏷️  Estado de una transacción COMPLETED ({calls:,} consultas, ETag {etag})")
+    await run("reconstruir", rebuild, calls)
+    await run("caché", cached, calls)
+    await run("304", not_modified, calls)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20_000, help="consultas por caso")
+    args = parser.parse_args()
+    asyncio.run(bench(args.calls))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark de peticiones de estado por transacción completada: polling cada
+2 s (cliente anterior del POS) frente a long-poll y SSE.
+
+Cada transacción sigue el flujo del POS: el tendero valida primero y empieza a
+esperar el resultado; el cliente responde por WhatsApp entre 0.5 y 1.5 veces
+--client-delay segundos después. Se cuentan las peticiones HTTP de estado que
+hace el POS hasta ver el resultado y el tiempo entre el último webhook y el
+momento en que el POS lo ve.
+
+Requiere la API corriendo (python main.py o uvicorn main:app).
+
+Uso: python benchmarks/bench_status_push.py [--url http://localhost:8000] [--transactions 10] [--client-delay 10]
+"""
+
+import argparse
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+FINAL = {"completed", "error", "expired"}
+
+
+def start_transaction(url: str, i: int) -> str:
+    token = requests.post(f"{url}/transactions/initiate",
+                          json={"store_id": "BENCH", "tendero_name": "Bench"}).json()["token"]
+    requests.post(f"{url}/webhooks/pos", json={
+        "token": token, "cedula_cliente": str(10_000 + i), "nombre_cliente": f"Cliente {i}",
+        "know_buyer": 4, "buy_freq": 3, "avg_purchase": 75000, "distance_km": 2.5, "address_verified": True,
+    }).raise_for_status()
+    return token
+
+
+def send_client_data(url: str, token: str, delay: float, sent: dict) -> None:
+    time.sleep(delay)
+    requests.post(f"{url}/webhooks/whatsapp", json={
+        "token": token, "telefono": "3001234567", "psych_organized": 4, "psych_plan": 3,
+    }).raise_for_status()
+    sent["at"] = time.perf_counter()
+
+
+def wait_polling(session, url, token, interval):
+    requests_made = 0
+    while True:
+        time.sleep(interval)
+        requests_made += 1
+        if session.get(f"{url}/transactions/{token}/status").json()["status"] in FINAL:
+            return requests_made
+
+
+def wait_long_poll(session, url, token, interval):
+    requests_made, since = 0, None
+    while True:
+        params = {"timeout": 25}
+        if since:
+            params["since"] = since
+        requests_made += 1
+        status = session.get(f"{url}/transactions/{token}/status/wait", params=params).json()["status"]
+        if status in FINAL:
+            return requests_made
+        since = status
+
+
+def wait_sse(session, url, token, interval):
+    with session.get(f"{url}/transactions/{token}/events", stream=True) as response:
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("data:") and '"status":"' in line:
+                status = line.split('"status":"', 1)[1].split('"', 1)[0]
+                if status in FINAL:
+                    return 1
+    return 1
+
+
+def run_one(url, i, strategy, delay, interval):
+    token = start_transaction(url, i)
+    sent = {}
+    delay *= 0.5 + random.Random(i).random()
+    client = threading.Thread(target=send_client_data, args=(url, token, delay, sent))
+    client.start()
+    with requests.Session() as session:
+        requests_made = strategy(session, url, token, interval)
+    seen_at = time.perf_counter()
+    client.join()
+    return requests_made, (seen_at - sent["at"]) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--transactions", type=int, default=10, help="transacciones concurrentes por estrategia")
+    parser.add_argument("--client-delay", type=float, default=10.0, help="segundos hasta la respuesta del cliente")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="intervalo del polling")
+    args = parser.parse_args()
+
+    print(f"📡 Peticiones de estado por transacción completada "
+          f"({args.transactions} transacciones, cliente responde a los {args.client_delay:g} s)")
+    for label, strategy in (("polling", wait_polling), ("long-poll", wait_long_poll), ("SSE", wait_sse)):
+        with ThreadPoolExecutor(max_workers=args.transactions) as pool:
+            results = list(pool.map(
+                lambda i: run_one(args.url, i, strategy, args.client_delay, args.poll_interval),
+                range(args.transactions)
+            ))
+        counts = [count for count, _ in results]
+        latencies = [latency for _, latency in results]
+        print(f"   {label:<10} {statistics.mean(counts):>6.1f} peticiones/transacción   "
+              f"resultado visto {statistics.median(latencies):>7.1f} ms después del webhook (mediana)")
+
+
+if __name__ == "__main__":
+    main()
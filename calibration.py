@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Motor de calibración del modelo Micro v2: evalúa una grilla de variantes de la
+configuración (pesos, category_thresholds, income_prudence, max_cap, ...) sobre
+un portafolio completo de entradas.
+
+Las features del portafolio se calculan una sola vez por grupo de variantes que
+comparten avg_purchase_min, avg_purchase_max y distance_threshold. Luego todas las
+variantes del grupo se evalúan a la vez con aritmética de arreglos de forma
+(variantes × registros), por bloques de variantes para acotar la memoria. Cada
+variante da exactamente los mismos cupos y categorías que heuristic_micro_v2.
+
+Uso:
+    python calibration.py portafolio.ndjson --grid grilla.json --output resultados.csv
+
+Ejemplo de grilla (producto cartesiano; "weights.<nombre>" para un peso):
+    {
+        "income_prudence": [0.12, 0.18, 0.24],
+        "max_cap": [30000, 50000],
+        "weights.know_buyer": [0.14, 0.18, 0.22],
+        "category_thresholds": [[0.85, 0.70, 0.50, 0.30], [0.80, 0.65, 0.45, 0.25]]
+    }
+"""
+
+import argparse
+import itertools
+import json
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from credit_heuristic import (
+    CATEGORIES, batch_features, batch_scores, config_version, round_like_python, score_params
+)
+from scoring_config import merge_config
+
+# Parámetros que cambian las features del portafolio (no solo el puntaje)
+FEATURE_PARAMS = ("avg_purchase_min", "avg_purchase_max", "distance_threshold")
+DEFAULT_APPROVED = ("A", "B", "C")
+
+
+def expand_grid(grid: Dict[str, Iterable]) -> List[Dict[str, Any]]:
+    """
+    Variantes (como valores que reemplazan a DEFAULTS_MICRO_V2) para el producto
+    cartesiano de la grilla. Las claves "weights.<nombre>" cambian un solo peso.
+    """
+    names = list(grid)
+    variants = []
+    for values in itertools.product(*(list(grid[name]) for name in names)):
+        overrides: Dict[str, Any] = {}
+        for name, value in zip(names, values):
+            if name.startswith("weights."):
+                overrides.setdefault("weights", {})[name.split(".", 1)[1]] = value
+            else:
+                overrides[name] = value
+        variants.append(overrides)
+    return variants
+
+
+def _flatten(overrides: Dict[str, Any]) -> Dict[str, Any]:
+    flat = {}
+    for key, value in overrides.items():
+        if key == "weights":
+            flat.update({f"weights.{name}": weight for name, weight in value.items()})
+        elif isinstance(value, (list, tuple)):
+            flat[key] = json.dumps(list(value))
+        else:
+            flat[key] = value
+    return flat
+
+
+def sweep(portfolio: Union[pd.DataFrame, Dict[str, Sequence]], variants: List[Dict[str, Any]],
+          approved_categories: Sequence[str] = DEFAULT_APPROVED,
+          max_cells: int = 4_000_000) -> pd.DataFrame:
+    """
+    Evalúa cada variante sobre todo el portafolio.
+
+    Args:
+        portfolio: DataFrame o mapeo columna → arreglo con las columnas de INPUT_COLUMNS
+        variants: Valores que reemplazan a DEFAULTS_MICRO_V2 en cada variante (ver expand_grid)
+        approved_categories: Categorías que cuentan como aprobadas
+        max_cells: Máximo de celdas (variantes × registros) evaluadas a la vez
+
+    Returns:
+        DataFrame con una fila por variante: los valores de la variante, config_version,
+        la proporción por categoría (pct_A … pct_E), approval_rate, exposure_total
+        (suma de cupos), exposure_approved (suma de cupos aprobados) y mean_score
+    """
+    confs = [merge_config(overrides) for overrides in variants]
+    n = len(portfolio) if isinstance(portfolio, pd.DataFrame) else max((len(v) for v in portfolio.values()), default=0)
+    approved_idx = [CATEGORIES.index(category) for category in approved_categories]
+    block = max(1, max_cells // max(n, 1))
+    rows: List[Dict[str, Any]] = [{} for _ in confs]
+
+    # Variantes agrupadas por los parámetros que cambian las features
+    groups: Dict[tuple, List[int]] = {}
+    for i, conf in enumerate(confs):
+        groups.setdefault(tuple(conf[name] for name in FEATURE_PARAMS), []).append(i)
+
+    for members in groups.values():
+        feats = batch_features(portfolio, confs[members[0]])
+        for start in range(0, len(members), block):
+            chunk = members[start:start + block]
+            params = [score_params(confs[i]) for i in chunk]
+            stacked = {key: np.array([p[key] for p in params], dtype=float)[:, None] for key in params[0]}
+            scores = batch_scores(feats, stacked)
+
+            category_idx = scores["category_idx"]
+            cupo = round_like_python(scores["cupo"], 2)
+            approved = np.isin(category_idx, approved_idx)
+            counts = np.stack([(category_idx == c).sum(axis=1) for c in range(len(CATEGORIES))], axis=1)
+            exposure_total = cupo.sum(axis=1)
+            exposure_approved = np.where(approved, cupo, 0.0).sum(axis=1)
+            approval = approved.sum(axis=1)
+            mean_score = scores["score"].mean(axis=1) if n else np.zeros(len(chunk))
+
+            for j, i in enumerate(chunk):
+                rows[i] = {
+                    "variant": i,
+                    **_flatten(variants[i]),
+                    "config_version": config_version(confs[i]),
+                    **{f"pct_{category}": counts[j, c] / n if n else 0.0
+                       for c, category in enumerate(CATEGORIES)},
+                    "approval_rate": approval[j] / n if n else 0.0,
+                    "exposure_total": round(float(exposure_total[j]), 2),
+                    "exposure_approved": round(float(exposure_approved[j]), 2),
+                    "mean_score": float(mean_score[j]),
+                }
+    return pd.DataFrame(rows)
+
+
+def load_portfolio(path: str) -> pd.DataFrame:
+    """Portafolio desde CSV o NDJSON"""
+    if path.lower().endswith(".csv"):
+        return pd.read_csv(path)
+    return pd.read_json(path, lines=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("portfolio", help="portafolio de entradas (.ndjson o .csv)")
+    parser.add_argument("--grid", required=True, help="JSON con la grilla de variantes")
+    parser.add_argument("--output", help="CSV con los resultados por variante")
+    parser.add_argument("--approved", default=",".join(DEFAULT_APPROVED), help="categorías aprobadas (ej. A,B,C)")
+    parser.add_argument("--top", type=int, default=10, help="variantes a mostrar (mayor aprobación)")
+    args = parser.parse_args(argv)
+
+    with open(args.grid, "r", encoding="utf-8") as f:
+        variants = expand_grid(json.load(f))
+    portfolio = load_portfolio(args.portfolio)
+
+    started = time.perf_counter()
+    try:
+        results = sweep(portfolio, variants, approved_categories=args.approved.split(","))
+    except (ValueError, KeyError) as e:
+        print(f"❌ Grilla inválida: {e}", file=sys.stderr)
+        return 1
+    seconds = time.perf_counter() - started
+
+    print(f"📐 {len(variants):,} variantes × {len(portfolio):,} registros en {seconds:.2f}s")
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"   Resultados: {args.output}")
+    with pd.option_context("display.width", 200, "display.max_columns", 30):
+        print(results.sort_values("approval_rate", ascending=False).head(args.top).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Configuración de la API Confianza Vecina.
+Todos los valores se leen desde variables de entorno con valores por defecto seguros.
+"""
+
+import os
+
+
+def _env_float(name: str, default: float) -> float:
+    """Lee una variable de entorno numérica (float) con valor por defecto"""
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return float(value)
+
+
+def _env_int(name: str, default: int) -> int:
+    """Lee una variable de entorno entera con valor por defecto"""
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return int(value)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Lee una variable de entorno booleana (1/true/yes/on) con valor por defecto"""
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Expiración de transacciones
+TRANSACTION_TTL_MINUTES = _env_float("TRANSACTION_TTL_MINUTES", 15.0)
+EXPIRY_SWEEP_INTERVAL_SECONDS = _env_float("EXPIRY_SWEEP_INTERVAL_SECONDS", 5.0)
+EXPIRY_RETENTION_SECONDS = _env_float("EXPIRY_RETENTION_SECONDS", 600.0)
+
+# Backend de almacenamiento: "memory" (un solo proceso) o "sqlite" (compartido entre workers)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "memory").strip().lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "confianza_vecina.db")
+
+# Journal del backend en memoria (vacío = deshabilitado)
+JOURNAL_DIR = os.getenv("JOURNAL_DIR", "")
+JOURNAL_FSYNC_INTERVAL_MS = _env_float("JOURNAL_FSYNC_INTERVAL_MS", 50.0)
+JOURNAL_SNAPSHOT_EVERY = _env_int("JOURNAL_SNAPSHOT_EVERY", 100_000)
+
+# Configuración del modelo de scoring: archivo JSON con valores que reemplazan a
+# DEFAULTS_MICRO_V2 (vacío = valores por defecto). Se recarga al cambiar el archivo.
+SCORING_CONFIG_PATH = os.getenv("SCORING_CONFIG_PATH", "")
+SCORING_CONFIG_RELOAD_SECONDS = _env_float("SCORING_CONFIG_RELOAD_SECONDS", 2.0)
+# Secreto para los endpoints administrativos que cambian estado (recarga del
+# scoring): la petición debe traer X-Admin-Token igual. Sin ADMIN_TOKEN esos
+# endpoints quedan deshabilitados (503)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+# "lut" (tabla precalculada de términos discretos) o "exact" (cálculo completo por petición);
+# ambos producen el mismo resultado que heuristic_micro_v2
+SCORING_MODE = os.getenv("SCORING_MODE", "lut").strip().lower()
+# Resultados memorizados para entradas repetidas (0 = deshabilitado). Solo conviene
+# cuando las entradas se repiten (reintentos, re-scoring): con baja tasa de aciertos es más lento
+SCORING_MEMO_SIZE = _env_int("SCORING_MEMO_SIZE", 0)
+# Micro-batching: las llamadas concurrentes de scoring se agrupan durante esta ventana
+# (o hasta SCORING_BATCH_MAX_SIZE) y se puntúan juntas en un pool (0 = deshabilitado)
+SCORING_BATCH_WINDOW_MS = _env_float("SCORING_BATCH_WINDOW_MS", 0.0)
+SCORING_BATCH_MAX_SIZE = _env_int("SCORING_BATCH_MAX_SIZE", 64)
+# "thread" o "process" (evita el GIL a cambio de serializar cada lote)
+SCORING_POOL = os.getenv("SCORING_POOL", "thread").strip().lower()
+SCORING_POOL_WORKERS = _env_int("SCORING_POOL_WORKERS", 1)
+
+# Canales push de estado: espera máxima de GET /transactions/{token}/status/wait
+# y frecuencia de los keepalive del stream SSE (GET /transactions/{token}/events)
+STATUS_WAIT_MAX_SECONDS = _env_float("STATUS_WAIT_MAX_SECONDS", 30.0)
+SSE_HEARTBEAT_SECONDS = _env_float("SSE_HEARTBEAT_SECONDS", 15.0)
+# Respuestas de estado serializadas en caché (por token, invalidadas por versión)
+STATUS_CACHE_SIZE = _env_int("STATUS_CACHE_SIZE", 10_000)
+
+# Cola de trabajos en segundo plano (cierre del crédito tras los webhooks)
+JOB_WORKERS = _env_int("JOB_WORKERS", 4)
+JOB_QUEUE_MAX_DEPTH = _env_int("JOB_QUEUE_MAX_DEPTH", 1000)
+JOB_MAX_RETRIES = _env_int("JOB_MAX_RETRIES", 2)
+JOB_RETRY_BACKOFF_SECONDS = _env_float("JOB_RETRY_BACKOFF_SECONDS", 0.2)
+# "thread" (cada trabajo corre en un pool de hilos) o "asyncio" (en el event loop)
+JOB_EXECUTOR = os.getenv("JOB_EXECUTOR", "thread").strip().lower()
+
+# Logging estructurado
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").strip().upper()
+# "json" (una línea JSON por evento) o "text" (legible, para desarrollo)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").strip().lower()
+# Fracción de eventos DEBUG que se escriben (1.0 = todos)
+LOG_DEBUG_SAMPLE_RATE = _env_float("LOG_DEBUG_SAMPLE_RATE", 0.1)
+# Eventos en espera de escritura; con la cola llena se descartan en lugar de bloquear
+LOG_QUEUE_SIZE = _env_int("LOG_QUEUE_SIZE", 10_000)
+
+# Deduplicación de reintentos de los webhooks (Idempotency-Key o hash del payload)
+IDEMPOTENCY_CACHE_SIZE = _env_int("IDEMPOTENCY_CACHE_SIZE", 10_000)
+IDEMPOTENCY_TTL_SECONDS = _env_float("IDEMPOTENCY_TTL_SECONDS", 3600.0)
+
+# Control de admisión (0 deshabilita cada límite)
+# Transacciones iniciadas por tienda: recarga por minuto y ráfaga máxima
+RATE_LIMIT_STORE_PER_MINUTE = _env_float("RATE_LIMIT_STORE_PER_MINUTE", 60.0)
+RATE_LIMIT_STORE_BURST = _env_int("RATE_LIMIT_STORE_BURST", 20)
+# Peticiones por IP del cliente a los endpoints de transacciones y webhooks
+RATE_LIMIT_IP_PER_MINUTE = _env_float("RATE_LIMIT_IP_PER_MINUTE", 1200.0)
+RATE_LIMIT_IP_BURST = _env_int("RATE_LIMIT_IP_BURST", 200)
+# Tiendas/IPs con bucket en memoria (las menos usadas se desalojan)
+RATE_LIMIT_MAX_KEYS = _env_int("RATE_LIMIT_MAX_KEYS", 100_000)
+# Peticiones en curso; por encima se responde 503 con Retry-After
+MAX_IN_FLIGHT_REQUESTS = _env_int("MAX_IN_FLIGHT_REQUESTS", 256)
+
+# Cliente de Sistecrédito (sin SISTECREDITO_API_URL el registro se simula)
+SISTECREDITO_API_URL = os.getenv("SISTECREDITO_API_URL", "").strip()
+SISTECREDITO_API_KEY = os.getenv("SISTECREDITO_API_KEY", "")
+SISTECREDITO_MAX_CONNECTIONS = _env_int("SISTECREDITO_MAX_CONNECTIONS", 10)
+SISTECREDITO_TIMEOUT_SECONDS = _env_float("SISTECREDITO_TIMEOUT_SECONDS", 2.0)
+SISTECREDITO_CONNECT_TIMEOUT_SECONDS = _env_float("SISTECREDITO_CONNECT_TIMEOUT_SECONDS", 1.0)
+SISTECREDITO_MAX_RETRIES = _env_int("SISTECREDITO_MAX_RETRIES", 2)
+SISTECREDITO_BACKOFF_SECONDS = _env_float("SISTECREDITO_BACKOFF_SECONDS", 0.05)
+# Llamadas fallidas seguidas que abren el circuit breaker y segundos hasta la llamada de prueba
+SISTECREDITO_BREAKER_THRESHOLD = _env_int("SISTECREDITO_BREAKER_THRESHOLD", 5)
+SISTECREDITO_BREAKER_RESET_SECONDS = _env_float("SISTECREDITO_BREAKER_RESET_SECONDS", 30.0)
+# Registros por petición a /credits/batch (1 = sin batching) y espera máxima para llenar el lote
+SISTECREDITO_BATCH_MAX_SIZE = _env_int("SISTECREDITO_BATCH_MAX_SIZE", 1)
+SISTECREDITO_BATCH_WINDOW_MS = _env_float("SISTECREDITO_BATCH_WINDOW_MS", 5.0)
+
+# Respuestas JSON rápidas: serializa los modelos sin revalidarlos y los
+# diccionarios con orjson (si está instalado). Ver fast_json.py
+FAST_JSON_RESPONSES = _env_bool("FAST_JSON_RESPONSES", False)
+
+# Perfilado bajo demanda (deshabilitado por defecto): con PROFILING_ENABLED una
+# petición con el header X-Profile: cpu | sample se perfila y el resultado se
+# guarda en PROFILING_DIR; también habilita los snapshots de tracemalloc en
+# /admin/memory. La petición debe traer X-Profile-Token igual a PROFILING_TOKEN;
+# sin PROFILING_TOKEN el header X-Profile se ignora y /admin/memory responde 503
+PROFILING_ENABLED = _env_bool("PROFILING_ENABLED", False)
+PROFILING_DIR = os.getenv("PROFILING_DIR", "profiles")
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+# Archivos de perfil que se conservan (los más antiguos se borran)
+PROFILING_MAX_FILES = _env_int("PROFILING_MAX_FILES", 100)
+# Intervalo del perfilador por muestreo
+PROFILING_SAMPLE_INTERVAL_MS = _env_float("PROFILING_SAMPLE_INTERVAL_MS", 1.0)
+# Frames guardados por asignación al iniciar tracemalloc desde /admin/memory
+# (más frames = mejor atribución, más memoria). Para trazar desde el arranque
+# usar la variable estándar PYTHONTRACEMALLOC=25
+TRACEMALLOC_FRAMES = _env_int("TRACEMALLOC_FRAMES", 25)
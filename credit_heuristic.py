@@ -1,12 +1,24 @@
 """
 Credit Heuristic Model Micro v2
 Sistema de evaluación crediticia para micro-tiendas basado en heurísticas deterministas.
+
+NumPy y pandas se importan solo en las funciones que los usan (versión de
+referencia y scoring por lotes); el camino de cada petición
+(heuristic_micro_v2_fast) es Python puro y no los carga al arrancar la API.
 """
 
+import copy
+import hashlib
+import json
 import math
-import numpy as np
-import pandas as pd
-from typing import Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Dict, Any, Mapping, Optional, Union
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
 
 # Configuración por defecto del modelo Micro v2
 DEFAULTS_MICRO_V2 = {
@@ -45,11 +57,22 @@ def _norm_0_1(value: float, minv: float, maxv: float) -> float:
     Returns:
         Valor normalizado entre 0 y 1
     """
+    import numpy as np
+
     if np.isnan(value):
         return 0.0
     v = (value - minv) / (maxv - minv) if maxv > minv else 0.0
     return float(np.clip(v, 0.0, 1.0))
 
+def address_verified_flag(value: Any) -> bool:
+    """
+    address_verified como booleano, igual en todas las versiones del modelo:
+    ausente, None o NaN → False; cualquier otro valor según su verdad (bool)
+    """
+    if value is None or (isinstance(value, float) and value != value):
+        return False
+    return bool(value)
+
 def feature_transform(row: Dict[str, Any], conf: Dict[str, Any] = None) -> Dict[str, Any]:
     """
     Transforma un registro de entrada a features normalizados.
@@ -61,6 +84,9 @@ def feature_transform(row: Dict[str, Any], conf: Dict[str, Any] = None) -> Dict[
     Returns:
         Diccionario con features normalizados y valores crudos
     """
+    import numpy as np
+    import pandas as pd
+
     if conf is None:
         conf = DEFAULTS_MICRO_V2
     
@@ -99,9 +125,8 @@ def feature_transform(row: Dict[str, Any], conf: Dict[str, Any] = None) -> Dict[
         except Exception:
             f6 = 1.0
     
-    # address_verified: booleano → 1.0/0.0
-    addr_ver = row.get("address_verified", 0)
-    f7 = 1.0 if bool(addr_ver) else 0.0
+    # address_verified: booleano → 1.0/0.0 (ausente o NaN = False)
+    f7 = 1.0 if address_verified_flag(row.get("address_verified")) else 0.0
     
     return {
         "f_know_buyer": f1,
@@ -126,6 +151,8 @@ def heuristic_micro_v2(row: Dict[str, Any], conf: Dict[str, Any] = None) -> Dict
     Returns:
         Diccionario con categoría, puntaje, riesgo, cupo estimado y desgloses
     """
+    import numpy as np
+
     if conf is None:
         conf = DEFAULTS_MICRO_V2
     
@@ -200,11 +227,617 @@ def heuristic_micro_v2(row: Dict[str, Any], conf: Dict[str, Any] = None) -> Dict
         "income_proxy_daily": round(income_proxy_daily, 2)
     }
 
+def _is_missing(value: Any) -> bool:
+    """Equivalente a pd.isna para valores escalares (None o NaN)"""
+    return value is None or (isinstance(value, float) and value != value)
+
+def _clip_0_1(value: float) -> float:
+    """Equivalente a float(np.clip(value, 0.0, 1.0)) sin pasar por NumPy"""
+    if value < 0.0:
+        return 0.0
+    if value > 1.0:
+        return 1.0
+    return value
+
+_CLIENTS_PER_DAY = MappingProxyType({0: 0, 1: 1, 2: 3, 3: 5, 4: 8, 5: 12})
+_WEIGHT_NAMES = (
+    "know_buyer", "buy_freq", "avg_purchase", "psych_organized",
+    "psych_plan", "distance", "address_verified",
+)
+
+def config_version(conf: Dict[str, Any]) -> str:
+    """
+    Versión de una configuración: hash de su contenido (JSON canónico).
+    Dos configuraciones con los mismos valores tienen la misma versión.
+    """
+    canonical = json.dumps(conf, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+
+class CompiledScorer:
+    """
+    Configuración del modelo Micro v2 compilada para el camino de cada petición.
+    
+    Inmutable: los pesos, límites logarítmicos, umbrales y el mapa de clientes por
+    día se precalculan al compilar. score() produce exactamente el mismo resultado
+    que heuristic_micro_v2 con la misma configuración, en Python puro.
+    """
+    
+    __slots__ = (
+        "version", "_config", "_weights", "_log_min", "_log_span", "_thresholds",
+        "_avg_min", "_distance_threshold", "_distance_alert", "_max_cap",
+        "_segment_multiplier", "_prudence_factor", "_base_days_income",
+        "_income_prudence", "_min_cupo", "_clients_per_day", "_partial_scores",
+    )
+    
+    def __init__(self, conf: Dict[str, Any], version: Optional[str] = None):
+        conf = copy.deepcopy(conf)
+        if len(conf["category_thresholds"]) != 4:
+            raise ValueError("category_thresholds debe tener 4 umbrales (A, B, C, D)")
+        log_min = math.log(conf["avg_purchase_min"])
+        log_max = math.log(conf["avg_purchase_max"])
+        values = {
+            "version": version or config_version(conf),
+            "_config": conf,
+            "_weights": tuple(conf["weights"][name] for name in _WEIGHT_NAMES),
+            "_log_min": log_min,
+            # None: límites degenerados, f_avg_purchase siempre 0.0 (como _norm_0_1)
+            "_log_span": (log_max - log_min) if log_max > log_min else None,
+            "_thresholds": tuple(conf["category_thresholds"]),
+            "_avg_min": conf["avg_purchase_min"],
+            "_distance_threshold": conf["distance_threshold"],
+            "_distance_alert": conf["distance_alert"],
+            "_max_cap": conf["max_cap"],
+            "_segment_multiplier": conf["segment_multiplier"],
+            "_prudence_factor": conf["prudence_factor"],
+            "_base_days_income": conf["base_days_income"],
+            "_income_prudence": conf["income_prudence"],
+            "_min_cupo": conf.get("min_cupo_allowed", 0.0),
+            "_clients_per_day": _CLIENTS_PER_DAY,
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "_partial_scores", self._build_partial_scores())
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledScorer es inmutable")
+    
+    def __repr__(self) -> str:
+        return f"CompiledScorer(version={self.version!r})"
+    
+    @property
+    def config(self) -> Dict[str, Any]:
+        """Copia de la configuración con la que se compiló"""
+        return copy.deepcopy(self._config)
+    
+    def score(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Calcula el cupo de crédito de un registro.
+        
+        Args:
+            row: Diccionario con datos del cliente
+            
+        Returns:
+            Diccionario con categoría, puntaje, riesgo, cupo estimado y desgloses
+            (mismo formato que heuristic_micro_v2)
+        """
+        get = row.get
+        
+        # Features (ver feature_transform)
+        know_buyer = get("know_buyer")
+        f1 = 0.0 if _is_missing(know_buyer) else float(know_buyer) / 5.0
+        buy_freq = get("buy_freq")
+        f2 = 0.0 if _is_missing(buy_freq) else float(buy_freq) / 5.0
+        
+        try:
+            avg_val = float(get("avg_purchase", self._avg_min))
+            if avg_val <= 0:
+                avg_val = self._avg_min
+        except Exception:
+            avg_val = self._avg_min
+        if self._log_span is None:
+            f3 = 0.0
+        else:
+            f3 = _clip_0_1((math.log(avg_val) - self._log_min) / self._log_span)
+        
+        psych_organized = get("psych_organized")
+        f4 = 0.0 if _is_missing(psych_organized) else (float(psych_organized) - 1) / 4.0
+        psych_plan = get("psych_plan")
+        f5 = 0.0 if _is_missing(psych_plan) else (float(psych_plan) - 1) / 4.0
+        
+        distance = get("distance_km", None)
+        if distance is None or (isinstance(distance, float) and distance != distance):
+            f6 = 1.0
+        else:
+            try:
+                f6 = _clip_0_1(1.0 - (float(distance) / self._distance_threshold))
+            except Exception:
+                f6 = 1.0
+        
+        f7 = 1.0 if address_verified_flag(get("address_verified")) else 0.0
+        
+        # Suma ponderada (mismo orden que heuristic_micro_v2)
+        w1, w2, w3, w4, w5, w6, w7 = self._weights
+        score = w1 * f1 + w2 * f2 + w3 * f3 + w4 * f4 + w5 * f5 + w6 * f6 + w7 * f7
+        return self._result(get, score, (f1, f2, f3, f4, f5, f6, f7), avg_val, distance)
+    
+    def score_lut(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Igual que score(), pero toma de la tabla precalculada los términos
+        discretos ya ponderados y solo calcula los de avg_purchase y distance_km.
+        
+        La suma conserva el orden de score() (know_buyer + buy_freq vienen sumados
+        de la tabla y el resto se agrega en secuencia), así que el resultado es
+        idéntico bit a bit. Entradas fuera del dominio discreto usan score().
+        """
+        get = row.get
+        entry = self._partial_scores.get((
+            get("know_buyer"), get("buy_freq"), get("psych_organized"), get("psych_plan"),
+            1 if address_verified_flag(get("address_verified")) else 0,
+        ))
+        if entry is None:
+            return self.score(row)
+        partial, term4, term5, term7, f1, f2, f4, f5, f7 = entry
+        
+        try:
+            avg_val = float(get("avg_purchase", self._avg_min))
+            if avg_val <= 0:
+                avg_val = self._avg_min
+        except Exception:
+            avg_val = self._avg_min
+        if self._log_span is None:
+            f3 = 0.0
+        else:
+            f3 = _clip_0_1((math.log(avg_val) - self._log_min) / self._log_span)
+        
+        distance = get("distance_km", None)
+        if distance is None or (isinstance(distance, float) and distance != distance):
+            f6 = 1.0
+        else:
+            try:
+                f6 = _clip_0_1(1.0 - (float(distance) / self._distance_threshold))
+            except Exception:
+                f6 = 1.0
+        
+        w = self._weights
+        score = partial + w[2] * f3 + term4 + term5 + w[5] * f6 + term7
+        return self._result(get, score, (f1, f2, f3, f4, f5, f6, f7), avg_val, distance)
+    
+    def _build_partial_scores(self) -> Dict[tuple, tuple]:
+        """
+        Términos discretos ya ponderados para cada combinación de
+        (know_buyer, buy_freq, psych_organized, psych_plan, address_verified):
+        6·6·5·5·2 = 1800 entradas con la suma parcial know_buyer + buy_freq, los
+        términos de psych_organized, psych_plan y address_verified y sus features.
+        4.0 y True encuentran las mismas claves que 4 y 1 (y dan las mismas features).
+        """
+        w1, w2, _, w4, w5, _, w7 = self._weights
+        table = {}
+        for know_buyer in range(6):
+            for buy_freq in range(6):
+                for psych_organized in range(1, 6):
+                    for psych_plan in range(1, 6):
+                        for address in (0, 1):
+                            f1 = float(know_buyer) / 5.0
+                            f2 = float(buy_freq) / 5.0
+                            f4 = (float(psych_organized) - 1) / 4.0
+                            f5 = (float(psych_plan) - 1) / 4.0
+                            f7 = float(address)
+                            table[(know_buyer, buy_freq, psych_organized, psych_plan, address)] = (
+                                w1 * f1 + w2 * f2, w4 * f4, w5 * f5, w7 * f7, f1, f2, f4, f5, f7
+                            )
+        return table
+    
+    def _result(self, get, score: float, feats: tuple, avg_val: float, distance: Any) -> Dict[str, Any]:
+        """Penalización, categoría, componentes y cupo a partir del puntaje ponderado"""
+        if distance is not None and distance > self._distance_alert:
+            score *= 0.6
+        score = _clip_0_1(float(score))
+        
+        t = self._thresholds
+        if score >= t[0]:
+            cat = "A"
+        elif score >= t[1]:
+            cat = "B"
+        elif score >= t[2]:
+            cat = "C"
+        elif score >= t[3]:
+            cat = "D"
+        else:
+            cat = "E"
+        
+        f1, f2, f3, f4, f5, f6, f7 = feats
+        risk_pct = (1.0 - score) * 100.0
+        comp_feature = score * f3 * self._max_cap * self._segment_multiplier * self._prudence_factor
+        
+        clients_per_day = self._clients_per_day.get(int(get("buy_freq", 0)), 3)
+        income_proxy_daily = avg_val * clients_per_day
+        comp_income = score * income_proxy_daily * self._base_days_income * self._income_prudence
+        
+        cupo_raw = 0.5 * (comp_feature + comp_income)
+        cupo = cupo_raw
+        if cupo < 0.0:
+            cupo = 0.0
+        elif cupo > self._max_cap:
+            cupo = float(self._max_cap)
+        if cupo < self._min_cupo and score >= t[2]:
+            cupo = self._min_cupo
+        
+        score_rounded = round(score, 4)
+        return {
+            "category": cat,
+            "score_conf": score_rounded,
+            "risk_pct": round(risk_pct, 2),
+            "debt_capacity_pct": score_rounded,
+            "cupo_estimated": round(cupo, 2),
+            "raw_cupo": round(cupo_raw, 2),
+            "comp_feature": round(comp_feature, 2),
+            "comp_income": round(comp_income, 2),
+            "features": {
+                "f_know_buyer": f1,
+                "f_buy_freq": f2,
+                "f_avg_purchase": f3,
+                "f_psych_organized": f4,
+                "f_psych_plan": f5,
+                "f_distance": f6,
+                "f_address_verified": f7,
+                "avg_purchase_raw": avg_val,
+                "distance_raw": distance
+            },
+            "clients_per_day": clients_per_day,
+            "income_proxy_daily": round(income_proxy_daily, 2)
+        }
+
+# Scorers compilados por versión (hash del contenido)
+_COMPILED: "OrderedDict[str, CompiledScorer]" = OrderedDict()
+_COMPILED_MAX = 32
+_COMPILED_LOCK = threading.Lock()
+
+def compile_config(conf: Dict[str, Any] = None) -> CompiledScorer:
+    """
+    Compila una configuración del modelo. Configuraciones con el mismo contenido
+    comparten el mismo CompiledScorer (caché por hash, acotada).
+    
+    Args:
+        conf: Configuración del modelo (opcional, por defecto DEFAULTS_MICRO_V2)
+        
+    Returns:
+        CompiledScorer inmutable
+    """
+    if conf is None:
+        conf = DEFAULTS_MICRO_V2
+    version = config_version(conf)
+    with _COMPILED_LOCK:
+        scorer = _COMPILED.get(version)
+        if scorer is not None:
+            _COMPILED.move_to_end(version)
+            return scorer
+    scorer = CompiledScorer(conf, version)
+    with _COMPILED_LOCK:
+        scorer = _COMPILED.setdefault(version, scorer)
+        while len(_COMPILED) > _COMPILED_MAX:
+            _COMPILED.popitem(last=False)
+    return scorer
+
+DEFAULT_SCORER = compile_config(DEFAULTS_MICRO_V2)
+
+class ScoreMemo:
+    """
+    Memo LRU acotado de resultados por entrada completa (versión de la
+    configuración, modo y los siete valores de entrada). Entrega copias para que
+    quien reciba el resultado no altere el guardado.
+    """
+    
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def score(self, scorer: CompiledScorer, row: Dict[str, Any], lut: bool = False) -> Dict[str, Any]:
+        """Resultado de scorer.score (o score_lut) para row, desde el memo si ya se calculó"""
+        compute = scorer.score_lut if lut else scorer.score
+        if self.maxsize <= 0:
+            return compute(row)
+        key = (scorer.version, lut, *map(row.get, INPUT_COLUMNS))
+        try:
+            with self._lock:
+                result = self._entries.get(key)
+                if result is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+        except TypeError:
+            return compute(row)  # valores no hashables: sin memo
+        if result is None:
+            result = compute(row)
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = result
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return {**result, "features": dict(result["features"])}
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def as_dict(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+def heuristic_micro_v2_fast(row: Dict[str, Any], conf: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Versión en Python puro de heuristic_micro_v2 para el camino de cada petición.
+    
+    Produce exactamente el mismo resultado que heuristic_micro_v2 usando el
+    CompiledScorer de la configuración (sin pd.isna/np.clip sobre escalares).
+    
+    Args:
+        row: Diccionario con datos del cliente
+        conf: Configuración del modelo (opcional)
+        
+    Returns:
+        Diccionario con categoría, puntaje, riesgo, cupo estimado y desgloses
+    """
+    scorer = DEFAULT_SCORER if conf is None else compile_config(conf)
+    return scorer.score(row)
+
+# Columnas de entrada del modelo y columnas de features del resultado
+INPUT_COLUMNS = (
+    "know_buyer", "buy_freq", "avg_purchase", "psych_organized",
+    "psych_plan", "distance_km", "address_verified",
+)
+FEATURE_COLUMNS = (
+    "f_know_buyer", "f_buy_freq", "f_avg_purchase", "f_psych_organized",
+    "f_psych_plan", "f_distance", "f_address_verified", "avg_purchase_raw", "distance_raw",
+)
+CATEGORIES = ("A", "B", "C", "D", "E")
+
+def _numeric_column(data, name: str, n: int) -> "np.ndarray":
+    """Columna como float64; valores ausentes o no numéricos quedan como NaN"""
+    import numpy as np
+    import pandas as pd
+
+    if name not in data:
+        return np.full(n, np.nan)
+    values = data[name]
+    if not isinstance(values, pd.Series):
+        values = pd.Series(np.asarray(values, dtype=object))
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+def round_like_python(values: "np.ndarray", ndigits: int) -> "np.ndarray":
+    """
+    Redondeo vectorizado idéntico a round(x, ndigits) de Python.
+    rint(x * 10^n) / 10^n coincide con round() salvo cuando x * 10^n queda
+    prácticamente en un empate .5; esos casos se recalculan con round().
+    """
+    import numpy as np
+
+    scale = 10.0 ** ndigits
+    scaled = values * scale
+    result = np.rint(scaled) / scale
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) <= 1e-9 + 1e-12 * np.abs(scaled)
+    for i in np.flatnonzero(near_tie):
+        result.flat[i] = round(float(values.flat[i]), ndigits)
+    return result
+
+def batch_features(data: Union["pd.DataFrame", Mapping[str, Any]],
+                   conf: Dict[str, Any] = None) -> Dict[str, "np.ndarray"]:
+    """
+    Features normalizadas de muchos registros como arreglos (ver feature_transform).
+    
+    Solo dependen de avg_purchase_min, avg_purchase_max y distance_threshold, así
+    que pueden reutilizarse para evaluar varias configuraciones del modelo.
+    
+    Args:
+        data: DataFrame o mapeo columna → arreglo con las columnas de INPUT_COLUMNS
+        conf: Configuración del modelo (opcional)
+        
+    Returns:
+        Diccionario con las columnas de FEATURE_COLUMNS y clients_per_day
+    """
+    import numpy as np
+    import pandas as pd
+
+    if conf is None:
+        conf = DEFAULTS_MICRO_V2
+    
+    n = len(data) if isinstance(data, pd.DataFrame) else max((len(v) for v in data.values()), default=0)
+    col = {name: _numeric_column(data, name, n) for name in INPUT_COLUMNS if name != "address_verified"}
+    
+    # know_buyer, buy_freq: escala 0-5 → 0-1
+    f1 = np.where(np.isnan(col["know_buyer"]), 0.0, col["know_buyer"] / 5.0)
+    f2 = np.where(np.isnan(col["buy_freq"]), 0.0, col["buy_freq"] / 5.0)
+    
+    # avg_purchase: log-normalización (math.log para coincidir con la versión escalar)
+    avg_val = col["avg_purchase"]
+    avg_val = np.where(np.isnan(avg_val) | (avg_val <= 0), float(conf["avg_purchase_min"]), avg_val)
+    log_min = math.log(conf["avg_purchase_min"])
+    log_max = math.log(conf["avg_purchase_max"])
+    log_avg = np.fromiter(map(math.log, avg_val.tolist()), dtype=float, count=n)
+    if log_max > log_min:
+        f3 = np.clip((log_avg - log_min) / (log_max - log_min), 0.0, 1.0)
+    else:
+        f3 = np.zeros(n)
+    
+    # psych_organized, psych_plan: escala 1-5 → 0-1
+    f4 = np.where(np.isnan(col["psych_organized"]), 0.0, (col["psych_organized"] - 1) / 4.0)
+    f5 = np.where(np.isnan(col["psych_plan"]), 0.0, (col["psych_plan"] - 1) / 4.0)
+    
+    # distance_km: 1.0 si no hay distancia
+    distance = col["distance_km"]
+    f6 = np.where(~np.isnan(distance), np.clip(1.0 - (distance / conf["distance_threshold"]), 0.0, 1.0), 1.0)
+    
+    # address_verified: booleano → 1.0/0.0 con la misma normalización que la versión
+    # escalar (ausente o NaN = False; texto según bool, no como número)
+    if "address_verified" in data:
+        addr = np.fromiter(map(address_verified_flag, list(data["address_verified"])), dtype=bool, count=n)
+        f7 = np.where(addr, 1.0, 0.0)
+    else:
+        f7 = np.zeros(n)
+    
+    # Clientes por día según buy_freq (para el componente income-proxy)
+    buy_freq_raw = np.trunc(np.where(np.isnan(col["buy_freq"]), 0.0, col["buy_freq"])).astype(np.int64)
+    clients_per_day = np.full(n, 3, dtype=np.int64)
+    for freq, clients in _CLIENTS_PER_DAY.items():
+        clients_per_day[buy_freq_raw == freq] = clients
+    
+    return {
+        "f_know_buyer": f1,
+        "f_buy_freq": f2,
+        "f_avg_purchase": f3,
+        "f_psych_organized": f4,
+        "f_psych_plan": f5,
+        "f_distance": f6,
+        "f_address_verified": f7,
+        "avg_purchase_raw": avg_val,
+        "distance_raw": distance,
+        "clients_per_day": clients_per_day,
+    }
+
+def score_params(conf: Dict[str, Any]) -> Dict[str, Any]:
+    """Parámetros de una configuración que usa batch_scores (sin los de las features)"""
+    w = conf["weights"]
+    t = conf["category_thresholds"]
+    return {
+        **{f"w_{name}": w[name] for name in _WEIGHT_NAMES},
+        **{f"t{i}": t[i] for i in range(4)},
+        "distance_alert": conf["distance_alert"],
+        "max_cap": conf["max_cap"],
+        "segment_multiplier": conf["segment_multiplier"],
+        "prudence_factor": conf["prudence_factor"],
+        "base_days_income": conf["base_days_income"],
+        "income_prudence": conf["income_prudence"],
+        "min_cupo_allowed": conf.get("min_cupo_allowed", 0.0),
+    }
+
+def batch_scores(feats: Dict[str, "np.ndarray"], params: Dict[str, Any]) -> Dict[str, "np.ndarray"]:
+    """
+    Puntaje, categoría, componentes y cupo (sin redondear) a partir de features.
+    
+    Los parámetros pueden ser escalares (una configuración, resultados de forma (N,))
+    o columnas de forma (V, 1) (V configuraciones a la vez, resultados de forma (V, N)).
+    Las operaciones siguen el orden de heuristic_micro_v2, así que cada fila es
+    idéntica bit a bit al cálculo escalar con esa configuración.
+    
+    Args:
+        feats: Resultado de batch_features
+        params: Resultado de score_params (o sus valores apilados por configuración)
+        
+    Returns:
+        Diccionario con score, category_idx (0=A … 4=E), risk_pct, comp_feature,
+        comp_income, income_proxy_daily, cupo_raw y cupo
+    """
+    import numpy as np
+
+    p = params
+    
+    # Suma ponderada en el mismo orden que la versión escalar
+    score = p["w_know_buyer"] * feats["f_know_buyer"]
+    score = score + p["w_buy_freq"] * feats["f_buy_freq"]
+    score = score + p["w_avg_purchase"] * feats["f_avg_purchase"]
+    score = score + p["w_psych_organized"] * feats["f_psych_organized"]
+    score = score + p["w_psych_plan"] * feats["f_psych_plan"]
+    score = score + p["w_distance"] * feats["f_distance"]
+    score = score + p["w_address_verified"] * feats["f_address_verified"]
+    
+    # Penalización por distancia y clipping (NaN > alerta es False: sin distancia)
+    score = np.where(feats["distance_raw"] > p["distance_alert"], score * 0.6, score)
+    score = np.clip(score, 0.0, 1.0)
+    
+    # Categorías según umbrales
+    category_idx = np.select(
+        [score >= p["t0"], score >= p["t1"], score >= p["t2"], score >= p["t3"]], [0, 1, 2, 3], default=4
+    )
+    
+    risk_pct = (1.0 - score) * 100.0
+    
+    # COMPONENTE 1: feature-based
+    comp_feature = score * feats["f_avg_purchase"] * p["max_cap"] * p["segment_multiplier"] * p["prudence_factor"]
+    
+    # COMPONENTE 2: income-proxy
+    income_proxy_daily = feats["avg_purchase_raw"] * feats["clients_per_day"]
+    comp_income = score * income_proxy_daily * p["base_days_income"] * p["income_prudence"]
+    
+    # Combinación conservadora y cupo mínimo para categoría C y superior
+    cupo_raw = 0.5 * (comp_feature + comp_income)
+    cupo = np.clip(cupo_raw, 0.0, p["max_cap"])
+    min_cupo = p["min_cupo_allowed"]
+    cupo = np.where((cupo < min_cupo) & (score >= p["t2"]), min_cupo, cupo)
+    
+    return {
+        "score": score,
+        "category_idx": category_idx,
+        "risk_pct": risk_pct,
+        "comp_feature": comp_feature,
+        "comp_income": comp_income,
+        "income_proxy_daily": income_proxy_daily,
+        "cupo_raw": cupo_raw,
+        "cupo": cupo,
+    }
+
+def heuristic_micro_v2_batch(data: Union["pd.DataFrame", Mapping[str, Any]],
+                             conf: Dict[str, Any] = None) -> "pd.DataFrame":
+    """
+    Versión vectorizada de heuristic_micro_v2 para muchos registros.
+    
+    Calcula features, puntaje, categorías, componentes y cupo como operaciones
+    sobre arreglos completos. Los resultados son idénticos bit a bit a los de
+    heuristic_micro_v2 aplicada fila por fila (el orden de las operaciones de
+    punto flotante y el redondeo reproducen la versión escalar).
+    
+    Valores ausentes (None/NaN) se tratan como claves ausentes en la versión
+    escalar: know_buyer, buy_freq y psych_* → 0.0, avg_purchase → avg_purchase_min,
+    distance_km → sin distancia, address_verified → False.
+    
+    Args:
+        data: DataFrame o mapeo columna → arreglo con las columnas de INPUT_COLUMNS
+        conf: Configuración del modelo (opcional)
+        
+    Returns:
+        DataFrame con una fila por registro: las claves del resultado escalar
+        y las features normalizadas como columnas (FEATURE_COLUMNS)
+    """
+    import numpy as np
+    import pandas as pd
+
+    if conf is None:
+        conf = DEFAULTS_MICRO_V2
+    
+    feats = batch_features(data, conf)
+    scores = batch_scores(feats, score_params(conf))
+    
+    score_rounded = round_like_python(scores["score"], 4)
+    result = pd.DataFrame({
+        "category": np.array(CATEGORIES, dtype=object)[scores["category_idx"]],
+        "score_conf": score_rounded,
+        "risk_pct": round_like_python(scores["risk_pct"], 2),
+        "debt_capacity_pct": score_rounded.copy(),
+        "cupo_estimated": round_like_python(scores["cupo"], 2),
+        "raw_cupo": round_like_python(scores["cupo_raw"], 2),
+        "comp_feature": round_like_python(scores["comp_feature"], 2),
+        "comp_income": round_like_python(scores["comp_income"], 2),
+        "clients_per_day": feats["clients_per_day"],
+        "income_proxy_daily": round_like_python(scores["income_proxy_daily"], 2),
+        **{name: feats[name] for name in FEATURE_COLUMNS},
+    }, index=data.index if isinstance(data, pd.DataFrame) else None)
+    return result
+
 def get_default_config() -> Dict[str, Any]:
     """
     Retorna la configuración por defecto del modelo.
     
     Returns:
-        Diccionario con configuración por defecto
+        Diccionario con configuración por defecto (copia profunda: modificarla
+        no altera los pesos ni umbrales compartidos)
     """
-    return DEFAULTS_MICRO_V2.copy()
+    return copy.deepcopy(DEFAULTS_MICRO_V2)
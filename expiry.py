@@ -0,0 +1,118 @@
+"""
+Motor de expiración de transacciones.
+Mantiene un índice de vencimientos ordenado por deadline (min-heap) y un barrido
+en segundo plano que marca transacciones expiradas y libera las ya finalizadas.
+"""
+
+import asyncio
+import heapq
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from structured_logging import get_logger
+
+log = get_logger("expiry")
+
+# Tipos de vencimiento registrados en el índice
+EXPIRE = "expire"  # el token llega a su expires_at
+EVICT = "evict"    # la transacción finalizada cumple su ventana de retención
+
+
+class ExpiryIndex:
+    """Índice de vencimientos ordenado por deadline (timestamp epoch)"""
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, str, str]] = []
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def schedule(self, deadline: float, token: str, kind: str) -> None:
+        """Registra un vencimiento para el token"""
+        with self._lock:
+            self._seq += 1
+            heapq.heappush(self._heap, (deadline, self._seq, token, kind))
+
+    def pop_due(self, now: float) -> List[Tuple[float, str, str]]:
+        """Extrae todos los vencimientos con deadline <= now, en orden"""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, _, token, kind = heapq.heappop(self._heap)
+                due.append((deadline, token, kind))
+        return due
+
+    def clear(self) -> None:
+        with self._lock:
+            self._heap.clear()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+class ExpiryStats:
+    """Contadores acumulados del barrido de expiración"""
+
+    def __init__(self):
+        self.sweeps = 0
+        self.expired = 0
+        self.evicted = 0
+        self.last_sweep_at: Optional[float] = None
+        self.last_sweep_ms = 0.0
+
+    def record(self, expired: int, evicted: int, duration_s: float) -> None:
+        self.sweeps += 1
+        self.expired += expired
+        self.evicted += evicted
+        self.last_sweep_at = time.time()
+        self.last_sweep_ms = duration_s * 1000.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "sweeps_total": self.sweeps,
+            "expired_total": self.expired,
+            "evicted_total": self.evicted,
+            "last_sweep_at": self.last_sweep_at,
+            "last_sweep_ms": round(self.last_sweep_ms, 3),
+        }
+
+
+class ExpirySweeper:
+    """
+    Tarea asyncio que ejecuta periódicamente la función de barrido.
+    Se inicia y detiene desde el lifespan de FastAPI. El barrido corre en un
+    hilo: con SQLite espera el lock de escritura y en memoria un lote grande de
+    vencimientos se procesa completo, sin bloquear el event loop.
+    """
+
+    def __init__(self, sweep_fn: Callable[[], Dict[str, int]], interval_seconds: float):
+        self.sweep_fn = sweep_fn
+        self.interval_seconds = interval_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await asyncio.to_thread(self.sweep_fn)
+            except Exception as e:
+                # Un fallo puntual no debe detener el barrido
+                log.error("expiry_sweep_error", error=str(e))
@@ -0,0 +1,60 @@
+"""
+Respuestas JSON rápidas (opcional, FAST_JSON_RESPONSES=1).
+Por defecto FastAPI valida de nuevo cada modelo devuelto contra response_model,
+lo convierte con jsonable_encoder y lo serializa con json.dumps. Los modelos que
+entrega la API ya son confiables (se validaron al entrar o se construyen desde
+el almacén), así que en modo rápido se serializan directamente: los modelos
+Pydantic con su serializador nativo y los diccionarios con orjson si está
+instalado. El JSON resultante es el mismo que el de la respuesta estándar.
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.responses import Response
+
+try:
+    import orjson  # opcional: serializa diccionarios, fechas y enums sin jsonable_encoder
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+def model_bytes(model: BaseModel) -> bytes:
+    """JSON de un modelo Pydantic sin validarlo de nuevo (mismo resultado que model_dump_json)"""
+    return model.__pydantic_serializer__.to_json(model)
+
+
+if orjson is not None:
+    def dumps(content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return model_bytes(content)
+        return orjson.dumps(content, default=_default)
+else:
+    def dumps(content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return model_bytes(content)
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":"),
+                          default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse que serializa con dumps (modelos Pydantic, fechas y enums incluidos)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_response(content: Any, status_code: int = 200,
+                  headers: Optional[Dict[str, str]] = None) -> Response:
+    """Respuesta ya serializada: FastAPI la entrega tal cual, sin response_model ni jsonable_encoder"""
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
@@ -290,41 +290,91 @@ async function validarCliente(event) {
     }
 }
 
-// Función para hacer polling del resultado
-async function pollResultado() {
-    const pollInterval = setInterval(async () => {
+// Procesa un estado recibido del servidor. Retorna true si es un estado final
+function manejarEstado(data) {
+    console.log('Estado de transacción:', data);
+    
+    if (data.status === 'completed') {
+        mostrarResultado(data.result);
+        return true;
+    } else if (data.status === 'error') {
+        mostrarError(data.message || 'Error en el procesamiento');
+        return true;
+    } else if (data.status === 'expired') {
+        mostrarError('La transacción ha expirado');
+        return true;
+    }
+    return false;
+}
+
+// Espera el resultado por el stream SSE; si el navegador no lo soporta o la
+// conexión falla, usa long-poll
+function pollResultado() {
+    const token = currentToken;
+    if (!window.EventSource) {
+        longPollResultado(token);
+        return;
+    }
+    
+    let finalizado = false;
+    const source = new EventSource(`${API_BASE_URL}/transactions/${token}/events`);
+    
+    source.addEventListener('status', (event) => {
+        if (manejarEstado(JSON.parse(event.data))) {
+            finalizado = true;
+            source.close();
+        }
+    });
+    
+    source.addEventListener('not_found', () => {
+        finalizado = true;
+        source.close();
+        mostrarError('Transacción no encontrada');
+    });
+    
+    source.onerror = () => {
+        source.close();
+        if (!finalizado) {
+            console.warn('Stream SSE no disponible, usando long-poll');
+            longPollResultado(token);
+        }
+    };
+}
+
+// Long-poll: el servidor responde apenas cambia el estado (o tras el timeout)
+async function longPollResultado(token) {
+    let since = null;
+    const limite = Date.now() + 15 * 60 * 1000;
+    
+    while (Date.now() < limite) {
         try {
-            const response = await fetch(`${API_BASE_URL}/transactions/${currentToken}/status`);
+            const params = new URLSearchParams({ timeout: '25' });
+            if (since) {
+                params.set('since', since);
+            }
+            const response = await fetch(`${API_BASE_URL}/transactions/${token}/status/wait?${params}`);
             
             if (!response.ok) {
                 if (response.status === 404) {
-                    clearInterval(pollInterval);
                     mostrarError('Transacción no encontrada');
                     return;
                 }
                 throw new Error('Error al consultar estado');
             }
-
-            const data = await response.json();
-            console.log('Estado de transacción:', data);
             
-            if (data.status === 'completed') {
-                clearInterval(pollInterval);
-                mostrarResultado(data.result);
-            } else if (data.status === 'error') {
-                clearInterval(pollInterval);
-                mostrarError(data.message || 'Error en el procesamiento');
-            } else if (data.status === 'expired') {
-                clearInterval(pollInterval);
-                mostrarError('La transacción ha expirado');
+            const data = await response.json();
+            if (manejarEstado(data)) {
+                return;
             }
+            since = data.status;
             
         } catch (error) {
-            console.error('Error en polling:', error);
-            clearInterval(pollInterval);
+            console.error('Error en long-poll:', error);
             mostrarError(`Error al consultar el resultado: ${error.message}`);
+            return;
         }
-    }, 2000); // Polling cada 2 segundos
+    }
+    mostrarError('La transacción ha expirado');
 }
 
 // Función para mostrar resultado
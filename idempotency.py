@@ -0,0 +1,131 @@
+"""
+Deduplicación de reintentos de los webhooks.
+n8n/Twilio y las redes inestables del POS reenvían la misma entrega. Cada
+entrega se identifica con el header Idempotency-Key o, si no viene, con un hash
+del payload. La primera respuesta exitosa se guarda en un caché acotado con
+vencimiento; un reintento recibe la misma respuesta sin tocar el almacén ni el
+scoring.
+
+Con STORAGE_BACKEND=sqlite y varios workers, cada respuesta también se guarda
+en la base compartida: un reintento que llega a otro worker la encuentra ahí
+(el caché del proceso queda como primer nivel).
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+
+from pydantic import BaseModel
+from starlette.responses import Response
+
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+class StoredResponse(NamedTuple):
+    expires_at: float
+    status_code: int
+    body: bytes
+
+    def to_response(self) -> Response:
+        return Response(content=self.body, status_code=self.status_code,
+                        media_type="application/json", headers={REPLAY_HEADER: "true"})
+
+
+def webhook_key(endpoint: str, token: str, header_key: Optional[str], payload: BaseModel) -> str:
+    """
+    Clave de la entrega: el Idempotency-Key del cliente (acotado al endpoint y al
+    token) o el hash SHA-256 del payload, que ya incluye el token
+    """
+    if header_key:
+        return f"{endpoint}:{token}:key:{header_key.strip()}"
+    digest = hashlib.sha256(payload.__pydantic_serializer__.to_json(payload)).hexdigest()
+    return f"{endpoint}:body:{digest}"
+
+
+class IdempotencyCache:
+    """
+    LRU acotado clave → respuesta, con vencimiento. Se usa solo desde el event loop.
+    Con un backend compartido (get_response/put_response de storage_backends),
+    las respuestas también se leen y escriben ahí con vencimiento en epoch.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl_seconds: float = 3600.0, backend=None):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self._entries: "OrderedDict[str, StoredResponse]" = OrderedDict()
+        self.stats = {
+            "hits": 0,
+            "shared_hits": 0,
+            "misses": 0,
+            "stored": 0,
+            "expired": 0,
+            "evictions": 0,
+        }
+
+    def get(self, key: str, now: Optional[float] = None) -> Optional[StoredResponse]:
+        now = time.monotonic() if now is None else now
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= now:
+            del self._entries[key]
+            self.stats["expired"] += 1
+            entry = None
+        if entry is None:
+            entry = self._get_shared(key, now)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry
+
+    def _get_shared(self, key: str, now: float) -> Optional[StoredResponse]:
+        """Respuesta guardada por otro worker; queda también en el caché del proceso"""
+        if self.backend is None:
+            return None
+        wall_now = time.time()
+        row = self.backend.get_response(key, wall_now)
+        if row is None:
+            return None
+        expires_at, status_code, body = row
+        self.stats["shared_hits"] += 1
+        self._store(key, StoredResponse(now + (expires_at - wall_now), status_code, body), now)
+        return self._entries.get(key)
+
+    def put(self, key: str, status_code: int, body: bytes, now: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        now = time.monotonic() if now is None else now
+        self.stats["stored"] += 1
+        if self.backend is not None:
+            self.backend.put_response(key, time.time() + self.ttl_seconds, status_code, body)
+        self._store(key, StoredResponse(now + self.ttl_seconds, status_code, body), now)
+
+    def _store(self, key: str, entry: StoredResponse, now: float) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        # Las entradas menos usadas están al inicio: se liberan las vencidas y el exceso
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            if oldest.expires_at <= now:
+                self._entries.popitem(last=False)
+                self.stats["expired"] += 1
+            elif len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+            else:
+                break
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl_seconds,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
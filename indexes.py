@@ -0,0 +1,69 @@
+"""
+Índices secundarios en memoria para el almacén de transacciones.
+Cada clave del índice (por ejemplo ("store", "TIENDA_001")) apunta a una lista
+ordenada de números de secuencia, lo que permite paginar por cursor en
+O(log n + tamaño de página) sin recorrer todas las transacciones.
+"""
+
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class SecondaryIndex:
+    """Mapa clave -> secuencias ordenadas, con actualizaciones incrementales"""
+
+    def __init__(self):
+        self._entries: Dict[Hashable, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, keys: Iterable[Hashable], seq: int) -> None:
+        with self._lock:
+            for key in keys:
+                seqs = self._entries.get(key)
+                if seqs is None:
+                    self._entries[key] = [seq]
+                elif seqs[-1] < seq:
+                    seqs.append(seq)  # caso común: secuencia más reciente
+                else:
+                    insort(seqs, seq)
+
+    def remove(self, keys: Iterable[Hashable], seq: int) -> None:
+        with self._lock:
+            for key in keys:
+                seqs = self._entries.get(key)
+                if not seqs:
+                    continue
+                pos = bisect_left(seqs, seq)
+                if pos < len(seqs) and seqs[pos] == seq:
+                    del seqs[pos]
+                if not seqs:
+                    del self._entries[key]
+
+    def update(self, old_keys: Tuple[Hashable, ...], new_keys: Tuple[Hashable, ...], seq: int) -> None:
+        """Mueve la secuencia de las claves que ya no aplican a las nuevas"""
+        if old_keys == new_keys:
+            return
+        old, new = set(old_keys), set(new_keys)
+        self.remove(old - new, seq)
+        self.add(new - old, seq)
+
+    def page(self, key: Hashable, before: Optional[int], limit: int) -> Tuple[List[int], bool]:
+        """
+        Retorna hasta `limit` secuencias menores que `before` (más recientes primero)
+        y si quedan más resultados después de esta página.
+        """
+        with self._lock:
+            seqs = self._entries.get(key)
+            if not seqs:
+                return [], False
+            end = len(seqs) if before is None else bisect_left(seqs, before)
+            start = max(0, end - limit)
+            return seqs[start:end][::-1], start > 0
+
+    def count(self, key: Hashable) -> int:
+        return len(self._entries.get(key, ()))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
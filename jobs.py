@@ -0,0 +1,204 @@
+"""
+Cola de trabajos en segundo plano.
+Los webhooks encolan el paso de cierre del crédito (puntaje, registro en
+Sistecrédito y transición final) y responden de inmediato. Un conjunto de
+workers asyncio consume la cola; en modo "thread" cada trabajo corre en un pool
+de hilos propio para no bloquear el event loop. Los trabajos que son corrutinas
+(llamadas HTTP salientes) corren en el event loop y delegan su parte bloqueante
+con run_blocking.
+
+La cola tiene profundidad máxima: si está llena, submit lanza QueueFull y el
+llamador decide cómo rechazar la petición. Los trabajos que fallan se reintentan
+con backoff exponencial; al agotar los reintentos se llama on_failure.
+"""
+
+import asyncio
+import contextvars
+import itertools
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional
+
+from structured_logging import get_logger
+
+log = get_logger("jobs")
+
+
+class QueueFull(Exception):
+    """La cola alcanzó su profundidad máxima"""
+
+
+class Job:
+    """
+    Trabajo encolado: función, argumentos y tiempos para las métricas.
+    Conserva el contexto de quien lo encoló (correlation ID de los logs).
+    """
+
+    __slots__ = ("id", "name", "fn", "args", "on_failure", "enqueued_at", "attempts", "context")
+
+    def __init__(self, job_id: int, name: str, fn: Callable[..., Any], args: tuple,
+                 on_failure: Optional[Callable[[BaseException], None]]):
+        self.id = job_id
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.on_failure = on_failure
+        self.enqueued_at = time.perf_counter()
+        self.attempts = 0
+        self.context = contextvars.copy_context()
+
+
+def _percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class JobQueue:
+    """Cola acotada con workers asyncio, reintentos y métricas de profundidad y latencia"""
+
+    def __init__(self, maxsize: int = 1000, workers: int = 4, max_retries: int = 2,
+                 retry_backoff_seconds: float = 0.2, executor: str = "thread", latency_window: int = 1024):
+        if executor not in ("thread", "asyncio"):
+            raise ValueError(f"Executor de trabajos desconocido: {executor}")
+        self.maxsize = maxsize
+        self.workers = workers
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.executor = executor
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._ids = itertools.count(1)
+        self._in_progress = 0
+        self._wait_ms: Deque[float] = deque(maxlen=latency_window)
+        self._latency_ms: Deque[float] = deque(maxlen=latency_window)
+        self.stats = {
+            "submitted_total": 0,
+            "completed_total": 0,
+            "failed_total": 0,
+            "retried_total": 0,
+            "rejected_total": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks) and not all(task.done() for task in self._tasks)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self) -> None:
+        """Crea la cola y los workers (debe llamarse dentro del event loop)"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        if self.executor == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job-worker")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Espera a que se vacíe la cola (hasta timeout) y detiene los workers"""
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            log.warning("job_queue_stopped_with_pending", pending=self.depth)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def submit(self, name: str, fn: Callable[..., Any], *args,
+               on_failure: Optional[Callable[[BaseException], None]] = None) -> Job:
+        """
+        Encola fn(*args). Lanza QueueFull si la cola está llena.
+        on_failure(excepción) se llama si el trabajo falla en todos los intentos.
+        """
+        if self._queue is None:
+            raise RuntimeError("La cola de trabajos no está iniciada")
+        job = Job(next(self._ids), name, fn, args, on_failure)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.stats["rejected_total"] += 1
+            raise QueueFull(f"Cola de trabajos llena ({self.maxsize})")
+        self.stats["submitted_total"] += 1
+        return job
+
+    async def run_blocking(self, fn: Callable[..., Any], *args) -> Any:
+        """
+        Ejecuta una función bloqueante desde un trabajo asíncrono: en el pool de
+        la cola (modo "thread") o en línea (modo "asyncio"), con el contexto actual
+        """
+        if self._pool is None:
+            return fn(*args)
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(self._pool, context.run, fn, *args)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                self._wait_ms.append((time.perf_counter() - job.enqueued_at) * 1000.0)
+                self._in_progress += 1
+                await self._run(job)
+            finally:
+                self._in_progress -= 1
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        while True:
+            job.attempts += 1
+            try:
+                if asyncio.iscoroutinefunction(job.fn):
+                    await asyncio.get_running_loop().create_task(job.fn(*job.args), context=job.context)
+                elif self._pool is not None:
+                    await asyncio.get_running_loop().run_in_executor(self._pool, job.context.run, job.fn, *job.args)
+                else:
+                    job.context.run(job.fn, *job.args)
+            except Exception as e:
+                if job.attempts <= self.max_retries:
+                    self.stats["retried_total"] += 1
+                    job.context.run(log.warning, "job_retry", job=job.name, job_id=job.id,
+                                    attempt=job.attempts, error=str(e))
+                    await asyncio.sleep(self.retry_backoff_seconds * 2 ** (job.attempts - 1))
+                    continue
+                self.stats["failed_total"] += 1
+                job.context.run(log.error, "job_failed", job=job.name, job_id=job.id,
+                                attempts=job.attempts, error=str(e))
+                if job.on_failure is not None:
+                    try:
+                        job.context.run(job.on_failure, e)
+                    except Exception as failure_error:
+                        log.error("job_on_failure_error", job=job.name, job_id=job.id, error=str(failure_error))
+            else:
+                self.stats["completed_total"] += 1
+            self._latency_ms.append((time.perf_counter() - job.enqueued_at) * 1000.0)
+            return
+
+    def as_dict(self) -> Dict[str, Any]:
+        wait = sorted(self._wait_ms)
+        latency = sorted(self._latency_ms)
+        return {
+            **self.stats,
+            "depth": self.depth,
+            "maxsize": self.maxsize,
+            "in_progress": self._in_progress,
+            "workers": self.workers,
+            "executor": self.executor,
+            "running": self.running,
+            "queue_wait_ms": {"p50": round(_percentile(wait, 0.5), 3), "p95": round(_percentile(wait, 0.95), 3)},
+            "latency_ms": {
+                "p50": round(_percentile(latency, 0.5), 3),
+                "p95": round(_percentile(latency, 0.95), 3),
+                "max": round(latency[-1], 3) if latency else 0.0,
+            },
+        }
@@ -0,0 +1,249 @@
+"""
+Journal de transacciones: registro append-only en NDJSON con snapshots periódicos.
+Permite recuperar el backend en memoria tras un reinicio sin poner una base de
+datos en el camino de cada petición.
+
+Formato (una entrada JSON por línea):
+    ["c", fila]           creación o estado completo de un registro
+    ["u", token, campos]  actualización de campos (valores empaquetados)
+    ["d", token]          liberación del registro
+
+Archivos en el directorio del journal:
+    journal-<segmento>.ndjson    entradas escritas a partir de ese segmento
+    snapshot-<segmento>.ndjson   estado completo al abrir ese segmento (solo entradas "c")
+
+La recuperación lee el snapshot más reciente y luego los segmentos iguales o
+posteriores a él. Las escrituras se agrupan: un hilo en segundo plano escribe
+y hace fsync de todo lo pendiente cada fsync_interval_ms (group commit).
+"""
+
+import json
+import mmap
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import orjson  # opcional: acelera la escritura y el replay
+except ImportError:
+    orjson = None
+
+_SEGMENT_RE = re.compile(r"^(journal|snapshot)-(\d{8})\.ndjson$")
+
+if orjson is not None:
+    def _encode(entry: list) -> bytes:
+        return orjson.dumps(entry) + b"\n"
+
+    _decode_line = orjson.loads
+else:
+    _json_decode = json.JSONDecoder().decode
+
+    def _encode(entry: list) -> bytes:
+        return json.dumps(entry, separators=(",", ":"), ensure_ascii=False).encode("utf-8") + b"\n"
+
+    def _decode_line(line: bytes) -> list:
+        return _json_decode(line.decode("utf-8"))
+
+
+def _read_lines(path: str) -> Iterator[list]:
+    """Lee un archivo NDJSON con mmap. Se detiene en una línea final truncada."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line in iter(mm.readline, b""):
+                try:
+                    yield _decode_line(line)
+                except ValueError:
+                    # Escritura interrumpida por una caída: el resto del segmento no es confiable
+                    return
+
+
+class TransactionJournal:
+    """Journal append-only con group commit y snapshots en segundo plano"""
+
+    def __init__(self, directory: str, fsync_interval_ms: float = 50.0, snapshot_every: int = 100_000):
+        self.directory = directory
+        self.fsync_interval = fsync_interval_ms / 1000.0
+        self.snapshot_every = snapshot_every
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._flushed = threading.Condition(self._lock)
+        self._wake = threading.Event()
+        self._buffer: List[bytes] = []
+        self._appended = 0
+        self._written = 0
+        self._since_snapshot = 0
+        self._segment = 0
+        self._file = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._snapshot_source: Optional[Callable[[], Iterable[list]]] = None
+        self._snapshot_thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            "entries_total": 0,
+            "fsyncs_total": 0,
+            "bytes_total": 0,
+            "snapshots_total": 0,
+            "replayed_entries": 0,
+            "replay_seconds": 0.0,
+        }
+
+    # --- Archivos -------------------------------------------------------------
+
+    def _path(self, kind: str, segment: int) -> str:
+        return os.path.join(self.directory, f"{kind}-{segment:08d}.ndjson")
+
+    def _segments(self, kind: str) -> List[int]:
+        found = []
+        for name in os.listdir(self.directory):
+            match = _SEGMENT_RE.match(name)
+            if match and match.group(1) == kind:
+                found.append(int(match.group(2)))
+        return sorted(found)
+
+    # --- Recuperación ---------------------------------------------------------
+
+    def replay(self) -> Iterator[list]:
+        """Entradas del snapshot más reciente seguidas por los segmentos posteriores"""
+        started = time.perf_counter()
+        count = 0
+        snapshots = self._segments("snapshot")
+        base = snapshots[-1] if snapshots else 0
+        paths = [self._path("snapshot", base)] if snapshots else []
+        paths += [self._path("journal", segment) for segment in self._segments("journal") if segment >= base]
+        for path in paths:
+            for entry in _read_lines(path):
+                count += 1
+                yield entry
+        self.stats["replayed_entries"] = count
+        self.stats["replay_seconds"] = round(time.perf_counter() - started, 3)
+
+    # --- Escritura ------------------------------------------------------------
+
+    def start(self, snapshot_source: Callable[[], Iterable[list]]) -> None:
+        """
+        Abre un segmento nuevo y arranca el hilo de escritura.
+        snapshot_source retorna las filas del estado actual para los snapshots.
+        """
+        self._snapshot_source = snapshot_source
+        existing = self._segments("journal") + self._segments("snapshot")
+        self._segment = (max(existing) + 1) if existing else 1
+        self._file = open(self._path("journal", self._segment), "ab")
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="transaction-journal", daemon=True)
+        self._thread.start()
+
+    def append(self, entry: list) -> None:
+        """Agrega una entrada; queda en disco en el siguiente group commit"""
+        data = _encode(entry)
+        with self._lock:
+            self._buffer.append(data)
+            self._appended += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que todas las entradas agregadas hasta ahora estén en disco"""
+        with self._lock:
+            target = self._appended
+            self._wake.set()
+            return self._flushed.wait_for(lambda: self._written >= target, timeout=timeout)
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wake.wait(self.fsync_interval)
+            self._wake.clear()
+            self._commit()
+            if self._since_snapshot >= self.snapshot_every and not self._snapshot_running():
+                self._start_snapshot()
+        self._commit()
+
+    def _commit(self, rotate: bool = False) -> Optional[int]:
+        """Escribe y sincroniza lo pendiente; opcionalmente abre un segmento nuevo"""
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+            target = self._appended
+            old_file = self._file
+            new_segment = None
+            if rotate:
+                new_segment = self._segment + 1
+                self._segment = new_segment
+                self._file = open(self._path("journal", new_segment), "ab")
+
+        if batch:
+            data = b"".join(batch)
+            old_file.write(data)
+            old_file.flush()
+            os.fsync(old_file.fileno())
+            self.stats["entries_total"] += len(batch)
+            self.stats["fsyncs_total"] += 1
+            self.stats["bytes_total"] += len(data)
+            self._since_snapshot += len(batch)
+        if rotate:
+            old_file.close()
+
+        with self._lock:
+            self._written = max(self._written, target)
+            self._flushed.notify_all()
+        return new_segment
+
+    # --- Snapshots ------------------------------------------------------------
+
+    def _snapshot_running(self) -> bool:
+        return self._snapshot_thread is not None and self._snapshot_thread.is_alive()
+
+    def _start_snapshot(self) -> None:
+        segment = self._commit(rotate=True)
+        self._since_snapshot = 0
+        self._snapshot_thread = threading.Thread(
+            target=self._write_snapshot, args=(segment,), name="transaction-snapshot", daemon=True
+        )
+        self._snapshot_thread.start()
+
+    def snapshot(self) -> None:
+        """Rota el segmento y escribe un snapshot de forma síncrona"""
+        segment = self._commit(rotate=True)
+        self._since_snapshot = 0
+        self._write_snapshot(segment)
+
+    def _write_snapshot(self, segment: int) -> None:
+        """
+        El segmento se rota antes de leer el estado: todo cambio que no alcance a
+        quedar en el snapshot está en el segmento nuevo, y las entradas son
+        idempotentes al reaplicarse sobre él.
+        """
+        path = self._path("snapshot", segment)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for row in self._snapshot_source():
+                f.write(_encode(["c", row]))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self.stats["snapshots_total"] += 1
+
+        # Los archivos anteriores al snapshot ya no son necesarios
+        for kind in ("journal", "snapshot"):
+            for old in self._segments(kind):
+                if old < segment:
+                    os.remove(self._path(kind, old))
+
+    def close(self, snapshot: bool = True) -> None:
+        """Detiene el hilo de escritura, sincroniza y opcionalmente deja un snapshot"""
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+        if snapshot:
+            self.snapshot()
+        self._file.close()
+
+    def as_dict(self) -> Dict[str, float]:
+        return {**self.stats, "segment": self._segment, "pending": len(self._buffer)}
@@ -1,27 +1,185 @@
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import uvicorn
+import asyncio
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, Any
+from typing import AsyncIterator, Dict, Any, Optional, Tuple
 
 # Importar nuestros módulos
 from models import (
     InitiateTransactionRequest, InitiateTransactionResponse,
     ValidateTokenRequest, ValidateTokenResponse,
     WhatsAppWebhookRequest, POSWebhookRequest,
-    TransactionStatusResponse, TransactionStatus
+    TransactionStatusResponse, TransactionStatus, TransactionListResponse,
+    Transaction, ClientData, StoreValidation, CreditResult
 )
 from storage import (
-    create_transaction, get_transaction, update_transaction,
-    is_token_valid, calculate_credit_score, register_credit_mock
+    create_transaction, get_transaction, get_status_info, update_transaction, compare_and_set,
+    is_token_valid, list_transactions, calculate_credit_score, calculate_credit_score_batched,
+    register_credit, sweep_transactions, count_transactions, expiry_stats, backend, journal, scoring_config,
+    score_memo, scoring_executor, sistecredito_client, status_notifier, WAITING_STATUSES, FINAL_STATUSES
 )
+from expiry import ExpirySweeper
+from jobs import JobQueue, QueueFull
+from status_cache import StatusCache, etag_for, etag_matches
+from fast_json import FastJSONResponse, json_response, model_bytes
+from idempotency import IdempotencyCache, webhook_key
+from admission import AdmissionMiddleware, InFlightLimiter, RateLimiter, retry_after_header
+from profiling import MemoryProfiler, ProfileStore, ProfilingMiddleware, token_matches
+from metrics import (
+    CONTENT_TYPE, MetricsMiddleware, credit_results, record_rejection, registry, request_seconds, stage_seconds
+)
+from structured_logging import get_logger, set_token, setup_logging, shutdown_logging
+import structured_logging
+from records import TransactionRecord
+import config
+
+# Logging estructurado: eventos JSON escritos desde un hilo en segundo plano
+setup_logging(
+    level=config.LOG_LEVEL,
+    fmt=config.LOG_FORMAT,
+    debug_sample_rate=config.LOG_DEBUG_SAMPLE_RATE,
+    queue_size=config.LOG_QUEUE_SIZE
+)
+log = get_logger("api")
+
+# Barrido en segundo plano de transacciones vencidas y finalizadas
+expiry_sweeper = ExpirySweeper(sweep_transactions, config.EXPIRY_SWEEP_INTERVAL_SECONDS)
+
+# Cola de trabajos: cierre del crédito (puntaje + registro) fuera de la petición del webhook
+job_queue = JobQueue(
+    maxsize=config.JOB_QUEUE_MAX_DEPTH,
+    workers=config.JOB_WORKERS,
+    max_retries=config.JOB_MAX_RETRIES,
+    retry_backoff_seconds=config.JOB_RETRY_BACKOFF_SECONDS,
+    executor=config.JOB_EXECUTOR
+)
+
+# Respuestas de GET /transactions/{token}/status ya serializadas
+status_cache = StatusCache(config.STATUS_CACHE_SIZE)
+
+# Respuestas de los webhooks ya entregadas, para responder igual a los reintentos
+# Con SQLite las respuestas se comparten entre workers a través del backend
+idempotency_cache = IdempotencyCache(config.IDEMPOTENCY_CACHE_SIZE, config.IDEMPOTENCY_TTL_SECONDS, backend)
+
+# Control de admisión: token buckets por tienda y por IP, y límite de peticiones en curso
+store_limiter = RateLimiter(config.RATE_LIMIT_STORE_PER_MINUTE, config.RATE_LIMIT_STORE_BURST,
+                            config.RATE_LIMIT_MAX_KEYS)
+ip_limiter = RateLimiter(config.RATE_LIMIT_IP_PER_MINUTE, config.RATE_LIMIT_IP_BURST, config.RATE_LIMIT_MAX_KEYS)
+in_flight_limiter = InFlightLimiter(config.MAX_IN_FLIGHT_REQUESTS)
+
+# Métricas de los subsistemas que se leen al exportar /metrics
+registry.gauge("confianza_job_queue_depth", "Trabajos en espera en la cola", lambda: job_queue.depth)
+registry.gauge("confianza_in_flight_requests", "Peticiones en curso", lambda: in_flight_limiter.in_flight)
+_validation_stage = stage_seconds.labels("validation")
+_enqueue_stage = stage_seconds.labels("enqueue")
+
+# Perfilado bajo demanda (solo con PROFILING_ENABLED)
+profile_store = ProfileStore(config.PROFILING_DIR, config.PROFILING_MAX_FILES)
+memory_profiler = MemoryProfiler(config.PROFILING_DIR, config.TRACEMALLOC_FRAMES)
+
+# Estado de preparación: la API responde /health de inmediato y /ready tras el warm-up
+readiness: Dict[str, Any] = {"ready": False, "warmup_seconds": None, "error": None}
+
+def warm_up() -> float:
+    """
+    Ejecuta una vez los caminos costosos de la primera petición: validación y
+    serialización de los modelos, un cálculo de puntaje, el registro compacto
+    y el esquema OpenAPI. No escribe en el almacén.
+    """
+    started = time.perf_counter()
+    sample = Transaction(
+        token="warm-up",
+        status=TransactionStatus.PROCESSING,
+        expires_at=datetime.now(),
+        client_data=ClientData(telefono="3000000000", psych_organized=4, psych_plan=3),
+        store_validation=StoreValidation(
+            cedula_cliente="0", nombre_cliente="warm-up",
+            know_buyer=4, buy_freq=3, avg_purchase=75000, distance_km=2.5, address_verified=True
+        )
+    )
+    credit_result = calculate_credit_score(sample)
+    sample.credit_result = credit_result.model_dump()
+    TransactionRecord.from_model(sample).to_model().model_dump_json()
+    TransactionStatusResponse(status=sample.status, result=sample.credit_result).model_dump_json()
+    InitiateTransactionResponse(token=sample.token, qr_url="", expires_at=sample.expires_at).model_dump_json()
+    WhatsAppWebhookRequest.model_json_schema()
+    app.openapi()
+    return time.perf_counter() - started
+
+def respond(content: Any, status_code: int = status.HTTP_200_OK) -> Any:
+    """
+    Con FAST_JSON_RESPONSES la respuesta se serializa aquí y FastAPI la entrega
+    sin revalidarla contra response_model; si no, sigue el camino estándar.
+    """
+    if config.FAST_JSON_RESPONSES:
+        return json_response(content, status_code)
+    return content
+
+def json_response_class() -> type:
+    return FastJSONResponse if config.FAST_JSON_RESPONSES else JSONResponse
+
+async def _run_warm_up() -> None:
+    try:
+        readiness["warmup_seconds"] = round(await asyncio.to_thread(warm_up), 4)
+        readiness["ready"] = True
+        log.info("warm_up_completed", seconds=readiness["warmup_seconds"])
+    except Exception as e:
+        readiness["error"] = str(e)
+        log.error("warm_up_error", error=str(e))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Arranca y detiene los procesos en segundo plano de la API"""
+    status_notifier.bind(asyncio.get_running_loop())
+    expiry_sweeper.start()
+    job_queue.start()
+    warm_up_task = asyncio.create_task(_run_warm_up())
+    yield
+    await warm_up_task
+    await job_queue.stop()
+    await expiry_sweeper.stop()
+    if scoring_executor is not None:
+        scoring_executor.close()
+    if sistecredito_client is not None:
+        await sistecredito_client.close()
+    backend.close()
+    shutdown_logging()
 
 # Crear la aplicación FastAPI
 app = FastAPI(
     title="Confianza Vecina API",
     description="Sistema de originación de crédito basado en confianza del tendero",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+# Perfil de las peticiones con el header X-Profile (el middleware más interno)
+if config.PROFILING_ENABLED:
+    if not config.PROFILING_TOKEN:
+        log.warning("profiling_without_token", detail="PROFILING_TOKEN vacío: X-Profile y /admin/memory se rechazan")
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=profile_store,
+        token=config.PROFILING_TOKEN,
+        sample_interval_seconds=config.PROFILING_SAMPLE_INTERVAL_MS / 1000.0
+    )
+
+# Duración de las peticiones por ruta (por dentro de admisión y CORS, para ver la ruta resuelta)
+app.add_middleware(MetricsMiddleware, histogram=request_seconds)
+
+# Límites por IP y de peticiones en curso en los endpoints de transacciones
+# (se agrega antes que CORS para que los rechazos también lleven sus headers)
+app.add_middleware(
+    AdmissionMiddleware,
+    ip_limiter=ip_limiter,
+    in_flight=in_flight_limiter,
+    prefixes=("/transactions", "/webhooks", "/stores", "/clients"),
+    long_lived_suffixes=("/events", "/status/wait"),
+    on_reject=record_rejection
 )
 
 # Configurar CORS para permitir comunicación con frontends
@@ -36,7 +194,7 @@ app.add_middleware(
 @app.get("/")
 async def root():
     """Endpoint de bienvenida - Hola Mundo"""
-    return {
+    return respond({
         "message": "¡Hola! Confianza Vecina API está funcionando correctamente",
         "status": "active",
         "version": "1.0.0",
@@ -45,14 +203,139 @@ async def root():
             "validate": "POST /transactions/validate_token",
             "whatsapp": "POST /webhooks/whatsapp",
             "pos": "POST /webhooks/pos",
-            "status": "GET /transactions/{token}/status"
+            "status": "GET /transactions/{token}/status",
+            "status_wait": "GET /transactions/{token}/status/wait?since=...",
+            "events": "GET /transactions/{token}/events",
+            "by_status": "GET /transactions?status=...",
+            "by_store": "GET /stores/{store_id}/transactions",
+            "by_client": "GET /clients/{cedula}/transactions",
+            "ready": "GET /ready",
+            "stats": "GET /admin/stats",
+            "metrics": "GET /metrics",
+            "memory_snapshot": "POST /admin/memory/snapshot",
+            "scoring_reload": "POST /admin/scoring/reload"
         }
-    }
+    })
 
 @app.get("/health")
 async def health_check():
     """Endpoint para verificar el estado de la API"""
-    return {"status": "healthy", "service": "confianza-vecina-api"}
+    return respond({"status": "healthy", "service": "confianza-vecina-api"})
+
+@app.get("/ready")
+async def readiness_check():
+    """Endpoint de preparación: 503 hasta que termina el warm-up de arranque"""
+    if not readiness["ready"]:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "starting", "error": readiness["error"]}
+        )
+    return respond({"status": "ready", "warmup_seconds": readiness["warmup_seconds"]})
+
+@app.get("/admin/stats")
+async def admin_stats():
+    """Contadores internos de los subsistemas de la API"""
+    return respond({
+        "storage": {
+            "backend": backend.name,
+            "transactions": count_transactions(),
+        },
+        "expiry": {
+            **expiry_stats.as_dict(),
+            "sweeper_running": expiry_sweeper.running,
+        },
+        "journal": journal.as_dict() if journal is not None else None,
+        "jobs": job_queue.as_dict(),
+        "notifications": status_notifier.as_dict(),
+        "status_cache": status_cache.as_dict(),
+        "idempotency": idempotency_cache.as_dict(),
+        "sistecredito": sistecredito_client.as_dict() if sistecredito_client is not None else None,
+        "admission": {
+            **in_flight_limiter.as_dict(),
+            "store": store_limiter.as_dict(),
+            "ip": ip_limiter.as_dict(),
+        },
+        "logging": structured_logging.as_dict(),
+        "profiling": {
+            "enabled": config.PROFILING_ENABLED,
+            "profiles_written": profile_store.written,
+            "tracemalloc": memory_profiler.tracing,
+            "memory_snapshots": memory_profiler.snapshots,
+        },
+        "scoring": {
+            **scoring_config.as_dict(),
+            "mode": config.SCORING_MODE,
+            "memo": score_memo.as_dict(),
+            "batching": scoring_executor.as_dict() if scoring_executor is not None else None
+        }
+    })
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Métricas en formato de texto de Prometheus"""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
+def _require_token(request: Request, header: str, expected: str, setting: str) -> None:
+    """
+    Guarda de los endpoints administrativos: sin secreto configurado el endpoint
+    queda deshabilitado (503); con secreto, el header debe ser igual (403)
+    """
+    if not expected:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{setting} no está configurado"
+        )
+    if not token_matches(expected.encode(), request.headers.get(header, "").strip().encode()):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"{header.title()} inválido"
+        )
+
+def _require_profiling(request: Request) -> None:
+    """Exige PROFILING_ENABLED y el header X-Profile-Token igual a PROFILING_TOKEN"""
+    if not config.PROFILING_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Perfilado deshabilitado (PROFILING_ENABLED)"
+        )
+    _require_token(request, "x-profile-token", config.PROFILING_TOKEN, "PROFILING_TOKEN")
+
+@app.post("/admin/memory/snapshot")
+async def memory_snapshot(request: Request, limit: int = Query(20, ge=1, le=200), save: bool = False):
+    """
+    Snapshot de tracemalloc: memoria por módulo del proyecto (storage_backends,
+    records, credit_heuristic, ...), líneas que más retienen y diferencia contra
+    el snapshot anterior. Si tracemalloc no estaba activo lo inicia: el primer
+    snapshot solo ve las asignaciones posteriores (PYTHONTRACEMALLOC traza desde
+    el arranque).
+    """
+    _require_profiling(request)
+    tracing_started = memory_profiler.start()
+    result = await asyncio.to_thread(memory_profiler.snapshot, limit, save)
+    return respond({"tracing_started": tracing_started, **result})
+
+@app.post("/admin/memory/stop")
+async def stop_memory_tracing(request: Request):
+    """Detiene tracemalloc (su costo: más memoria y asignaciones más lentas)"""
+    _require_profiling(request)
+    memory_profiler.stop()
+    return respond({"tracemalloc": False})
+
+def _require_admin(request: Request) -> None:
+    """Exige el header X-Admin-Token igual a ADMIN_TOKEN"""
+    _require_token(request, "x-admin-token", config.ADMIN_TOKEN, "ADMIN_TOKEN")
+
+@app.post("/admin/scoring/reload")
+async def reload_scoring_config(request: Request):
+    """Recarga la configuración de scoring desde SCORING_CONFIG_PATH sin esperar el intervalo"""
+    _require_admin(request)
+    if not scoring_config.path:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="SCORING_CONFIG_PATH no está configurado"
+        )
+    changed = scoring_config.reload(force=True)
+    return respond({"changed": changed, **scoring_config.as_dict()})
 
 @app.post("/transactions/initiate", response_model=InitiateTransactionResponse)
 async def initiate_transaction(request: InitiateTransactionRequest):
@@ -60,18 +343,29 @@ async def initiate_transaction(request: InitiateTransactionRequest):
     Inicia una nueva transacción de crédito
     Genera un token único y URL para el QR
     """
+    retry_after = store_limiter.acquire(request.store_id)
+    if retry_after:
+        record_rejection("store")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Demasiadas transacciones iniciadas por esta tienda, intente más tarde",
+            headers={"Retry-After": retry_after_header(retry_after)}
+        )
+    
     try:
         # Crear nueva transacción
         transaction = create_transaction(request.store_id, request.tendero_name)
+        set_token(transaction.token)
+        log.info("transaction_initiated", store_id=request.store_id)
         
         # Generar URL para el QR (en producción sería la URL del bot de WhatsApp)
         qr_url = f"https://wa.me/573001234567?text=Hola%20quiero%20solicitar%20credito%20token:{transaction.token}"
         
-        return InitiateTransactionResponse(
+        return respond(InitiateTransactionResponse(
             token=transaction.token,
             qr_url=qr_url,
             expires_at=transaction.expires_at
-        )
+        ))
         
     except Exception as e:
         raise HTTPException(
@@ -90,13 +384,13 @@ async def validate_token(request: ValidateTokenRequest):
         
         if valid:
             transaction = get_transaction(token)
-            return ValidateTokenResponse(
+            return respond(ValidateTokenResponse(
                 valid=True,
                 status=transaction.status,
                 expires_at=transaction.expires_at
-            )
+            ))
         else:
-            return ValidateTokenResponse(valid=False)
+            return respond(ValidateTokenResponse(valid=False))
             
     except Exception as e:
         raise HTTPException(
@@ -104,13 +398,125 @@ async def validate_token(request: ValidateTokenRequest):
             detail=f"Error al validar token: {str(e)}"
         )
 
+# Estados desde los que cada webhook puede registrar sus datos sin completar el par
+CLIENT_DATA_ACCEPTED_FROM = {TransactionStatus.PENDING, TransactionStatus.CLIENT_DATA_RECEIVED}
+STORE_VALIDATION_ACCEPTED_FROM = {TransactionStatus.PENDING, TransactionStatus.STORE_VALIDATION_RECEIVED}
+
+def score_credit(token: str) -> Optional[Tuple[Transaction, CreditResult]]:
+    """Calcula y guarda el puntaje de una transacción en PROCESSING (parte bloqueante del cierre)"""
+    transaction = _processing_transaction(token)
+    if transaction is None:
+        return None
+    credit_result = calculate_credit_score(transaction)
+    _save_credit_result(token, credit_result)
+    return transaction, credit_result
+
+async def score_credit_batched(token: str) -> Optional[Tuple[Transaction, CreditResult]]:
+    """
+    Como score_credit, con el puntaje calculado en el micro-batching: la lectura
+    y la escritura van al pool de la cola y el lote se espera en el event loop
+    """
+    transaction = await job_queue.run_blocking(_processing_transaction, token)
+    if transaction is None:
+        return None
+    credit_result = await calculate_credit_score_batched(transaction)
+    await job_queue.run_blocking(_save_credit_result, token, credit_result)
+    return transaction, credit_result
+
+def _processing_transaction(token: str) -> Optional[Transaction]:
+    transaction = get_transaction(token)
+    if transaction is None or transaction.status != TransactionStatus.PROCESSING:
+        return None
+    return transaction
+
+def _save_credit_result(token: str, credit_result: CreditResult) -> None:
+    update_transaction(token, credit_result=credit_result)
+
+async def process_credit(token: str) -> None:
+    """
+    Calcula el puntaje, registra el crédito y cierra la transacción.
+    Corre en la cola de trabajos; solo la petición que ganó la transición a
+    PROCESSING lo encola. El puntaje y las escrituras corren en el pool de la
+    cola (con micro-batching el lote se espera en el event loop) y el registro
+    en Sistecrédito es una llamada HTTP asíncrona. Si falla,
+    la cola lo reintenta y al agotar los reintentos fail_credit marca la
+    transacción como ERROR.
+    """
+    if scoring_executor is not None:
+        scored = await score_credit_batched(token)
+    else:
+        scored = await job_queue.run_blocking(score_credit, token)
+    if scored is None:
+        return
+    transaction, credit_result = scored
+    
+    # Registrar en Sistecrédito (simulado si no hay URL configurada)
+    await register_credit(transaction, credit_result)
+    
+    # Marcar como completado
+    if await job_queue.run_blocking(compare_and_set, token, {TransactionStatus.PROCESSING},
+                                    TransactionStatus.COMPLETED):
+        credit_results.labels(credit_result.category).inc()
+    log.info("credit_completed", category=credit_result.category, cupo_estimated=credit_result.cupo_estimated)
+
+def fail_credit(token: str, error: BaseException) -> None:
+    """Marca como ERROR una transacción cuyo cierre falló en todos los intentos"""
+    compare_and_set(token, {TransactionStatus.PROCESSING}, TransactionStatus.ERROR)
+
+def enqueue_credit(token: str, previous_status: TransactionStatus, message: str) -> JSONResponse:
+    """
+    Encola el cierre del crédito y responde 202. Si la cola está llena, la
+    transacción vuelve al estado anterior (los datos recibidos se conservan)
+    y se responde 503 para que el cliente reintente el webhook.
+    """
+    try:
+        with _enqueue_stage.time():
+            job = job_queue.submit("process_credit", process_credit, token,
+                                   on_failure=lambda error: fail_credit(token, error))
+    except QueueFull:
+        compare_and_set(token, {TransactionStatus.PROCESSING}, previous_status)
+        log.warning("job_queue_full", depth=job_queue.depth)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Cola de procesamiento llena, intente de nuevo",
+            headers={"Retry-After": "1"}
+        )
+    return json_response_class()(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"message": message, "status": "accepted", "job_id": job.id}
+    )
+
+def _replayed(key: str) -> Optional[Response]:
+    """Respuesta guardada de una entrega ya procesada (reintento del webhook)"""
+    stored = idempotency_cache.get(key)
+    if stored is None:
+        return None
+    log.info("webhook_replayed", key=key)
+    return stored.to_response()
+
+def _remember(key: str, content: Any) -> Response:
+    """
+    Guarda la respuesta exitosa del webhook para entregarla igual a sus reintentos.
+    Entre la consulta del caché y este punto no hay awaits: dos entregas
+    idénticas concurrentes no se intercalan en el event loop.
+    """
+    response = content if isinstance(content, Response) else json_response_class()(content)
+    idempotency_cache.put(key, response.status_code, response.body)
+    return response
+
 @app.post("/webhooks/whatsapp")
-async def whatsapp_webhook(request: WhatsAppWebhookRequest):
+async def whatsapp_webhook(request: WhatsAppWebhookRequest, idempotency_key: Optional[str] = Header(None)):
     """
-    Webhook para recibir datos del cliente desde WhatsApp
+    Webhook para recibir datos del cliente desde WhatsApp.
+    Los reintentos (mismo Idempotency-Key o mismo payload) reciben la respuesta original.
     """
     try:
         token = request.token
+        set_token(token)
+        key = webhook_key("whatsapp", token, idempotency_key, request)
+        replayed = _replayed(key)
+        if replayed is not None:
+            return replayed
         
         # Verificar que el token existe y es válido
         if not is_token_valid(token):
@@ -121,41 +527,33 @@ async def whatsapp_webhook(request: WhatsAppWebhookRequest):
         
         # Actualizar transacción con datos del cliente
         from models import ClientData
-        client_data = ClientData(
-            telefono=request.telefono,
-            direccion=request.direccion,
-            ingresos_mensuales=request.ingresos_mensuales,
-            trabajo=request.trabajo,
-            psych_organized=request.psych_organized,
-            psych_plan=request.psych_plan
-        )
-        
-        update_transaction(token, client_data=client_data, status=TransactionStatus.CLIENT_DATA_RECEIVED)
-        
-        # Verificar si ya tenemos datos del tendero para procesar
-        transaction = get_transaction(token)
-        print(f"🔍 DEBUG WHATSAPP: Token {token}")
-        print(f"   Estado actual: {transaction.status}")
-        print(f"   Tiene client_data: {transaction.client_data is not None}")
-        print(f"   Tiene store_validation: {transaction.store_validation is not None}")
+        with _validation_stage.time():
+            client_data = ClientData(
+                telefono=request.telefono,
+                direccion=request.direccion,
+                ingresos_mensuales=request.ingresos_mensuales,
+                trabajo=request.trabajo,
+                psych_organized=request.psych_organized,
+                psych_plan=request.psych_plan
+            )
         
-        if transaction.store_validation:
-            print(f"✅ PROCESANDO CRÉDITO: Ambos datos completos")
-            # Calcular puntaje y procesar crédito
-            update_transaction(token, status=TransactionStatus.PROCESSING)
-            credit_result = calculate_credit_score(transaction)
-            update_transaction(token, credit_result=credit_result.model_dump())
-            
-            # Simular registro en Sistecrédito
-            register_credit_mock(transaction, credit_result)
-            
-            # Marcar como completado
-            update_transaction(token, status=TransactionStatus.COMPLETED)
-            print(f"✅ CRÉDITO COMPLETADO: Estado cambiado a COMPLETED")
+        # Transición atómica: solo una de las dos peticiones (WhatsApp o POS)
+        # pasa la transacción a PROCESSING y calcula el crédito
+        if compare_and_set(token, CLIENT_DATA_ACCEPTED_FROM, TransactionStatus.CLIENT_DATA_RECEIVED,
+                           client_data=client_data):
+            log.debug("waiting_store_validation")
+        elif compare_and_set(token, {TransactionStatus.STORE_VALIDATION_RECEIVED}, TransactionStatus.PROCESSING,
+                             client_data=client_data):
+            log.info("credit_processing")
+            return _remember(key, enqueue_credit(token, TransactionStatus.STORE_VALIDATION_RECEIVED,
+                                                 "Datos del cliente recibidos correctamente"))
         else:
-            print(f"⏳ ESPERANDO DATOS DEL TENDERO: Solo datos del cliente recibidos")
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="La transacción ya está en procesamiento o finalizada"
+            )
         
-        return {"message": "Datos del cliente recibidos correctamente", "status": "success"}
+        return _remember(key, {"message": "Datos del cliente recibidos correctamente", "status": "success"})
         
     except HTTPException:
         raise
@@ -166,12 +564,18 @@ async def whatsapp_webhook(request: WhatsAppWebhookRequest):
         )
 
 @app.post("/webhooks/pos")
-async def pos_webhook(request: POSWebhookRequest):
+async def pos_webhook(request: POSWebhookRequest, idempotency_key: Optional[str] = Header(None)):
     """
-    Webhook para recibir validación del tendero desde el POS
+    Webhook para recibir validación del tendero desde el POS.
+    Los reintentos (mismo Idempotency-Key o mismo payload) reciben la respuesta original.
     """
     try:
         token = request.token
+        set_token(token)
+        key = webhook_key("pos", token, idempotency_key, request)
+        replayed = _replayed(key)
+        if replayed is not None:
+            return replayed
         
         # Verificar que el token existe y es válido
         if not is_token_valid(token):
@@ -182,42 +586,34 @@ async def pos_webhook(request: POSWebhookRequest):
         
         # Actualizar transacción con validación del tendero
         from models import StoreValidation
-        store_validation = StoreValidation(
-            cedula_cliente=request.cedula_cliente,
-            nombre_cliente=request.nombre_cliente,
-            know_buyer=request.know_buyer,
-            buy_freq=request.buy_freq,
-            avg_purchase=request.avg_purchase,
-            distance_km=request.distance_km,
-            address_verified=request.address_verified
-        )
-        
-        update_transaction(token, store_validation=store_validation, status=TransactionStatus.STORE_VALIDATION_RECEIVED)
-        
-        # Si ya tenemos datos del cliente, procesar la solicitud
-        transaction = get_transaction(token)
-        print(f"🔍 DEBUG POS: Token {token}")
-        print(f"   Estado actual: {transaction.status}")
-        print(f"   Tiene client_data: {transaction.client_data is not None}")
-        print(f"   Tiene store_validation: {transaction.store_validation is not None}")
+        with _validation_stage.time():
+            store_validation = StoreValidation(
+                cedula_cliente=request.cedula_cliente,
+                nombre_cliente=request.nombre_cliente,
+                know_buyer=request.know_buyer,
+                buy_freq=request.buy_freq,
+                avg_purchase=request.avg_purchase,
+                distance_km=request.distance_km,
+                address_verified=request.address_verified
+            )
         
-        if transaction.client_data:
-            print(f"✅ PROCESANDO CRÉDITO: Ambos datos completos")
-            # Calcular puntaje y procesar crédito
-            update_transaction(token, status=TransactionStatus.PROCESSING)
-            credit_result = calculate_credit_score(transaction)
-            update_transaction(token, credit_result=credit_result.model_dump())
-            
-            # Simular registro en Sistecrédito
-            register_credit_mock(transaction, credit_result)
-            
-            # Marcar como completado
-            update_transaction(token, status=TransactionStatus.COMPLETED)
-            print(f"✅ CRÉDITO COMPLETADO: Estado cambiado a COMPLETED")
+        # Transición atómica: solo una de las dos peticiones (WhatsApp o POS)
+        # pasa la transacción a PROCESSING y calcula el crédito
+        if compare_and_set(token, STORE_VALIDATION_ACCEPTED_FROM, TransactionStatus.STORE_VALIDATION_RECEIVED,
+                           store_validation=store_validation):
+            log.debug("waiting_client_data")
+        elif compare_and_set(token, {TransactionStatus.CLIENT_DATA_RECEIVED}, TransactionStatus.PROCESSING,
+                             store_validation=store_validation):
+            log.info("credit_processing")
+            return _remember(key, enqueue_credit(token, TransactionStatus.CLIENT_DATA_RECEIVED,
+                                                 "Validación del tendero recibida correctamente"))
         else:
-            print(f"⏳ ESPERANDO DATOS DEL CLIENTE: Solo datos del tendero recibidos")
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="La transacción ya está en procesamiento o finalizada"
+            )
         
-        return {"message": "Validación del tendero recibida correctamente", "status": "success"}
+        return _remember(key, {"message": "Validación del tendero recibida correctamente", "status": "success"})
         
     except HTTPException:
         raise
@@ -227,36 +623,77 @@ async def pos_webhook(request: POSWebhookRequest):
             detail=f"Error al procesar validación del POS: {str(e)}"
         )
 
+def _read_status(token: str) -> Tuple[TransactionStatusResponse, float]:
+    """
+    Estado actual de la transacción y segundos que faltan para su expiración.
+    Lanza 404 si no existe.
+    """
+    transaction = get_transaction(token)
+    
+    if not transaction:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Transacción no encontrada"
+        )
+    
+    # Verificar si ha expirado (solo expiran las transacciones que aún esperan datos)
+    remaining = (transaction.expires_at - datetime.now()).total_seconds()
+    if remaining <= 0 and (
+        transaction.status == TransactionStatus.EXPIRED
+        or compare_and_set(token, WAITING_STATUSES, TransactionStatus.EXPIRED)
+    ):
+        return TransactionStatusResponse(
+            status=TransactionStatus.EXPIRED,
+            message="La transacción ha expirado"
+        ), remaining
+    
+    result = None
+    if transaction.status == TransactionStatus.COMPLETED and transaction.credit_result:
+        result = transaction.credit_result
+    
+    return TransactionStatusResponse(
+        status=transaction.status,
+        result=result
+    ), remaining
+
+def _wait_timeout(response: TransactionStatusResponse, remaining: float, limit: float) -> float:
+    """Espera hasta el próximo cambio sin pasar la expiración de una transacción en espera"""
+    if response.status in WAITING_STATUSES and remaining > 0:
+        return min(limit, remaining)
+    return limit
+
 @app.get("/transactions/{token}/status", response_model=TransactionStatusResponse)
-async def get_transaction_status(token: str):
+async def get_transaction_status(token: str, if_none_match: Optional[str] = Header(None)):
     """
-    Obtiene el estado actual de una transacción
+    Obtiene el estado actual de una transacción.
+    Responde con ETag (versión de la transacción); con If-None-Match igual a la
+    versión actual responde 304 sin cuerpo. El cuerpo serializado se reutiliza
+    mientras la versión no cambie.
     """
     try:
-        transaction = get_transaction(token)
-        
-        if not transaction:
+        info = get_status_info(token)
+        if info is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Transacción no encontrada"
             )
+        if info.status in WAITING_STATUSES and datetime.now() >= info.expires_at:
+            # La expiración perezosa cambia el estado (y la versión)
+            _read_status(token)
+            info = get_status_info(token) or info
         
-        # Verificar si ha expirado
-        if datetime.now() >= transaction.expires_at:
-            update_transaction(token, status=TransactionStatus.EXPIRED)
-            return TransactionStatusResponse(
-                status=TransactionStatus.EXPIRED,
-                message="La transacción ha expirado"
-            )
-        
-        result = None
-        if transaction.status == TransactionStatus.COMPLETED and transaction.credit_result:
-            result = transaction.credit_result
+        etag = etag_for(info.version)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, etag):
+            status_cache.record_not_modified()
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
         
-        return TransactionStatusResponse(
-            status=transaction.status,
-            result=result
-        )
+        # La versión se lee antes que el contenido: el cuerpo nunca es más viejo que su versión
+        body = status_cache.get(token, info.version)
+        if body is None:
+            body = model_bytes(_read_status(token)[0])
+            status_cache.put(token, info.version, body)
+        return Response(content=body, media_type="application/json", headers=headers)
         
     except HTTPException:
         raise
@@ -266,5 +703,107 @@ async def get_transaction_status(token: str):
             detail=f"Error al consultar estado: {str(e)}"
         )
 
+@app.get("/transactions/{token}/status/wait", response_model=TransactionStatusResponse)
+async def wait_transaction_status(
+    token: str,
+    since: Optional[TransactionStatus] = Query(None, description="Último estado conocido por el cliente"),
+    timeout: float = Query(25.0, gt=0, description="Segundos máximos de espera")
+):
+    """
+    Long-poll: responde apenas el estado es distinto de `since` (o es final).
+    Si no hay cambios en `timeout` segundos responde el estado actual.
+    """
+    deadline = time.monotonic() + min(timeout, config.STATUS_WAIT_MAX_SECONDS)
+    while True:
+        future = status_notifier.watch(token)
+        try:
+            response, remaining = _read_status(token)
+            left = deadline - time.monotonic()
+            if since is None or response.status != since or response.status in FINAL_STATUSES or left <= 0:
+                return respond(response)
+            await status_notifier.wait(future, _wait_timeout(response, remaining, left))
+        finally:
+            status_notifier.unwatch(token, future)
+
+def _sse_event(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+async def _status_events(token: str) -> AsyncIterator[str]:
+    """Un evento "status" por cada cambio de estado; termina en un estado final"""
+    last_status = None
+    while True:
+        future = status_notifier.watch(token)
+        try:
+            try:
+                response, remaining = _read_status(token)
+            except HTTPException:
+                # La transacción fue liberada del almacén
+                yield _sse_event("not_found", "{}")
+                return
+            if response.status != last_status:
+                last_status = response.status
+                yield _sse_event("status", response.model_dump_json())
+            if response.status in FINAL_STATUSES:
+                return
+            if not await status_notifier.wait(future, _wait_timeout(response, remaining, config.SSE_HEARTBEAT_SECONDS)):
+                yield ": keepalive\n\n"
+        finally:
+            status_notifier.unwatch(token, future)
+
+@app.get("/transactions/{token}/events")
+async def stream_transaction_status(token: str):
+    """
+    Stream SSE del estado de la transacción: envía el estado actual y cada
+    cambio como evento "status" y cierra el stream en un estado final.
+    """
+    _read_status(token)  # 404 antes de abrir el stream
+    return StreamingResponse(
+        _status_events(token),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _list_page(**filters) -> TransactionListResponse:
+    """Ejecuta un listado paginado y traduce cursores inválidos a 400"""
+    try:
+        items, next_cursor = list_transactions(**filters)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return TransactionListResponse(items=items, next_cursor=next_cursor)
+
+@app.get("/transactions", response_model=TransactionListResponse)
+async def list_transactions_by_status(
+    status_filter: TransactionStatus = Query(..., alias="status"),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200)
+):
+    """
+    Lista las transacciones en un estado dado, más recientes primero
+    """
+    return respond(_list_page(status=status_filter, cursor=cursor, limit=limit))
+
+@app.get("/stores/{store_id}/transactions", response_model=TransactionListResponse)
+async def list_store_transactions(
+    store_id: str,
+    status_filter: Optional[TransactionStatus] = Query(None, alias="status"),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200)
+):
+    """
+    Lista las transacciones de una tienda (opcionalmente filtradas por estado)
+    """
+    return respond(_list_page(store_id=store_id, status=status_filter, cursor=cursor, limit=limit))
+
+@app.get("/clients/{cedula}/transactions", response_model=TransactionListResponse)
+async def list_client_transactions(
+    cedula: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200)
+):
+    """
+    Lista las solicitudes de crédito asociadas a la cédula de un cliente
+    """
+    return respond(_list_page(cedula=cedula, cursor=cursor, limit=limit))
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
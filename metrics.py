@@ -0,0 +1,321 @@
+"""
+Métricas de la API en formato de texto de Prometheus (versión 0.0.4).
+Implementación mínima y sin dependencias de contadores, histogramas y gauges
+con etiquetas, servida en GET /metrics:
+- Los hijos de cada familia (una combinación de etiquetas) se crean una vez y se
+  guardan; en la ruta caliente se reutilizan sin buscar etiquetas.
+- Observar un histograma cuesta una búsqueda binaria y dos sumas bajo un lock
+  propio del hijo (el scoring y el almacén corren en hilos del pool).
+- Los gauges se calculan al exportar con una función, sin costo por petición.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Límites por defecto en segundos: de 0.5 ms a 10 s
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+GaugeValue = Union[None, float, Dict[Tuple[str, ...], float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _Timer:
+    """Context manager que observa la duración del bloque en el histograma"""
+    __slots__ = ("_child", "_started")
+
+    def __init__(self, child: "_HistogramChild"):
+        self._child = child
+
+    def __enter__(self) -> "_Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._child.observe(time.perf_counter() - self._started)
+
+
+class _HistogramChild:
+    __slots__ = ("upper_bounds", "counts", "sum", "_lock")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        # Un contador por cubeta (no acumulado) más la cubeta +Inf al final
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self.counts), self.sum
+
+
+class _Family:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Hijo de la familia para los valores de etiquetas dados (creado una sola vez)"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def _items(self) -> List[Tuple[Tuple[str, ...], object]]:
+        with self._lock:
+            return sorted(self._children.items())
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def value(self, *values: str) -> float:
+        child = self._children.get(values)
+        return child.value if child is not None else 0.0
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for values, child in self._items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}")
+        return lines
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.upper_bounds = tuple(sorted(float(bound) for bound in buckets if bound != float("inf")))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self) -> _Timer:
+        return self.labels().time()
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        bounds = self.upper_bounds + (float("inf"),)
+        names = self.labelnames + ("le",)
+        for values, child in self._items():
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                labels = _format_labels(names, values + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge(_Family):
+    """
+    Gauge calculado al exportar. La función retorna un número, None (se omite)
+    o, para gauges con etiquetas, un diccionario valores de etiquetas → número.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], GaugeValue],
+                 labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        value = self.callback()
+        if value is None:
+            return []
+        samples = value if isinstance(value, dict) else {(): value}
+        lines = self._header()
+        for values, sample in sorted(samples.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(sample)}")
+        return lines
+
+
+class Registry:
+    """Conjunto de familias que se exportan juntas"""
+
+    def __init__(self):
+        self._families: Dict[str, _Family] = {}
+
+    def _register(self, family: _Family) -> _Family:
+        if family.name in self._families:
+            raise ValueError(f"Métrica duplicada: {family.name}")
+        self._families[family.name] = family
+        return family
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, callback: Callable[[], GaugeValue],
+              labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, callback, labelnames))
+
+    def render(self) -> bytes:
+        lines: List[str] = []
+        for family in self._families.values():
+            lines.extend(family.render())
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def resident_memory_bytes() -> Optional[int]:
+    """Memoria residente del proceso leída de /proc (None fuera de Linux)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que observa la duración de cada petición HTTP por método,
+    plantilla de la ruta (/transactions/{token}/status, no el token) y código
+    de respuesta. Debe quedar por dentro del resto de middlewares para leer la
+    ruta que resolvió el router.
+    """
+
+    def __init__(self, app, histogram: Histogram):
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            self.histogram.labels(scope["method"], template, str(status_code)).observe(
+                time.perf_counter() - started
+            )
+
+
+# Métricas de la aplicación
+registry = Registry()
+
+request_seconds = registry.histogram(
+    "confianza_http_request_duration_seconds",
+    "Duración de las peticiones HTTP por método, ruta y código de respuesta",
+    ("method", "route", "status"),
+)
+stage_seconds = registry.histogram(
+    "confianza_stage_duration_seconds",
+    "Duración de cada etapa del procesamiento (validación, almacén, scoring, registro, encolado)",
+    ("stage",),
+)
+status_transitions = registry.counter(
+    "confianza_transaction_transitions_total",
+    "Cambios de estado de las transacciones (from=none al crearlas)",
+    ("from", "to"),
+)
+admission_rejections = registry.counter(
+    "confianza_admission_rejections_total",
+    "Peticiones rechazadas por el control de admisión (ip y store con 429, in_flight con 503)",
+    ("reason",),
+)
+shed_requests = registry.counter(
+    "confianza_shed_requests_total",
+    "Peticiones rechazadas con 503 por saturación (límite de peticiones en curso)",
+)
+credit_results = registry.counter(
+    "confianza_credit_results_total",
+    "Créditos completados por categoría",
+    ("category",),
+)
+
+
+def record_rejection(reason: str) -> None:
+    """Listener de los rechazos del control de admisión"""
+    admission_rejections.labels(reason).inc()
+    if reason == "in_flight":
+        shed_requests.inc()
+
+
+def record_transition(old, new) -> None:
+    """Listener de transiciones del backend de almacenamiento"""
+    status_transitions.labels(old.value if old is not None else "none", new.value).inc()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 from enum import Enum
 
@@ -34,6 +34,8 @@ class StoreValidation(BaseModel):
 class Transaction(BaseModel):
     token: str = Field(..., description="Token único de la transacción")
     status: TransactionStatus = Field(default=TransactionStatus.PENDING)
+    store_id: Optional[str] = Field(None, description="ID de la tienda que inició la transacción")
+    tendero_name: Optional[str] = Field(None, description="Nombre del tendero")
     created_at: datetime = Field(default_factory=datetime.now)
     expires_at: datetime = Field(..., description="Fecha de expiración")
     client_data: Optional[ClientData] = Field(None)
@@ -81,6 +83,21 @@ class TransactionStatusResponse(BaseModel):
     result: Optional[Dict[str, Any]] = None
     message: Optional[str] = None
 
+class TransactionSummary(BaseModel):
+    """Resumen de una transacción para los listados paginados"""
+    token: str
+    status: TransactionStatus
+    store_id: Optional[str] = None
+    tendero_name: Optional[str] = None
+    cedula_cliente: Optional[str] = None
+    created_at: datetime
+    expires_at: datetime
+    category: Optional[str] = None
+
+class TransactionListResponse(BaseModel):
+    items: List[TransactionSummary]
+    next_cursor: Optional[str] = Field(None, description="Cursor para solicitar la siguiente página")
+
 class CreditResult(BaseModel):
     """Resultado del análisis crediticio usando el modelo Micro v2"""
     category: str = Field(..., description="Categoría crediticia (A, B, C, D, E)")
@@ -94,3 +111,4 @@ class CreditResult(BaseModel):
     features: Dict[str, Any] = Field(..., description="Features normalizados")
     clients_per_day: int = Field(..., description="Clientes por día estimados")
     income_proxy_daily: float = Field(..., description="Proxy de ingreso diario")
+    config_version: Optional[str] = Field(None, description="Versión de la configuración del modelo usada")
@@ -0,0 +1,85 @@
+"""
+Notificaciones de cambios de transacciones para los canales push (SSE y long-poll).
+El backend avisa el token de cada transacción modificada; los clientes en espera
+de ese token se despiertan en el event loop y releen el estado una sola vez, en
+lugar de consultar el almacén periódicamente.
+
+notify puede llamarse desde cualquier hilo (workers de la cola de trabajos,
+barrido de expiración). Sin clientes esperando el token no hace nada.
+"""
+
+import asyncio
+import threading
+from typing import Dict, Optional, Set
+
+
+class StatusNotifier:
+    """Clientes en espera de cambios, agrupados por token"""
+
+    def __init__(self):
+        self._waiters: Dict[str, Set[asyncio.Future]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.stats = {
+            "notifications_total": 0,
+            "wakeups_total": 0,
+        }
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Event loop en el que viven los clientes en espera"""
+        self._loop = loop
+
+    def watch(self, token: str) -> asyncio.Future:
+        """
+        Future que se resuelve en el próximo cambio del token.
+        Registrarlo antes de leer el estado evita perder un cambio entre la
+        lectura y la espera. Liberarlo con unwatch.
+        """
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        future = self._loop.create_future()
+        with self._lock:
+            self._waiters.setdefault(token, set()).add(future)
+        return future
+
+    def unwatch(self, token: str, future: asyncio.Future) -> None:
+        with self._lock:
+            waiters = self._waiters.get(token)
+            if waiters is not None:
+                waiters.discard(future)
+                if not waiters:
+                    del self._waiters[token]
+
+    def notify(self, token: str) -> None:
+        """Avisa un cambio del token (seguro desde cualquier hilo)"""
+        self.stats["notifications_total"] += 1
+        if token not in self._waiters or self._loop is None:
+            return
+        with self._lock:
+            waiters = self._waiters.pop(token, None)
+        if waiters:
+            try:
+                self._loop.call_soon_threadsafe(self._wake, waiters)
+            except RuntimeError:
+                # Event loop cerrado (apagado de la API)
+                pass
+
+    def _wake(self, waiters: Set[asyncio.Future]) -> None:
+        for future in waiters:
+            if not future.done():
+                future.set_result(None)
+                self.stats["wakeups_total"] += 1
+
+    async def wait(self, future: asyncio.Future, timeout: float) -> bool:
+        """Espera el cambio hasta timeout segundos. Retorna True si hubo cambio"""
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def as_dict(self) -> Dict[str, int]:
+        with self._lock:
+            waiters = sum(len(futures) for futures in self._waiters.values())
+            watched = len(self._waiters)
+        return {**self.stats, "watched_tokens": watched, "waiters": waiters}
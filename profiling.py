@@ -0,0 +1,307 @@
+"""
+Perfilado bajo demanda de peticiones en vivo y de la memoria.
+Con PROFILING_ENABLED, una petición con el header X-Profile se perfila y el
+resultado se guarda en PROFILING_DIR; la respuesta lleva X-Profile-File con el
+nombre del archivo:
+- X-Profile: cpu     perfil determinista con cProfile (.prof, se abre con
+                     pstats o snakeviz)
+- X-Profile: sample  muestreo de la pila del hilo del event loop cada
+                     PROFILING_SAMPLE_INTERVAL_MS (.collapsed, formato de
+                     flamegraph.pl / speedscope)
+
+Los dos perfiles miden el hilo del event loop mientras la petición está en
+curso: si hay otras peticiones concurrentes sus corrutinas también aparecen.
+Se perfila una petición a la vez; mientras tanto las demás pasan sin perfilar
+(X-Profile: busy). Sin PROFILING_TOKEN el header X-Profile se ignora.
+
+MemoryProfiler toma snapshots de tracemalloc y atribuye cada asignación al
+módulo del proyecto más interno de su traceback (storage_backends, records,
+credit_heuristic, ...), aunque la memoria la reserve pydantic o la stdlib.
+"""
+
+import asyncio
+import cProfile
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from structured_logging import get_logger
+
+log = get_logger("profiling")
+
+PROFILE_HEADER = b"x-profile"
+TOKEN_HEADER = b"x-profile-token"
+FILE_HEADER = b"x-profile-file"
+MODES = {"cpu": "prof", "sample": "collapsed"}
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def token_matches(expected: bytes, provided: bytes) -> bool:
+    """Compara el token recibido en tiempo constante; sin token configurado nada pasa"""
+    return bool(expected) and hmac.compare_digest(provided, expected)
+
+
+class ProfileStore:
+    """Directorio de perfiles con un máximo de archivos (se borran los más antiguos)"""
+
+    def __init__(self, directory: str, max_files: int = 100):
+        self.directory = directory
+        self.max_files = max_files
+        self.written = 0
+
+    def new_name(self, method: str, path: str, mode: str) -> str:
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_")[:60] or "root"
+        stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{time.time_ns() % 1_000_000_000:09d}"
+        return f"{stamp}-{method.lower()}-{slug}.{MODES[mode]}"
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def files(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory) if name.endswith(tuple(MODES.values())))
+
+    def prune(self) -> None:
+        names = self.files()
+        for name in names[:max(0, len(names) - self.max_files)]:
+            try:
+                os.remove(self.path(name))
+            except OSError:
+                pass
+
+    def write_cpu(self, name: str, profiler: cProfile.Profile) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        profiler.dump_stats(self.path(name))
+        self._written()
+
+    def write_samples(self, name: str, stacks: Dict[str, int]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path(name), "w", encoding="utf-8") as output:
+            for stack, count in sorted(stacks.items()):
+                output.write(f"{stack} {count}\n")
+        self._written()
+
+    def _written(self) -> None:
+        self.written += 1
+        self.prune()
+
+
+class StackSampler:
+    """
+    Perfilador por muestreo: un hilo lee la pila del hilo observado cada
+    `interval_seconds` con sys._current_frames y cuenta las pilas colapsadas
+    (raíz;...;hoja). No instrumenta el código observado.
+    """
+
+    def __init__(self, thread_id: int, interval_seconds: float = 0.001):
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Dict[str, int]:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return dict(self.stacks)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+            self.samples += 1
+
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI que perfila las peticiones con el header X-Profile.
+    Sin el header el costo es buscar un header en la lista.
+    """
+
+    def __init__(self, app, store: ProfileStore, token: str = "", sample_interval_seconds: float = 0.001):
+        self.app = app
+        self.store = store
+        self.token = token.encode()
+        self.sample_interval_seconds = sample_interval_seconds
+        self.busy = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        mode = self._requested_mode(scope["headers"])
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+        if self.busy:
+            await self.app(scope, receive, _with_header(send, PROFILE_HEADER, b"busy"))
+            return
+
+        self.busy = True
+        try:
+            name = self.store.new_name(scope["method"], scope["path"], mode)
+            if mode == "cpu":
+                await self._profile_cpu(name, scope, receive, send)
+            else:
+                await self._profile_samples(name, scope, receive, send)
+        finally:
+            self.busy = False
+
+    def _requested_mode(self, headers) -> Optional[str]:
+        mode, token = None, b""
+        for key, value in headers:
+            if key == PROFILE_HEADER:
+                mode = value.decode("latin-1").strip().lower()
+            elif key == TOKEN_HEADER:
+                token = value.strip()
+        if mode not in MODES or not token_matches(self.token, token):
+            return None
+        return mode
+
+    async def _profile_cpu(self, name, scope, receive, send) -> None:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Otro perfilador activo en el proceso (sys.setprofile / sys.monitoring)
+            log.warning("profile_unavailable", path=scope["path"])
+            await self.app(scope, receive, _with_header(send, PROFILE_HEADER, b"unavailable"))
+            return
+        try:
+            await self.app(scope, receive, _with_header(send, FILE_HEADER, name.encode()))
+        finally:
+            profiler.disable()
+            await asyncio.to_thread(self.store.write_cpu, name, profiler)
+            log.info("profile_written", mode="cpu", file=name, path=scope["path"])
+
+    async def _profile_samples(self, name, scope, receive, send) -> None:
+        sampler = StackSampler(threading.get_ident(), self.sample_interval_seconds)
+        sampler.start()
+        try:
+            await self.app(scope, receive, _with_header(send, FILE_HEADER, name.encode()))
+        finally:
+            stacks = await asyncio.to_thread(sampler.stop)
+            await asyncio.to_thread(self.store.write_samples, name, stacks)
+            log.info("profile_written", mode="sample", file=name, path=scope["path"], samples=sampler.samples)
+
+
+def _with_header(send, name: bytes, value: bytes):
+    async def send_with_header(message):
+        if message["type"] == "http.response.start":
+            message = {**message, "headers": [*message.get("headers", []), (name, value)]}
+        await send(message)
+    return send_with_header
+
+
+def _project_module(filename: str) -> Optional[str]:
+    if not filename.startswith(PROJECT_DIR) or "site-packages" in filename:
+        return None
+    return os.path.splitext(os.path.relpath(filename, PROJECT_DIR))[0].replace(os.sep, ".")
+
+
+class MemoryProfiler:
+    """Snapshots de tracemalloc con la memoria agrupada por módulo del proyecto"""
+
+    def __init__(self, directory: str, frames: int = 25):
+        self.directory = directory
+        self.frames = frames
+        self._previous: Optional[Counter] = None
+        self.snapshots = 0
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self) -> bool:
+        """Inicia tracemalloc; retorna False si ya estaba activo"""
+        if tracemalloc.is_tracing():
+            return False
+        tracemalloc.start(self.frames)
+        self._previous = None
+        return True
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self._previous = None
+
+    def snapshot(self, limit: int = 20, save: bool = False) -> Dict[str, Any]:
+        """
+        Toma un snapshot y retorna la memoria por módulo del proyecto, las líneas
+        del proyecto que más retienen, las líneas de todo el proceso que más
+        retienen y la diferencia por línea contra el snapshot anterior.
+        Todo sale de una sola agrupación por traceback (filter_traces y
+        compare_to recorren cada asignación y con tracemalloc activo son
+        varias veces más lentos). Bloqueante: llamarlo en un hilo.
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc no está activo")
+        snapshot = tracemalloc.take_snapshot()
+        modules: Counter = Counter()
+        blocks: Counter = Counter()
+        project_lines: Counter = Counter()
+        lines: Counter = Counter()
+        for stat in snapshot.statistics("traceback"):
+            # El traceback va de la llamada más antigua a la más reciente
+            innermost = stat.traceback[-1]
+            if innermost.filename == tracemalloc.__file__:
+                continue
+            lines[f"{innermost.filename}:{innermost.lineno}"] += stat.size
+            owner = "<otros>"
+            for frame in reversed(stat.traceback):
+                module = _project_module(frame.filename)
+                if module is not None:
+                    owner = module
+                    project_lines[f"{module}:{frame.lineno}"] += stat.size
+                    break
+            modules[owner] += stat.size
+            blocks[owner] += stat.count
+
+        current, peak = tracemalloc.get_traced_memory()
+        result = {
+            "traced_bytes": current,
+            "peak_traced_bytes": peak,
+            "frames": tracemalloc.get_traceback_limit(),
+            "by_module": [
+                {"module": module, "bytes": size, "blocks": blocks[module]}
+                for module, size in modules.most_common(limit)
+            ],
+            "top_project_lines": [{"line": line, "bytes": size} for line, size in project_lines.most_common(limit)],
+            "top_lines": [{"line": line, "bytes": size} for line, size in lines.most_common(limit)],
+            "diff": None,
+            "file": None,
+        }
+        if self._previous is not None:
+            changes = Counter(lines)
+            changes.subtract(self._previous)
+            largest = sorted(changes.items(), key=lambda item: abs(item[1]), reverse=True)[:limit]
+            result["diff"] = [{"line": line, "bytes": lines[line], "bytes_diff": diff}
+                              for line, diff in largest if diff]
+        if save:
+            os.makedirs(self.directory, exist_ok=True)
+            name = time.strftime("%Y%m%d-%H%M%S") + ".tracemalloc"
+            snapshot.dump(os.path.join(self.directory, name))
+            result["file"] = name
+        self._previous = lines
+        self.snapshots += 1
+        return result
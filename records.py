@@ -0,0 +1,260 @@
+"""
+Registros compactos de transacciones para el backend en memoria.
+Cada transacción se guarda como un objeto con __slots__: el estado como código
+entero (índice en TransactionStatus), las fechas como float y los datos anidados
+como tuplas. Los modelos Pydantic se construyen solo al entregar la transacción.
+"""
+
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple, Union
+
+from models import (
+    Transaction, TransactionStatus, TransactionSummary,
+    ClientData, StoreValidation, CreditResult
+)
+
+# Códigos enteros de estado (enteros pequeños: CPython los comparte entre registros)
+STATUS_BY_CODE: Tuple[TransactionStatus, ...] = tuple(TransactionStatus)
+CODE_BY_STATUS: Dict[TransactionStatus, int] = {status: code for code, status in enumerate(STATUS_BY_CODE)}
+
+# Orden de los campos empaquetados en tuplas
+CLIENT_FIELDS = tuple(ClientData.model_fields)
+STORE_FIELDS = tuple(StoreValidation.model_fields)
+CREDIT_FIELDS = tuple(CreditResult.model_fields)
+FEATURE_FIELDS = (
+    "f_know_buyer", "f_buy_freq", "f_avg_purchase", "f_psych_organized",
+    "f_psych_plan", "f_distance", "f_address_verified", "avg_purchase_raw", "distance_raw",
+)
+_CREDIT_KEYS = frozenset(CREDIT_FIELDS)
+_FEATURE_KEYS = frozenset(FEATURE_FIELDS)
+_FEATURES_POS = CREDIT_FIELDS.index("features")
+_CEDULA_POS = STORE_FIELDS.index("cedula_cliente")
+_CATEGORY_POS = CREDIT_FIELDS.index("category")
+
+# Las fechas se guardan como segundos desde esta época naive (sin conversión de zona horaria)
+_EPOCH = datetime(1970, 1, 1)
+
+
+def to_seconds(value: datetime) -> float:
+    return (value - _EPOCH).total_seconds()
+
+
+def from_seconds(value: float) -> datetime:
+    return _EPOCH + timedelta(seconds=value)
+
+
+def status_code(status: Union[TransactionStatus, str]) -> int:
+    return CODE_BY_STATUS[TransactionStatus(status)]
+
+
+def _pack_model(model, fields: Tuple[str, ...]) -> Optional[tuple]:
+    if model is None:
+        return None
+    if isinstance(model, dict):
+        return tuple(model.get(field) for field in fields)
+    return tuple(getattr(model, field) for field in fields)
+
+
+def _pack_credit_result(result) -> Union[tuple, Dict[str, Any], None]:
+    """
+    Empaqueta el resultado crediticio como tupla cuando tiene la forma de CreditResult.
+    Cualquier otra forma se conserva como diccionario.
+    """
+    if result is None:
+        return None
+    if isinstance(result, CreditResult):
+        # Resultado tipado del scoring: se empaqueta desde los atributos, sin model_dump
+        if result.features.keys() != _FEATURE_KEYS:
+            return result.model_dump()
+        packed = [getattr(result, field) for field in CREDIT_FIELDS]
+        packed[_FEATURES_POS] = tuple(result.features[field] for field in FEATURE_FIELDS)
+        return tuple(packed)
+    if result.keys() != _CREDIT_KEYS or result["features"].keys() != _FEATURE_KEYS:
+        return dict(result)
+    packed = [result[field] for field in CREDIT_FIELDS]
+    packed[_FEATURES_POS] = tuple(result["features"][field] for field in FEATURE_FIELDS)
+    return tuple(packed)
+
+
+def _tuple_or_none(value) -> Optional[tuple]:
+    return tuple(value) if value is not None else None
+
+
+def _credit_result_from_json(value):
+    """Restaura la forma empaquetada de un resultado leído desde JSON (listas -> tuplas)"""
+    if isinstance(value, list):
+        value = list(value)
+        value[_FEATURES_POS] = tuple(value[_FEATURES_POS])
+        return tuple(value)
+    return value
+
+
+def _unpack_credit_result(packed) -> Optional[Dict[str, Any]]:
+    if packed is None or isinstance(packed, dict):
+        return packed
+    result = dict(zip(CREDIT_FIELDS, packed))
+    result["features"] = dict(zip(FEATURE_FIELDS, packed[_FEATURES_POS]))
+    return result
+
+
+def _deep_size(value) -> int:
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(_deep_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_deep_size(k) + _deep_size(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+class TransactionRecord:
+    """Representación interna compacta de una transacción"""
+
+    __slots__ = (
+        "seq", "token", "status", "store_id", "tendero_name", "created_at", "expires_at",
+        "client_data", "store_validation", "credit_result", "version",
+    )
+
+    def __init__(self, seq: int, token: str, status: int, created_at: float, expires_at: float):
+        self.seq = seq
+        self.token = token
+        self.status = status
+        self.store_id: Optional[str] = None
+        self.tendero_name: Optional[str] = None
+        self.created_at = created_at
+        self.expires_at = expires_at
+        self.client_data: Optional[tuple] = None
+        self.store_validation: Optional[tuple] = None
+        self.credit_result = None
+        # Versión del contenido (la asigna el backend en cada cambio; no se persiste)
+        self.version = 0
+
+    @classmethod
+    def from_model(cls, transaction: Transaction, seq: int = 0) -> "TransactionRecord":
+        record = cls(
+            seq,
+            transaction.token,
+            status_code(transaction.status),
+            to_seconds(transaction.created_at),
+            to_seconds(transaction.expires_at),
+        )
+        record.store_id = transaction.store_id
+        record.tendero_name = transaction.tendero_name
+        record.client_data = _pack_model(transaction.client_data, CLIENT_FIELDS)
+        record.store_validation = _pack_model(transaction.store_validation, STORE_FIELDS)
+        record.credit_result = _pack_credit_result(transaction.credit_result)
+        return record
+
+    def to_row(self) -> list:
+        """Fila serializable a JSON con el estado completo del registro (journal y snapshots)"""
+        return [getattr(self, slot) for slot in _ROW_SLOTS]
+
+    @classmethod
+    def from_row(cls, row: list) -> "TransactionRecord":
+        record = cls.__new__(cls)
+        (record.seq, record.token, record.status, record.store_id, record.tendero_name,
+         record.created_at, record.expires_at, client_data, store_validation, credit_result) = row
+        record.client_data = _tuple_or_none(client_data)
+        record.store_validation = _tuple_or_none(store_validation)
+        record.credit_result = _credit_result_from_json(credit_result)
+        record.version = 0
+        return record
+
+    def packed_fields(self, names) -> Dict[str, Any]:
+        """Valores internos (empaquetados) de los campos indicados, para el journal"""
+        return {name: getattr(self, name) for name in names if name in _SLOT_NAMES}
+
+    def set_packed_fields(self, fields: Dict[str, Any]) -> None:
+        """Restaura campos empaquetados leídos desde el journal"""
+        for name, value in fields.items():
+            if name in ("client_data", "store_validation"):
+                value = _tuple_or_none(value)
+            elif name == "credit_result":
+                value = _credit_result_from_json(value)
+            setattr(self, name, value)
+
+    def approx_size(self) -> int:
+        """Bytes aproximados del registro y de sus valores (tuplas anidadas incluidas)"""
+        size = sys.getsizeof(self)
+        for slot in self.__slots__:
+            size += _deep_size(getattr(self, slot))
+        return size
+
+    @property
+    def status_enum(self) -> TransactionStatus:
+        return STATUS_BY_CODE[self.status]
+
+    @property
+    def cedula_cliente(self) -> Optional[str]:
+        return self.store_validation[_CEDULA_POS] if self.store_validation is not None else None
+
+    def index_keys(self) -> Tuple[tuple, ...]:
+        """Claves de los índices secundarios en los que aparece este registro"""
+        keys = [("status", self.status)]
+        if self.store_id is not None:
+            keys.append(("store", self.store_id))
+            keys.append(("store_status", self.store_id, self.status))
+        cedula = self.cedula_cliente
+        if cedula is not None:
+            keys.append(("cedula", cedula))
+        return tuple(keys)
+
+    def apply(self, changes: Dict[str, Any]) -> None:
+        """Aplica cambios expresados con los nombres de campo de Transaction"""
+        for key, value in changes.items():
+            if key == "status":
+                self.status = status_code(value)
+            elif key == "client_data":
+                self.client_data = _pack_model(value, CLIENT_FIELDS)
+            elif key == "store_validation":
+                self.store_validation = _pack_model(value, STORE_FIELDS)
+            elif key == "credit_result":
+                self.credit_result = _pack_credit_result(value)
+            elif key in ("created_at", "expires_at"):
+                setattr(self, key, to_seconds(value))
+            elif key in ("store_id", "tendero_name"):
+                setattr(self, key, value)
+
+    def to_model(self) -> Transaction:
+        """
+        Construye el modelo Pydantic para la capa de API.
+        Los datos ya fueron validados al entrar, por eso se usa model_construct.
+        """
+        client_data = None
+        if self.client_data is not None:
+            client_data = ClientData.model_construct(**dict(zip(CLIENT_FIELDS, self.client_data)))
+        store_validation = None
+        if self.store_validation is not None:
+            store_validation = StoreValidation.model_construct(**dict(zip(STORE_FIELDS, self.store_validation)))
+        return Transaction.model_construct(
+            token=self.token,
+            status=STATUS_BY_CODE[self.status],
+            store_id=self.store_id,
+            tendero_name=self.tendero_name,
+            created_at=from_seconds(self.created_at),
+            expires_at=from_seconds(self.expires_at),
+            client_data=client_data,
+            store_validation=store_validation,
+            credit_result=_unpack_credit_result(self.credit_result),
+        )
+
+    def to_summary(self) -> TransactionSummary:
+        """Resumen para los listados paginados (sin reconstruir el modelo completo)"""
+        category = None
+        if isinstance(self.credit_result, tuple):
+            category = self.credit_result[_CATEGORY_POS]
+        elif isinstance(self.credit_result, dict):
+            category = self.credit_result.get("category")
+        return TransactionSummary.model_construct(
+            token=self.token,
+            status=STATUS_BY_CODE[self.status],
+            store_id=self.store_id,
+            tendero_name=self.tendero_name,
+            cedula_cliente=self.cedula_cliente,
+            created_at=from_seconds(self.created_at),
+            expires_at=from_seconds(self.expires_at),
+            category=category,
+        )
+
+
+_ROW_SLOTS = tuple(slot for slot in TransactionRecord.__slots__ if slot != "version")
+_SLOT_NAMES = frozenset(_ROW_SLOTS) - {"seq", "token"}
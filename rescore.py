@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Re-scoring masivo de entradas históricas (POS/WhatsApp) con el modelo Micro v2.
+
+Lee un archivo NDJSON o CSV por chunks de tamaño fijo, calcula el puntaje de cada
+chunk con heuristic_micro_v2_batch (idéntico al cálculo por petición) en un pool
+de procesos y escribe los resultados en orden como stream (NDJSON o CSV, según la
+extensión de salida). La memoria está acotada por chunk_size × chunks en vuelo.
+
+Cada chunk escrito queda registrado en un checkpoint (posición en la entrada y
+tamaño de la salida). Si el proceso se interrumpe, volver a ejecutar el mismo
+comando continúa desde el último chunk completo.
+
+Uso:
+    python rescore.py historico.ndjson resultados.ndjson --config scoring.json
+    python rescore.py historico.csv resultados.csv --chunk-size 50000 --workers 4
+
+Cada fila de salida contiene los campos de entrada más category, score_conf,
+risk_pct, debt_capacity_pct, cupo_estimated, raw_cupo, comp_feature, comp_income,
+clients_per_day, income_proxy_daily y config_version (y las features con --features).
+En CSV se espera un registro por línea (sin saltos de línea dentro de los campos).
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from credit_heuristic import FEATURE_COLUMNS, INPUT_COLUMNS, config_version, get_default_config
+from scoring_config import merge_config
+
+try:
+    import orjson  # opcional: acelera la lectura y escritura de NDJSON
+except ImportError:
+    orjson = None
+
+RESULT_COLUMNS = (
+    "category", "score_conf", "risk_pct", "debt_capacity_pct", "cupo_estimated", "raw_cupo",
+    "comp_feature", "comp_income", "clients_per_day", "income_proxy_daily",
+)
+_TRUE_VALUES = frozenset(("true", "1", "t", "yes", "si", "sí", "y"))
+
+if orjson is not None:
+    _loads = orjson.loads
+
+    def _dumps(record: Dict[str, Any]) -> bytes:
+        return orjson.dumps(record)
+else:
+    _loads = json.loads
+
+    def _dumps(record: Dict[str, Any]) -> bytes:
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _file_format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+# --- Trabajo de cada chunk (se ejecuta en los procesos del pool) ----------------
+
+_worker_conf: Optional[Dict[str, Any]] = None
+
+
+def _init_worker(conf: Dict[str, Any]) -> None:
+    global _worker_conf
+    _worker_conf = conf
+
+
+def _parse_rows(lines: List[bytes], input_format: str, header: List[str]) -> Tuple[List[Dict[str, Any]], int]:
+    """Filas del chunk como diccionarios y número de líneas inválidas"""
+    rows, invalid = [], 0
+    if input_format == "csv":
+        text = [line.decode("utf-8") for line in lines]
+        for values in csv.reader(text):
+            if not values:
+                continue
+            if len(values) != len(header):
+                invalid += 1
+                continue
+            row = dict(zip(header, values))
+            if "address_verified" in row:
+                row["address_verified"] = row["address_verified"].strip().lower() in _TRUE_VALUES
+            rows.append(row)
+        return rows, invalid
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = _loads(line)
+        except ValueError:
+            invalid += 1
+            continue
+        if not isinstance(row, dict):
+            invalid += 1
+            continue
+        rows.append(row)
+    return rows, invalid
+
+
+def score_chunk(lines: List[bytes], input_format: str, header: List[str], output_format: str,
+                output_fields: List[str], include_features: bool, version: str) -> Tuple[bytes, int, int]:
+    """
+    Puntúa un chunk de líneas crudas.
+    Retorna los bytes a escribir, las filas puntuadas y las líneas inválidas.
+    """
+    from credit_heuristic import heuristic_micro_v2_batch
+
+    rows, invalid = _parse_rows(lines, input_format, header)
+    if not rows:
+        return b"", 0, invalid
+    columns = {name: [row.get(name) for row in rows] for name in INPUT_COLUMNS}
+    scored = heuristic_micro_v2_batch(columns, _worker_conf)
+    result_columns = RESULT_COLUMNS + (FEATURE_COLUMNS if include_features else ())
+    results = scored[list(result_columns)].to_dict("records")
+
+    if output_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=output_fields, extrasaction="ignore", lineterminator="\n")
+        for row, result in zip(rows, results):
+            row.update(result)
+            row["config_version"] = version
+            writer.writerow(row)
+        return buffer.getvalue().encode("utf-8"), len(rows), invalid
+
+    out = []
+    for row, result in zip(rows, results):
+        row.update(result)
+        row["config_version"] = version
+        out.append(_dumps(row))
+    out.append(b"")
+    return b"\n".join(out), len(rows), invalid
+
+
+# --- Checkpoint -------------------------------------------------------------------
+
+class Checkpoint:
+    """Progreso persistido: posición en la entrada y tamaño de la salida tras el último chunk"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self, state: Dict[str, Any]) -> None:
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+# --- Orquestación -----------------------------------------------------------------
+
+def _read_chunk(f, chunk_size: int) -> List[bytes]:
+    lines = []
+    for _ in range(chunk_size):
+        line = f.readline()
+        if not line:
+            break
+        lines.append(line)
+    return lines
+
+
+class _InlineExecutor:
+    """Ejecuta los chunks en el proceso actual (--workers 0)"""
+
+    def __init__(self, conf: Dict[str, Any]):
+        _init_worker(conf)
+
+    def submit(self, fn, *args) -> Future:
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        pass
+
+
+def rescore(input_path: str, output_path: str, conf: Optional[Dict[str, Any]] = None,
+            chunk_size: int = 50_000, workers: Optional[int] = None,
+            checkpoint_path: Optional[str] = None, include_features: bool = False,
+            max_chunks: Optional[int] = None, restart: bool = False,
+            progress_seconds: float = 5.0) -> Dict[str, Any]:
+    """
+    Re-puntúa input_path y escribe output_path en streaming.
+
+    Args:
+        input_path: Archivo NDJSON o CSV con las entradas del modelo
+        output_path: Archivo de salida (.csv o NDJSON)
+        conf: Configuración del modelo (por defecto DEFAULTS_MICRO_V2)
+        chunk_size: Líneas por chunk
+        workers: Procesos del pool (por defecto todos los núcleos; 0 = sin pool)
+        checkpoint_path: Archivo de checkpoint (por defecto output_path + ".checkpoint")
+        include_features: Incluir las features normalizadas en la salida
+        max_chunks: Procesar como máximo este número de chunks en esta ejecución
+        restart: Ignorar un checkpoint existente y empezar desde cero
+        progress_seconds: Intervalo de los reportes de progreso (0 = sin reportes)
+
+    Returns:
+        Resumen con filas procesadas, inválidas, segundos y filas por segundo
+    """
+    conf = conf if conf is not None else get_default_config()
+    version = config_version(conf)
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    input_format, output_format = _file_format(input_path), _file_format(output_path)
+    checkpoint = Checkpoint(checkpoint_path or output_path + ".checkpoint")
+    input_size = os.path.getsize(input_path)
+
+    state = None if restart else checkpoint.load()
+    if state is not None:
+        if state["input_path"] != os.path.abspath(input_path) or state["input_size"] != input_size:
+            raise ValueError("el checkpoint corresponde a otro archivo de entrada (usar --restart)")
+        if state["config_version"] != version:
+            raise ValueError("el checkpoint usa otra configuración del modelo (usar --restart)")
+        if state.get("done"):
+            return {**state["summary"], "resumed": True}
+    else:
+        state = {
+            "input_path": os.path.abspath(input_path),
+            "input_size": input_size,
+            "config_version": version,
+            "input_offset": None,
+            "output_size": 0,
+            "chunks": 0,
+            "rows": 0,
+            "invalid": 0,
+            "done": False,
+        }
+    resumed = state["input_offset"] is not None
+    if resumed and not os.path.exists(output_path):
+        raise ValueError("el checkpoint existe pero falta el archivo de salida (usar --restart)")
+
+    infile = open(input_path, "rb")
+    header: List[str] = []
+    if input_format == "csv":
+        header = next(csv.reader([infile.readline().decode("utf-8-sig")]), [])
+    if resumed:
+        infile.seek(state["input_offset"])
+
+    output_fields = list(header) + [name for name in RESULT_COLUMNS if name not in header]
+    if include_features:
+        output_fields += [name for name in FEATURE_COLUMNS if name not in output_fields]
+    output_fields.append("config_version")
+
+    # Al reanudar se descarta lo escrito después del último chunk registrado
+    outfile = open(output_path, "r+b" if resumed else "wb")
+    outfile.truncate(state["output_size"])
+    outfile.seek(state["output_size"])
+    if output_format == "csv" and state["output_size"] == 0:
+        outfile.write((",".join(output_fields) + "\n").encode("utf-8"))
+
+    executor = (
+        _InlineExecutor(conf) if workers == 0
+        else ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(conf,))
+    )
+    max_in_flight = max(2, 2 * workers)
+    in_flight: deque = deque()
+    started = time.perf_counter()
+    rows_this_run = 0
+    last_report = started
+    submitted = 0
+
+    def write_next() -> None:
+        nonlocal rows_this_run, last_report
+        end_offset, future = in_flight.popleft()
+        data, rows, invalid = future.result()
+        outfile.write(data)
+        outfile.flush()
+        os.fsync(outfile.fileno())
+        state.update(
+            input_offset=end_offset, output_size=outfile.tell(), chunks=state["chunks"] + 1,
+            rows=state["rows"] + rows, invalid=state["invalid"] + invalid,
+        )
+        checkpoint.save(state)
+        rows_this_run += rows
+        now = time.perf_counter()
+        if progress_seconds and now - last_report >= progress_seconds:
+            last_report = now
+            percent = 100.0 * end_offset / input_size if input_size else 100.0
+            print(f"⏳ {state['rows']:,} filas ({percent:.1f}%) · {rows_this_run / (now - started):,.0f} filas/s",
+                  file=sys.stderr)
+
+    try:
+        finished = False
+        while max_chunks is None or submitted < max_chunks:
+            lines = _read_chunk(infile, chunk_size)
+            if not lines:
+                finished = True
+                break
+            future = executor.submit(score_chunk, lines, input_format, header, output_format,
+                                     output_fields, include_features, version)
+            in_flight.append((infile.tell(), future))
+            submitted += 1
+            if len(in_flight) >= max_in_flight:
+                write_next()
+        while in_flight:
+            write_next()
+        if not finished and not infile.read(1):
+            finished = True
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        infile.close()
+        outfile.close()
+
+    seconds = time.perf_counter() - started
+    summary = {
+        "rows": state["rows"],
+        "invalid": state["invalid"],
+        "chunks": state["chunks"],
+        "rows_this_run": rows_this_run,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows_this_run / seconds, 1) if seconds > 0 else 0.0,
+        "config_version": version,
+        "resumed": resumed,
+        "done": finished,
+    }
+    if finished:
+        state.update(done=True, summary=summary)
+        checkpoint.save(state)
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="archivo de entrada (.ndjson o .csv)")
+    parser.add_argument("output", help="archivo de salida (.ndjson o .csv)")
+    parser.add_argument("--config", help="JSON con valores que reemplazan a DEFAULTS_MICRO_V2")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="líneas por chunk")
+    parser.add_argument("--workers", type=int, default=None, help="procesos (por defecto todos los núcleos; 0 = sin pool)")
+    parser.add_argument("--checkpoint", help="archivo de checkpoint (por defecto <salida>.checkpoint)")
+    parser.add_argument("--features", action="store_true", help="incluir las features normalizadas")
+    parser.add_argument("--max-chunks", type=int, default=None, help="procesar como máximo N chunks en esta ejecución")
+    parser.add_argument("--restart", action="store_true", help="ignorar el checkpoint y empezar desde cero")
+    args = parser.parse_args(argv)
+
+    conf = None
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as f:
+            conf = merge_config(json.load(f))
+
+    try:
+        summary = rescore(
+            args.input, args.output, conf=conf, chunk_size=args.chunk_size, workers=args.workers,
+            checkpoint_path=args.checkpoint, include_features=args.features,
+            max_chunks=args.max_chunks, restart=args.restart,
+        )
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    state = "completado" if summary["done"] else "pausado (volver a ejecutar para continuar)"
+    print(f"✅ Re-scoring {state}: {summary['rows']:,} filas, {summary['invalid']:,} inválidas, "
+          f"{summary['rows_per_second']:,.0f} filas/s, configuración {summary['config_version']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Configuración activa del modelo de scoring con recarga en caliente.
+El archivo (JSON) contiene solo los valores que cambian respecto a
+DEFAULTS_MICRO_V2; "weights" se combina clave a clave. Cada cambio del archivo
+produce un CompiledScorer nuevo sin reiniciar la API. Si el archivo nuevo es
+inválido se conserva el scorer anterior y se reporta el error.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from credit_heuristic import DEFAULTS_MICRO_V2, CompiledScorer, compile_config, get_default_config
+from structured_logging import get_logger
+
+log = get_logger("scoring")
+
+
+def merge_config(overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """Configuración completa: valores por defecto + valores del archivo"""
+    if not isinstance(overrides, dict):
+        raise ValueError("la configuración debe ser un objeto JSON")
+    unknown = set(overrides) - set(DEFAULTS_MICRO_V2)
+    if unknown:
+        raise ValueError(f"claves desconocidas: {', '.join(sorted(unknown))}")
+    conf = get_default_config()
+    for key, value in overrides.items():
+        if key == "weights":
+            conf["weights"].update(value)
+        else:
+            conf[key] = value
+    return conf
+
+
+class ScoringConfigSource:
+    """Entrega el CompiledScorer activo y revisa el archivo como máximo cada check_interval_seconds"""
+
+    def __init__(self, path: str = "", check_interval_seconds: float = 2.0):
+        self.path = path
+        self.check_interval = check_interval_seconds
+        self._lock = threading.Lock()
+        self._scorer: CompiledScorer = compile_config(DEFAULTS_MICRO_V2)
+        self._file_state: Optional[Tuple[int, int]] = None
+        self._next_check = 0.0
+        self.stats: Dict[str, Any] = {
+            "reloads_total": 0,
+            "reload_errors_total": 0,
+            "last_error": None,
+            "loaded_at": None,
+        }
+        if path:
+            self.reload()
+
+    def current(self) -> CompiledScorer:
+        """Scorer activo (revisa el archivo si ya pasó el intervalo)"""
+        if self.path and time.monotonic() >= self._next_check:
+            self.reload()
+        return self._scorer
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Carga el archivo si cambió (o siempre, con force).
+        Retorna True si cambió la versión activa.
+        """
+        if not self.path:
+            return False
+        with self._lock:
+            self._next_check = time.monotonic() + self.check_interval
+            try:
+                stat = os.stat(self.path)
+            except OSError as e:
+                return self._fail(f"no se pudo leer {self.path}: {e}")
+            state = (stat.st_mtime_ns, stat.st_size)
+            if state == self._file_state and not force:
+                return False
+            self._file_state = state
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    scorer = compile_config(merge_config(json.load(f)))
+            except (ValueError, KeyError, TypeError, OSError) as e:
+                return self._fail(f"configuración inválida en {self.path}: {e}")
+
+            changed = scorer.version != self._scorer.version
+            self._scorer = scorer
+            self.stats["last_error"] = None
+            self.stats["loaded_at"] = time.time()
+            if changed:
+                self.stats["reloads_total"] += 1
+                log.info("scoring_config_loaded", version=scorer.version, path=self.path)
+            return changed
+
+    def _fail(self, message: str) -> bool:
+        self.stats["reload_errors_total"] += 1
+        if message != self.stats["last_error"]:
+            log.error("scoring_config_reload_error", error=message, path=self.path)
+        self.stats["last_error"] = message
+        return False
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"version": self._scorer.version, "path": self.path or None, **self.stats}
@@ -0,0 +1,191 @@
+"""
+Ejecutor de scoring con micro-batching.
+Los registros enviados con submit (calculate_credit_score_batched, que los
+cierres de crédito esperan en el event loop sin ocupar un hilo) se acumulan
+durante una ventana corta de tiempo o hasta un tamaño máximo de lote, se puntúan juntas con heuristic_micro_v2_batch en un pool de
+hilos o de procesos y cada llamador recibe su resultado por un Future.
+
+El resultado de cada registro es idéntico al de CompiledScorer.score: el cálculo
+por lotes reproduce bit a bit la versión escalar. Los lotes pequeños se puntúan
+registro a registro con el scorer compilado (unos µs por registro); desde
+VECTORIZE_MIN_ROWS registros conviene el cálculo vectorizado, cuyo costo fijo
+por lote (arreglos y DataFrame) es de algunos milisegundos.
+"""
+
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from credit_heuristic import FEATURE_COLUMNS, INPUT_COLUMNS, CompiledScorer, compile_config
+
+RESULT_KEYS = (
+    "category", "score_conf", "risk_pct", "debt_capacity_pct", "cupo_estimated", "raw_cupo",
+    "comp_feature", "comp_income", "clients_per_day", "income_proxy_daily",
+)
+VECTORIZE_MIN_ROWS = 256
+
+
+def score_rows(conf: Union[CompiledScorer, Dict[str, Any]], rows: List[Dict[str, Any]],
+               lut: bool = True) -> List[Dict[str, Any]]:
+    """
+    Puntúa un lote de entradas con un scorer compilado o una configuración (pool de procesos).
+    Retorna un diccionario por registro con la misma forma que heuristic_micro_v2.
+    """
+    if len(rows) < VECTORIZE_MIN_ROWS:
+        scorer = conf if isinstance(conf, CompiledScorer) else compile_config(conf)
+        score = scorer.score_lut if lut else scorer.score
+        return [score(row) for row in rows]
+    if isinstance(conf, CompiledScorer):
+        conf = conf.config
+
+    from credit_heuristic import heuristic_micro_v2_batch
+
+    columns = {name: [row.get(name) for row in rows] for name in INPUT_COLUMNS}
+    scored = heuristic_micro_v2_batch(columns, conf)
+    values = {name: scored[name].tolist() for name in RESULT_KEYS + FEATURE_COLUMNS}
+    results = []
+    for i in range(len(rows)):
+        result = {name: values[name][i] for name in RESULT_KEYS}
+        features = {name: values[name][i] for name in FEATURE_COLUMNS}
+        # El cálculo escalar deja distance_raw en None cuando no hay distancia
+        if isinstance(features["distance_raw"], float) and math.isnan(features["distance_raw"]):
+            features["distance_raw"] = None
+        result["features"] = features
+        results.append(result)
+    return results
+
+
+class ScoringExecutor:
+    """Agrupa llamadas concurrentes de scoring en lotes y las resuelve en un pool"""
+
+    def __init__(self, window_ms: float = 2.0, max_batch: int = 64, pool: str = "thread", workers: int = 1,
+                 lut: bool = True):
+        if pool not in ("thread", "process"):
+            raise ValueError(f"Pool de scoring desconocido: {pool}")
+        self.window = window_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self.pool = pool
+        self.workers = max(1, workers)
+        self.lut = lut
+        self._pending: "queue.Queue[Optional[Tuple[CompiledScorer, Dict[str, Any], Future]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[Executor] = None
+        self.stats = {
+            "batches_total": 0,
+            "rows_total": 0,
+            "max_batch_size": 0,
+            "errors_total": 0,
+        }
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            if self.pool == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scoring")
+            self._thread = threading.Thread(target=self._collect, name="scoring-batcher", daemon=True)
+            self._thread.start()
+
+    def submit(self, scorer: CompiledScorer, row: Dict[str, Any]) -> Future:
+        """
+        Encola un registro para el próximo lote. Los llamadores async pueden
+        esperar el Future con asyncio.wrap_future.
+        """
+        self._ensure_started()
+        future: Future = Future()
+        self._pending.put((scorer, row, future))
+        return future
+
+    def score(self, scorer: CompiledScorer, row: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Puntúa un registro esperando a que su lote termine. Bloquea al hilo
+        llamador durante la ventana: solo para llamadores en hilos
+        """
+        return self.submit(scorer, row).result()
+
+    def _collect(self) -> None:
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            stop = False
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._pending.get(timeout=remaining) if remaining > 0 else self._pending.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._dispatch(batch)
+            if stop:
+                return
+
+    def _dispatch(self, batch: List[Tuple[CompiledScorer, Dict[str, Any], Future]]) -> None:
+        """Envía el lote al pool; con una recarga de configuración en medio se separa por versión"""
+        self.stats["batches_total"] += 1
+        self.stats["rows_total"] += len(batch)
+        self.stats["max_batch_size"] = max(self.stats["max_batch_size"], len(batch))
+        groups: Dict[str, List[Tuple[CompiledScorer, Dict[str, Any], Future]]] = {}
+        for item in batch:
+            groups.setdefault(item[0].version, []).append(item)
+        for items in groups.values():
+            futures = [future for _, _, future in items]
+            scorer = items[0][0]
+            try:
+                # Los procesos reciben la configuración; los hilos comparten el scorer compilado
+                pool_future = self._executor.submit(
+                    score_rows, scorer.config if self.pool == "process" else scorer,
+                    [row for _, row, _ in items], self.lut
+                )
+            except Exception as e:
+                self._fail(futures, e)
+                continue
+            pool_future.add_done_callback(lambda done, futures=futures: self._resolve(done, futures))
+
+    def _resolve(self, done: Future, futures: List[Future]) -> None:
+        try:
+            results = done.result()
+        except Exception as e:
+            self._fail(futures, e)
+            return
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+    def _fail(self, futures: List[Future], error: BaseException) -> None:
+        self.stats["errors_total"] += 1
+        for future in futures:
+            future.set_exception(error)
+
+    def close(self) -> None:
+        """Procesa lo pendiente y detiene el hilo colector y el pool"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._pending.put(None)
+        thread.join()
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        batches = self.stats["batches_total"]
+        return {
+            **self.stats,
+            "avg_batch_size": round(self.stats["rows_total"] / batches, 2) if batches else 0.0,
+            "pending": self._pending.qsize(),
+            "window_ms": self.window * 1000.0,
+            "max_batch": self.max_batch,
+            "pool": self.pool,
+            "workers": self.workers,
+        }
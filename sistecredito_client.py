@@ -0,0 +1,432 @@
+"""
+Cliente asíncrono de la API de Sistecrédito.
+- Pool de conexiones HTTP/1.1 persistentes (keep-alive) sobre asyncio, con h11
+  (dependencia de uvicorn) para el protocolo.
+- Timeout por intento y reintentos con backoff exponencial con jitter completo
+  para timeouts, errores de conexión, 429 y 5xx. Cada registro lleva su
+  referencia (token) como Idempotency-Key, así que reintentar es seguro.
+- Circuit breaker: tras varias llamadas fallidas seguidas deja de llamar
+  durante un tiempo (CircuitOpenError inmediato) y luego deja pasar una sola
+  llamada de prueba antes de cerrarse.
+- Batching opcional: con batch_max_size > 1 los registros concurrentes se
+  agrupan en una sola petición a /credits/batch si el upstream lo soporta.
+
+Uso:
+    client = SistecreditoClient("https://api.sistecredito.com", api_key="...")
+    response = await client.register({"reference": token, ...})
+    await client.close()
+"""
+
+import asyncio
+import json
+import random
+import ssl
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import h11
+
+from structured_logging import get_logger
+
+log = get_logger("sistecredito")
+
+
+class SistecreditoError(Exception):
+    """La llamada a Sistecrédito falló (después de los reintentos)"""
+
+
+class UpstreamError(SistecreditoError):
+    """Sistecrédito respondió con un código de error"""
+
+    def __init__(self, status_code: int, body: bytes = b""):
+        super().__init__(f"Sistecrédito respondió {status_code}: {body[:200].decode('utf-8', 'replace')}")
+        self.status_code = status_code
+
+    @property
+    def retryable(self) -> bool:
+        return self.status_code == 429 or self.status_code >= 500
+
+
+class CircuitOpenError(SistecreditoError):
+    """El circuit breaker está abierto: no se llama al upstream"""
+
+
+def _percentile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class CircuitBreaker:
+    """Breaker de tres estados: closed → open (tras N fallas seguidas) → half_open (una prueba) → closed"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    # Permisos que retorna allow(): una llamada normal o la prueba de half_open
+    CALL = "call"
+    PROBE = "probe"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.opened_total = 0
+        self._probe_in_flight = False
+
+    def allow(self, now: Optional[float] = None) -> Optional[str]:
+        """None si se rechaza la llamada; si no, CALL o PROBE (la llamada tomó la prueba de half_open)"""
+        if self.failure_threshold <= 0 or self.state == self.CLOSED:
+            return self.CALL
+        now = time.monotonic() if now is None else now
+        if self.state == self.OPEN:
+            if now - self.opened_at < self.reset_timeout_seconds:
+                return None
+            self.state = self.HALF_OPEN
+        if self._probe_in_flight:
+            return None
+        self._probe_in_flight = True
+        return self.PROBE
+
+    def release_probe(self) -> None:
+        """
+        Libera la prueba de half_open cuando la llamada que la tomó (allow() == PROBE)
+        terminó sin registrar resultado (cancelada o error inesperado)
+        """
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self, now: Optional[float] = None) -> None:
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.failure_threshold <= 0:
+            return
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.opened_total += 1
+                log.warning("sistecredito_circuit_open", consecutive_failures=self.consecutive_failures)
+            self.state = self.OPEN
+            self.opened_at = time.monotonic() if now is None else now
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "opened_total": self.opened_total,
+        }
+
+
+class _Connection:
+    """Conexión HTTP/1.1 reutilizable"""
+
+    __slots__ = ("reader", "writer", "http", "requests", "responded")
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.http = h11.Connection(our_role=h11.CLIENT)
+        self.requests = 0
+        self.responded = False
+
+    @property
+    def reusable(self) -> bool:
+        return self.http.our_state is h11.IDLE and not self.writer.is_closing() and not self.reader.at_eof()
+
+    async def request(self, method: str, target: str, headers: List[Tuple[str, str]],
+                      body: bytes) -> Tuple[int, bytes]:
+        self.requests += 1
+        self.responded = False
+        self.writer.write(
+            self.http.send(h11.Request(method=method, target=target, headers=headers))
+            + self.http.send(h11.Data(data=body))
+            + self.http.send(h11.EndOfMessage())
+        )
+        await self.writer.drain()
+
+        status_code = 0
+        chunks = []
+        while True:
+            event = self.http.next_event()
+            if event is h11.NEED_DATA:
+                self.http.receive_data(await self.reader.read(65536))
+            elif isinstance(event, h11.Response):
+                self.responded = True
+                status_code = event.status_code
+            elif isinstance(event, h11.Data):
+                chunks.append(bytes(event.data))
+            elif isinstance(event, h11.EndOfMessage):
+                break
+            elif isinstance(event, h11.ConnectionClosed):
+                raise ConnectionResetError("Sistecrédito cerró la conexión")
+        if self.http.our_state is h11.DONE and self.http.their_state is h11.DONE:
+            self.http.start_next_cycle()
+        return status_code, b"".join(chunks)
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class ConnectionPool:
+    """Conexiones persistentes a un host, hasta max_connections simultáneas"""
+
+    def __init__(self, host: str, port: int, use_tls: bool, max_connections: int = 10,
+                 connect_timeout_seconds: float = 1.0):
+        self.host = host
+        self.port = port
+        self.ssl = ssl.create_default_context() if use_tls else None
+        self.max_connections = max_connections
+        self.connect_timeout_seconds = connect_timeout_seconds
+        self._idle: Deque[_Connection] = deque()
+        self._slots = asyncio.Semaphore(max_connections)
+        self.opened_total = 0
+        self.reused_total = 0
+
+    async def acquire(self) -> Tuple[_Connection, bool]:
+        """Conexión libre (reutilizada si hay una ociosa) y si fue reutilizada"""
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                connection = self._idle.pop()
+                if connection.reusable:
+                    self.reused_total += 1
+                    return connection, True
+                connection.close()
+            return await self.connect(), False
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def connect(self) -> _Connection:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=self.ssl,
+                                    server_hostname=self.host if self.ssl else None),
+            self.connect_timeout_seconds
+        )
+        self.opened_total += 1
+        return _Connection(reader, writer)
+
+    def release(self, connection: _Connection, reuse: bool) -> None:
+        if reuse and connection.reusable:
+            self._idle.append(connection)
+        else:
+            connection.close()
+        self._slots.release()
+
+    def close(self) -> None:
+        while self._idle:
+            self._idle.pop().close()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "max_connections": self.max_connections,
+            "idle": len(self._idle),
+            "opened_total": self.opened_total,
+            "reused_total": self.reused_total,
+        }
+
+
+class SistecreditoClient:
+    """Cliente de registro de créditos con pool, reintentos, circuit breaker y batching"""
+
+    def __init__(self, base_url: str, api_key: str = "", max_connections: int = 10,
+                 timeout_seconds: float = 2.0, connect_timeout_seconds: float = 1.0,
+                 max_retries: int = 2, backoff_base_seconds: float = 0.05, backoff_max_seconds: float = 1.0,
+                 breaker_threshold: int = 5, breaker_reset_seconds: float = 30.0,
+                 batch_max_size: int = 1, batch_window_ms: float = 5.0, latency_window: int = 1024):
+        url = urlsplit(base_url)
+        if url.scheme not in ("http", "https") or not url.hostname:
+            raise ValueError(f"URL de Sistecrédito inválida: {base_url}")
+        self.base_url = base_url
+        self._base_path = url.path.rstrip("/")
+        self._host_header = url.netloc
+        self.pool = ConnectionPool(url.hostname, url.port or (443 if url.scheme == "https" else 80),
+                                   url.scheme == "https", max_connections, connect_timeout_seconds)
+        self.api_key = api_key
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_reset_seconds)
+        self.batch_max_size = batch_max_size
+        self.batch_window_seconds = batch_window_ms / 1000.0
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batches = set()
+        self._latency_ms: Deque[float] = deque(maxlen=latency_window)
+        self.stats = {
+            "calls_total": 0,
+            "registrations_total": 0,
+            "batches_total": 0,
+            "attempts_total": 0,
+            "retries_total": 0,
+            "failures_total": 0,
+            "rejected_open_total": 0,
+        }
+
+    async def register(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Registra un crédito. payload["reference"] (el token de la transacción)
+        identifica el registro ante el upstream.
+        """
+        if self.batch_max_size <= 1:
+            self.stats["registrations_total"] += 1
+            return await self._call("/credits", payload, payload["reference"])
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((payload, future))
+        if len(self._pending) >= self.batch_max_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window_seconds, self._flush)
+        return await future
+
+    async def register_many(self, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Registra varios créditos en una sola petición a /credits/batch"""
+        self.stats["registrations_total"] += len(payloads)
+        self.stats["batches_total"] += 1
+        response = await self._call("/credits/batch", {"items": payloads},
+                                    "batch:" + ",".join(payload["reference"] for payload in payloads))
+        results = response.get("results")
+        if not isinstance(results, list) or len(results) != len(payloads):
+            raise SistecreditoError("Respuesta de lote inválida de Sistecrédito")
+        return results
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._send_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _send_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        try:
+            if len(batch) == 1:
+                self.stats["registrations_total"] += 1
+                results = [await self._call("/credits", batch[0][0], batch[0][0]["reference"])]
+            else:
+                results = await self.register_many([payload for payload, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _backoff(self, attempt: int) -> float:
+        """Backoff exponencial con jitter completo: uniforme entre 0 y base * 2^intento"""
+        return random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt))
+
+    async def _call(self, path: str, payload: Dict[str, Any], idempotency_key: str) -> Dict[str, Any]:
+        permit = self.breaker.allow()
+        if permit is None:
+            self.stats["rejected_open_total"] += 1
+            raise CircuitOpenError("Circuit breaker de Sistecrédito abierto")
+        self.stats["calls_total"] += 1
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        headers = [
+            ("Host", self._host_header),
+            ("Content-Type", "application/json"),
+            ("Content-Length", str(len(body))),
+            ("Idempotency-Key", idempotency_key),
+        ]
+        if self.api_key:
+            headers.append(("Authorization", f"Bearer {self.api_key}"))
+
+        started = time.perf_counter()
+        attempt = 0
+        settled = False
+        try:
+            while True:
+                self.stats["attempts_total"] += 1
+                try:
+                    status_code, response = await asyncio.wait_for(
+                        self._send(self._base_path + path, headers, body), self.timeout_seconds
+                    )
+                    if status_code < 400:
+                        settled = True
+                        self.breaker.record_success()
+                        self._latency_ms.append((time.perf_counter() - started) * 1000.0)
+                        return json.loads(response) if response else {}
+                    error: Exception = UpstreamError(status_code, response)
+                    retryable = error.retryable
+                except asyncio.TimeoutError:
+                    error, retryable = SistecreditoError(f"Timeout de {self.timeout_seconds}s en {path}"), True
+                except (OSError, h11.ProtocolError) as e:
+                    error, retryable = SistecreditoError(f"Error de conexión en {path}: {e}"), True
+
+                if not retryable:
+                    # 4xx: la petición es inválida, el upstream está sano
+                    settled = True
+                    self.breaker.record_success()
+                    self.stats["failures_total"] += 1
+                    raise error
+                if attempt >= self.max_retries:
+                    settled = True
+                    self.breaker.record_failure()
+                    self.stats["failures_total"] += 1
+                    self._latency_ms.append((time.perf_counter() - started) * 1000.0)
+                    raise error
+                attempt += 1
+                self.stats["retries_total"] += 1
+                log.debug("sistecredito_retry", path=path, attempt=attempt, error=str(error))
+                await asyncio.sleep(self._backoff(attempt))
+        finally:
+            # Si la prueba de half_open se canceló (CancelledError) o falló de forma
+            # inesperada sin registrar resultado, no puede quedar tomada. Las llamadas
+            # admitidas con el breaker cerrado no la tocan: otra llamada puede tenerla
+            if permit == CircuitBreaker.PROBE and not settled:
+                self.breaker.release_probe()
+
+    async def _send(self, target: str, headers: List[Tuple[str, str]], body: bytes) -> Tuple[int, bytes]:
+        connection, reused = await self.pool.acquire()
+        ok = False
+        try:
+            try:
+                result = await connection.request("POST", target, headers, body)
+            except (OSError, h11.ProtocolError):
+                if not reused or connection.responded:
+                    raise
+                # Conexión ociosa que el servidor cerró antes de responder: se repite una vez en una nueva
+                connection.close()
+                connection = await self.pool.connect()
+                result = await connection.request("POST", target, headers, body)
+            ok = True
+            return result
+        finally:
+            self.pool.release(connection, reuse=ok)
+
+    async def close(self) -> None:
+        """Envía los registros pendientes del lote y cierra las conexiones"""
+        if self._pending:
+            self._flush()
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+        self.pool.close()
+
+    def as_dict(self) -> Dict[str, Any]:
+        latency = sorted(self._latency_ms)
+        return {
+            **self.stats,
+            "breaker": self.breaker.as_dict(),
+            "pool": self.pool.as_dict(),
+            "batch_max_size": self.batch_max_size,
+            "latency_ms": {
+                "p50": round(_percentile(latency, 0.5), 3),
+                "p95": round(_percentile(latency, 0.95), 3),
+                "p99": round(_percentile(latency, 0.99), 3),
+            },
+        }
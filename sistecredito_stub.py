@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Servidor local que simula la API de Sistecrédito para probar el cliente sin red.
+Permite inyectar latencia (con jitter), errores 503 y peticiones colgadas que
+superan el timeout del cliente; los parámetros se pueden cambiar en caliente
+con POST /stub/settings.
+
+Endpoints:
+    POST /credits          registro individual
+    POST /credits/batch    {"items": [...]} → {"results": [...]}
+    GET  /stub/stats       contadores
+    POST /stub/settings    {"latency_ms": 50, "failure_rate": 0.1, ...}
+
+Uso: python sistecredito_stub.py [--port 9100] [--latency-ms 20] [--jitter-ms 10] [--failure-rate 0.05] [--hang-rate 0]
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Header, HTTPException, status
+
+
+class StubSettings:
+    """Comportamiento inyectado del upstream simulado"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, failure_rate: float = 0.0,
+                 hang_rate: float = 0.0, hang_seconds: float = 30.0, batch_enabled: bool = True,
+                 seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.batch_enabled = batch_enabled
+        self.random = random.Random(seed)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {key: value for key, value in vars(self).items() if key != "random"}
+
+
+def create_app(settings: Optional[StubSettings] = None) -> FastAPI:
+    settings = settings or StubSettings()
+    stats = {"requests": 0, "registrations": 0, "batches": 0, "failures": 0, "hangs": 0, "duplicates": 0}
+    registered: Dict[str, str] = {}
+    app = FastAPI(title="Sistecrédito (stub)")
+
+    async def upstream_behaviour() -> None:
+        stats["requests"] += 1
+        roll = settings.random.random()
+        if roll < settings.hang_rate:
+            stats["hangs"] += 1
+            await asyncio.sleep(settings.hang_seconds)
+        delay = settings.latency_ms + settings.random.uniform(0, settings.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000.0)
+        if settings.random.random() < settings.failure_rate:
+            stats["failures"] += 1
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Falla inyectada")
+
+    def register(item: Dict[str, Any]) -> Dict[str, Any]:
+        reference = str(item.get("reference", ""))
+        if reference in registered:
+            stats["duplicates"] += 1
+        else:
+            stats["registrations"] += 1
+            registered[reference] = f"SIS-{reference[:8].upper()}-{len(registered) + 1}"
+        return {"transaction_id": registered[reference], "reference": reference, "status": "registered"}
+
+    @app.post("/credits")
+    async def register_credit(item: Dict[str, Any], idempotency_key: Optional[str] = Header(None)):
+        await upstream_behaviour()
+        return register(item)
+
+    @app.post("/credits/batch")
+    async def register_batch(body: Dict[str, Any]):
+        if not settings.batch_enabled:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch no soportado")
+        await upstream_behaviour()
+        stats["batches"] += 1
+        return {"results": [register(item) for item in body.get("items", [])]}
+
+    @app.get("/stub/stats")
+    async def stub_stats():
+        return {**stats, "settings": settings.as_dict()}
+
+    @app.post("/stub/settings")
+    async def update_settings(changes: Dict[str, Any]):
+        for key, value in changes.items():
+            if key in settings.as_dict():
+                setattr(settings, key, value)
+        return settings.as_dict()
+
+    app.state.settings = settings
+    app.state.stats = stats
+    return app
+
+
+def start_in_thread(app: FastAPI, port: int = 0) -> Tuple[str, Any]:
+    """
+    Arranca el servidor en un hilo (para pruebas y benchmarks).
+    Retorna la URL base y una función que lo detiene.
+    """
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline or not thread.is_alive():
+            raise RuntimeError("No se pudo iniciar el stub de Sistecrédito")
+        time.sleep(0.01)
+    bound_port = server.servers[0].sockets[0].getsockname()[1]
+
+    def stop() -> None:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    return f"http://127.0.0.1:{bound_port}", stop
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="latencia base por petición")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="latencia adicional aleatoria (0..jitter)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fracción de peticiones que responden 503")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="fracción de peticiones que no responden")
+    parser.add_argument("--no-batch", action="store_true", help="responder 404 en /credits/batch")
+    args = parser.parse_args()
+    settings = StubSettings(args.latency_ms, args.jitter_ms, args.failure_rate, args.hang_rate,
+                            batch_enabled=not args.no_batch)
+    uvicorn.run(create_app(settings), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
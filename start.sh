@@ -1,3 +1,5 @@
 #!/bin/bash
 # Script de inicio para Render
-uvicorn main:app --host 0.0.0.0 --port $PORT
+# El proxy de Render es el único que llega al servicio: se confía en su
+# X-Forwarded-For para que el límite por IP vea la IP real del cliente
+uvicorn main:app --host 0.0.0.0 --port $PORT --proxy-headers --forwarded-allow-ips="${FORWARDED_ALLOW_IPS:-*}"
@@ -0,0 +1,73 @@
+"""
+Caché de respuestas de estado ya serializadas.
+Guarda por token los bytes JSON de la última respuesta de
+GET /transactions/{token}/status junto con la versión de la transacción con la
+que se construyeron. Mientras la versión no cambie, la respuesta se entrega sin
+reconstruir el modelo ni volver a serializar credit_result.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class StatusCache:
+    """LRU acotado token → (versión, bytes). Se usa solo desde el event loop"""
+
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[int, bytes]]" = OrderedDict()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "not_modified": 0,
+            "evictions": 0,
+        }
+
+    def get(self, token: str, version: int) -> Optional[bytes]:
+        entry = self._entries.get(token)
+        if entry is None or entry[0] != version:
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(token)
+        self.stats["hits"] += 1
+        return entry[1]
+
+    def record_not_modified(self) -> None:
+        """Cuenta una respuesta 304 (el cliente ya tenía la versión actual)"""
+        self.stats["not_modified"] += 1
+
+    def put(self, token: str, version: int, body: bytes) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[token] = (version, body)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def as_dict(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+
+def etag_for(version: int) -> str:
+    return f'"{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara If-None-Match (lista de etags, débiles o "*") con el etag actual"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
@@ -1,78 +1,213 @@
-from datetime import datetime, timedelta
-from typing import Dict, Optional, Any
-import uuid
-from models import Transaction, TransactionStatus, ClientData, StoreValidation, CreditResult
-from credit_heuristic import heuristic_micro_v2, get_default_config
+import asyncio
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple, Any
+import time
+from models import (
+    Transaction, TransactionStatus, TransactionSummary,
+    ClientData, StoreValidation, CreditResult
+)
+from expiry import ExpiryStats
+from records import TransactionRecord
+from journal import TransactionJournal
+from scoring_config import ScoringConfigSource
+from credit_heuristic import ScoreMemo
+from scoring_executor import ScoringExecutor
+from structured_logging import get_logger
+from notifications import StatusNotifier
+from sistecredito_client import SistecreditoClient
+from metrics import record_transition, registry, resident_memory_bytes, stage_seconds
+from storage_backends import (
+    create_backend, generate_token, InMemoryBackend, StatusInfo,
+    WAITING_STATUSES, FINAL_STATUSES
+)
+import config
 
-# Almacén en memoria para las transacciones
-transactions_storage: Dict[str, Transaction] = {}
+log = get_logger("storage")
 
-def generate_token() -> str:
-    """Genera un token único para la transacción"""
-    return str(uuid.uuid4())
+# Journal para recuperar el backend en memoria tras un reinicio (opcional)
+journal = None
+if config.JOURNAL_DIR and config.STORAGE_BACKEND == InMemoryBackend.name:
+    journal = TransactionJournal(
+        config.JOURNAL_DIR,
+        fsync_interval_ms=config.JOURNAL_FSYNC_INTERVAL_MS,
+        snapshot_every=config.JOURNAL_SNAPSHOT_EVERY
+    )
+
+# Backend de almacenamiento seleccionado por configuración (memoria o SQLite)
+backend = create_backend(
+    config.STORAGE_BACKEND,
+    ttl_minutes=config.TRANSACTION_TTL_MINUTES,
+    retention_seconds=config.EXPIRY_RETENTION_SECONDS,
+    sqlite_path=config.SQLITE_PATH,
+    journal=journal
+)
+
+# Avisos de cambios para los clientes en espera (SSE y long-poll)
+status_notifier = StatusNotifier()
+backend.add_change_listener(status_notifier.notify)
+
+# Métricas: transiciones de estado, tamaño del almacén y duración por etapa
+backend.add_transition_listener(record_transition)
+registry.gauge("confianza_transactions_stored", "Transacciones guardadas en el backend", lambda: backend.count())
+registry.gauge("confianza_transactions_storage_bytes",
+               "Tamaño aproximado del almacén (memoria estimada o archivos de SQLite)",
+               lambda: backend.memory_bytes())
+registry.gauge("confianza_process_resident_memory_bytes", "Memoria residente del proceso", resident_memory_bytes)
+_read_stage = stage_seconds.labels("storage_read")
+_write_stage = stage_seconds.labels("storage_write")
+_scoring_stage = stage_seconds.labels("scoring")
+_registration_stage = stage_seconds.labels("registration")
+
+# Almacén en memoria para las transacciones (registros compactos, solo con el backend en memoria)
+transactions_storage: Dict[str, TransactionRecord] = (
+    backend.transactions if isinstance(backend, InMemoryBackend) else {}
+)
+
+# Contadores del barrido de expiración
+expiry_stats = ExpiryStats()
+
+# Configuración activa del modelo de scoring (recarga en caliente desde archivo)
+scoring_config = ScoringConfigSource(config.SCORING_CONFIG_PATH, config.SCORING_CONFIG_RELOAD_SECONDS)
+score_memo = ScoreMemo(config.SCORING_MEMO_SIZE)
+
+# Micro-batching de las llamadas concurrentes de scoring (opcional)
+scoring_executor = None
+if config.SCORING_BATCH_WINDOW_MS > 0:
+    scoring_executor = ScoringExecutor(
+        window_ms=config.SCORING_BATCH_WINDOW_MS,
+        max_batch=config.SCORING_BATCH_MAX_SIZE,
+        pool=config.SCORING_POOL,
+        workers=config.SCORING_POOL_WORKERS,
+        lut=config.SCORING_MODE == "lut"
+    )
+
+# Cliente de Sistecrédito (sin URL configurada el registro se simula)
+sistecredito_client = None
+if config.SISTECREDITO_API_URL:
+    sistecredito_client = SistecreditoClient(
+        config.SISTECREDITO_API_URL,
+        api_key=config.SISTECREDITO_API_KEY,
+        max_connections=config.SISTECREDITO_MAX_CONNECTIONS,
+        timeout_seconds=config.SISTECREDITO_TIMEOUT_SECONDS,
+        connect_timeout_seconds=config.SISTECREDITO_CONNECT_TIMEOUT_SECONDS,
+        max_retries=config.SISTECREDITO_MAX_RETRIES,
+        backoff_base_seconds=config.SISTECREDITO_BACKOFF_SECONDS,
+        breaker_threshold=config.SISTECREDITO_BREAKER_THRESHOLD,
+        breaker_reset_seconds=config.SISTECREDITO_BREAKER_RESET_SECONDS,
+        batch_max_size=config.SISTECREDITO_BATCH_MAX_SIZE,
+        batch_window_ms=config.SISTECREDITO_BATCH_WINDOW_MS
+    )
 
 def create_transaction(store_id: str, tendero_name: str) -> Transaction:
     """Crea una nueva transacción con token y fecha de expiración"""
-    token = generate_token()
-    expires_at = datetime.now() + timedelta(minutes=15)  # 15 minutos de expiración
-    
-    transaction = Transaction(
-        token=token,
-        expires_at=expires_at
-    )
-    
-    transactions_storage[token] = transaction
-    return transaction
+    with _write_stage.time():
+        return backend.create_transaction(store_id, tendero_name)
 
 def get_transaction(token: str) -> Optional[Transaction]:
     """Obtiene una transacción por su token"""
-    return transactions_storage.get(token)
+    with _read_stage.time():
+        return backend.get_transaction(token)
+
+def get_status_info(token: str) -> Optional[StatusInfo]:
+    """Versión, estado y vencimiento de una transacción sin construir el modelo"""
+    return backend.get_status_info(token)
 
 def update_transaction(token: str, **kwargs) -> bool:
     """Actualiza una transacción existente"""
-    if token not in transactions_storage:
-        return False
-    
-    transaction = transactions_storage[token]
-    for key, value in kwargs.items():
-        if hasattr(transaction, key):
-            setattr(transaction, key, value)
-    
-    return True
+    with _write_stage.time():
+        return backend.update_transaction(token, **kwargs)
+
+def compare_and_set(token: str, expected: Iterable[TransactionStatus],
+                    new_status: TransactionStatus, **kwargs) -> bool:
+    """
+    Transición atómica de estado: aplica new_status y los campos dados solo si
+    la transacción sigue en alguno de los estados esperados.
+    Retorna True únicamente para la petición que gana la transición.
+    """
+    with _write_stage.time():
+        return backend.compare_and_set(token, expected, new_status, **kwargs)
 
 def is_token_valid(token: str) -> bool:
     """Verifica si un token es válido y no ha expirado"""
-    transaction = get_transaction(token)
-    if not transaction:
-        return False
+    return backend.is_token_valid(token)
+
+def list_transactions(store_id: Optional[str] = None, cedula: Optional[str] = None,
+                      status: Optional[TransactionStatus] = None, cursor: Optional[str] = None,
+                      limit: int = 50) -> Tuple[List[TransactionSummary], Optional[str]]:
+    """
+    Lista transacciones usando los índices secundarios (tienda, cédula o estado),
+    más recientes primero y paginadas por cursor
+    """
+    return backend.list_transactions(store_id=store_id, cedula=cedula, status=status,
+                                     cursor=cursor, limit=limit)
+
+def count_transactions() -> int:
+    """Número de transacciones almacenadas en el backend"""
+    return backend.count()
+
+def sweep_transactions(now: Optional[float] = None) -> Dict[str, int]:
+    """
+    Procesa los vencimientos pendientes:
+    marca como EXPIRED los tokens vencidos que aún esperaban datos y
+    elimina del almacén las transacciones finalizadas tras la retención.
+    """
+    started = time.perf_counter()
+    if now is None:
+        now = time.time()
+    
+    expired, evicted = backend.sweep(now)
     
-    return datetime.now() < transaction.expires_at
+    expiry_stats.record(expired, evicted, time.perf_counter() - started)
+    return {"expired": expired, "evicted": evicted}
 
 def calculate_credit_score(transaction: Transaction) -> CreditResult:
     """
     Calcula el puntaje crediticio usando el modelo heurístico Micro v2
     """
+    with _scoring_stage.time():
+        model_input = _credit_model_input(transaction)
+        if model_input is None:
+            return _failed_credit_result()
+        scorer = None
+        try:
+            # Ejecutar el modelo heurístico con la configuración activa
+            scorer = scoring_config.current()
+            result = score_memo.score(scorer, model_input, lut=config.SCORING_MODE == "lut")
+            return _credit_result(result, scorer)
+        except Exception as e:
+            log.error("credit_score_error", error=str(e))
+            return _failed_credit_result(scorer)
+
+async def calculate_credit_score_batched(transaction: Transaction) -> CreditResult:
+    """
+    Como calculate_credit_score, pero el registro se puntúa en el micro-batching
+    (scoring_executor): el event loop espera el lote sin bloquear un hilo, así
+    todas las transacciones que cierran durante la ventana comparten el lote.
+    """
+    with _scoring_stage.time():
+        model_input = _credit_model_input(transaction)
+        if model_input is None:
+            return _failed_credit_result()
+        scorer = None
+        try:
+            scorer = scoring_config.current()
+            result = await asyncio.wrap_future(scoring_executor.submit(scorer, model_input))
+            return _credit_result(result, scorer)
+        except Exception as e:
+            log.error("credit_score_error", error=str(e))
+            return _failed_credit_result(scorer)
+
+def _credit_model_input(transaction: Transaction) -> Optional[Dict[str, Any]]:
+    """Entrada del modelo heurístico (None si faltan los datos del cliente o de la tienda)"""
     if not transaction.client_data or not transaction.store_validation:
-        return CreditResult(
-            category="E",
-            score_conf=0.0,
-            risk_pct=100.0,
-            debt_capacity_pct=0.0,
-            cupo_estimated=0.0,
-            raw_cupo=0.0,
-            comp_feature=0.0,
-            comp_income=0.0,
-            features={},
-            clients_per_day=0,
-            income_proxy_daily=0.0
-        )
+        return None
     
     # Preparar datos para el modelo heurístico
     client_data = transaction.client_data
     store_validation = transaction.store_validation
     
     # Crear diccionario con los datos requeridos por el modelo
-    model_input = {
+    return {
         "know_buyer": store_validation.know_buyer,
         "buy_freq": store_validation.buy_freq,
         "avg_purchase": store_validation.avg_purchase,
@@ -81,62 +216,99 @@ def calculate_credit_score(transaction: Transaction) -> CreditResult:
         "distance_km": store_validation.distance_km,
         "address_verified": store_validation.address_verified
     }
-    
-    try:
-        # Ejecutar el modelo heurístico
-        result = heuristic_micro_v2(model_input)
-        
-        # Convertir resultado a CreditResult
-        return CreditResult(
-            category=result["category"],
-            score_conf=result["score_conf"],
-            risk_pct=result["risk_pct"],
-            debt_capacity_pct=result["debt_capacity_pct"],
-            cupo_estimated=result["cupo_estimated"],
-            raw_cupo=result["raw_cupo"],
-            comp_feature=result["comp_feature"],
-            comp_income=result["comp_income"],
-            features=result["features"],
-            clients_per_day=result["clients_per_day"],
-            income_proxy_daily=result["income_proxy_daily"]
-        )
-        
-    except Exception as e:
-        print(f"Error en cálculo de puntaje: {e}")
-        return CreditResult(
-            category="E",
-            score_conf=0.0,
-            risk_pct=100.0,
-            debt_capacity_pct=0.0,
-            cupo_estimated=0.0,
-            raw_cupo=0.0,
-            comp_feature=0.0,
-            comp_income=0.0,
-            features={},
-            clients_per_day=0,
-            income_proxy_daily=0.0
-        )
+
+def _credit_result(result: Dict[str, Any], scorer) -> CreditResult:
+    """Convierte el resultado del modelo a CreditResult con la versión de la configuración"""
+    return CreditResult(
+        category=result["category"],
+        score_conf=result["score_conf"],
+        risk_pct=result["risk_pct"],
+        debt_capacity_pct=result["debt_capacity_pct"],
+        cupo_estimated=result["cupo_estimated"],
+        raw_cupo=result["raw_cupo"],
+        comp_feature=result["comp_feature"],
+        comp_income=result["comp_income"],
+        features=result["features"],
+        clients_per_day=result["clients_per_day"],
+        income_proxy_daily=result["income_proxy_daily"],
+        config_version=scorer.version
+    )
+
+def _failed_credit_result(scorer=None) -> CreditResult:
+    """
+    Resultado de categoría E cuando no se puede calcular el puntaje; si el
+    error ocurrió con una configuración ya resuelta, guarda su versión
+    """
+    return CreditResult(
+        category="E",
+        score_conf=0.0,
+        risk_pct=100.0,
+        debt_capacity_pct=0.0,
+        cupo_estimated=0.0,
+        raw_cupo=0.0,
+        comp_feature=0.0,
+        comp_income=0.0,
+        features={},
+        clients_per_day=0,
+        income_proxy_daily=0.0,
+        config_version=scorer.version if scorer is not None else None
+    )
 
 def register_credit_mock(transaction: Transaction, credit_result: CreditResult) -> Dict[str, Any]:
     """
     Simula el registro del crédito en Sistecrédito
     En producción, aquí se haría la llamada real a la API
     """
-    print(f"🎯 SIMULACIÓN SISTECRÉDITO:")
-    print(f"   Token: {transaction.token}")
-    print(f"   Cliente: {transaction.store_validation.nombre_cliente} ({transaction.store_validation.cedula_cliente})")
-    print(f"   Categoría: {credit_result.category}")
-    print(f"   Puntaje: {credit_result.score_conf:.4f}")
-    print(f"   Riesgo: {credit_result.risk_pct:.2f}%")
-    print(f"   Cupo Estimado: ${credit_result.cupo_estimated:,.2f}")
-    print(f"   Componente Feature: ${credit_result.comp_feature:,.2f}")
-    print(f"   Componente Income: ${credit_result.comp_income:,.2f}")
-    print(f"   Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print("-" * 50)
+    log.info(
+        "sistecredito_registered",
+        cliente=transaction.store_validation.nombre_cliente,
+        cedula=transaction.store_validation.cedula_cliente,
+        category=credit_result.category,
+        score_conf=credit_result.score_conf,
+        risk_pct=credit_result.risk_pct,
+        cupo_estimated=credit_result.cupo_estimated,
+        comp_feature=credit_result.comp_feature,
+        comp_income=credit_result.comp_income,
+        config_version=credit_result.config_version
+    )
     
     return {
         "success": True,
         "transaction_id": f"SIS-{transaction.token[:8].upper()}",
         "processed_at": datetime.now().isoformat(),
-        "credit_result": credit_result.dict()
+        "credit_result": credit_result
+    }
+
+def registration_payload(transaction: Transaction, credit_result: CreditResult) -> Dict[str, Any]:
+    """Datos del registro en Sistecrédito; reference (el token) lo identifica ante reintentos"""
+    return {
+        "reference": transaction.token,
+        "store_id": transaction.store_id,
+        "cedula_cliente": transaction.store_validation.cedula_cliente,
+        "nombre_cliente": transaction.store_validation.nombre_cliente,
+        "category": credit_result.category,
+        "score_conf": credit_result.score_conf,
+        "risk_pct": credit_result.risk_pct,
+        "cupo_estimated": credit_result.cupo_estimated,
+        "config_version": credit_result.config_version
     }
+
+async def register_credit(transaction: Transaction, credit_result: CreditResult) -> Dict[str, Any]:
+    """
+    Registra el crédito en Sistecrédito con el cliente asíncrono.
+    Sin SISTECREDITO_API_URL se usa la simulación (register_credit_mock).
+    """
+    if sistecredito_client is None:
+        with _registration_stage.time():
+            return register_credit_mock(transaction, credit_result)
+    
+    with _registration_stage.time():
+        response = await sistecredito_client.register(registration_payload(transaction, credit_result))
+    log.info(
+        "sistecredito_registered",
+        transaction_id=response.get("transaction_id"),
+        category=credit_result.category,
+        cupo_estimated=credit_result.cupo_estimated,
+        config_version=credit_result.config_version
+    )
+    return response
@@ -0,0 +1,701 @@
+"""
+Backends de almacenamiento de transacciones.
+Definen la interfaz común usada por storage.py y sus dos implementaciones:
+memoria del proceso (por defecto) y SQLite en modo WAL, compartible entre
+varios workers de uvicorn en el mismo host.
+"""
+
+import itertools
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from models import CreditResult, Transaction, TransactionStatus, TransactionSummary
+from expiry import ExpiryIndex, EXPIRE, EVICT
+from indexes import SecondaryIndex
+from journal import TransactionJournal
+from records import STATUS_BY_CODE, TransactionRecord, status_code, to_seconds, from_seconds
+
+# Estados que aún esperan datos y pueden expirar
+WAITING_STATUSES = {
+    TransactionStatus.PENDING,
+    TransactionStatus.CLIENT_DATA_RECEIVED,
+    TransactionStatus.STORE_VALIDATION_RECEIVED,
+}
+
+# Estados finales: la transacción ya no cambia y puede liberarse tras la retención
+FINAL_STATUSES = {
+    TransactionStatus.COMPLETED,
+    TransactionStatus.EXPIRED,
+    TransactionStatus.ERROR,
+}
+
+_FINAL_CODES = frozenset(status_code(status) for status in FINAL_STATUSES)
+_PROCESSING_CODE = status_code(TransactionStatus.PROCESSING)
+
+
+class TokenLocks:
+    """
+    Locks por token mediante lock striping: cada token se asigna a uno de N locks
+    fijos, de modo que operaciones sobre tokens distintos no se serializan entre sí
+    y no hace falta crear ni limpiar un lock por transacción.
+    """
+
+    def __init__(self, stripes: int = 256):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def for_token(self, token: str) -> threading.Lock:
+        return self._locks[hash(token) % len(self._locks)]
+
+
+def generate_token() -> str:
+    """Genera un token único para la transacción"""
+    return str(uuid.uuid4())
+
+
+class StatusInfo(NamedTuple):
+    """Versión, estado y vencimiento de una transacción (sin construir el modelo)"""
+    version: int
+    status: TransactionStatus
+    expires_at: datetime
+
+
+TransitionListener = Callable[[Optional[TransactionStatus], TransactionStatus], None]
+
+
+class StorageBackend(ABC):
+    """Interfaz común de los backends de almacenamiento"""
+
+    def __init__(self, ttl_minutes: float, retention_seconds: float):
+        self.ttl_minutes = ttl_minutes
+        self.retention_seconds = retention_seconds
+        self.change_listeners: List[Callable[[str], None]] = []
+        self.transition_listeners: List[TransitionListener] = []
+
+    def add_change_listener(self, listener: Callable[[str], None]) -> None:
+        """Registra una función que recibe el token de cada transacción modificada"""
+        self.change_listeners.append(listener)
+
+    def add_transition_listener(self, listener: "TransitionListener") -> None:
+        """
+        Registra una función que recibe (estado anterior, estado nuevo) en cada
+        cambio de estado; al crear una transacción el estado anterior es None
+        """
+        self.transition_listeners.append(listener)
+
+    def _notify(self, token: str) -> None:
+        for listener in self.change_listeners:
+            listener(token)
+
+    def _transition(self, old: Optional[TransactionStatus], new: TransactionStatus) -> None:
+        if old != new:
+            for listener in self.transition_listeners:
+                listener(old, new)
+
+    def _new_transaction(self, store_id: str, tendero_name: str) -> Transaction:
+        """Construye una transacción nueva con token y fecha de expiración"""
+        return Transaction(
+            token=generate_token(),
+            store_id=store_id,
+            tendero_name=tendero_name,
+            expires_at=datetime.now() + timedelta(minutes=self.ttl_minutes)
+        )
+
+    @staticmethod
+    def _parse_cursor(cursor: Optional[str]) -> Optional[int]:
+        if cursor is None:
+            return None
+        try:
+            return int(cursor)
+        except ValueError:
+            raise ValueError(f"Cursor inválido: {cursor}")
+
+    @abstractmethod
+    def create_transaction(self, store_id: str, tendero_name: str) -> Transaction:
+        """Crea y persiste una nueva transacción"""
+
+    @abstractmethod
+    def get_transaction(self, token: str) -> Optional[Transaction]:
+        """Obtiene una transacción por su token"""
+
+    @abstractmethod
+    def get_status_info(self, token: str) -> Optional[StatusInfo]:
+        """
+        Versión, estado y vencimiento de una transacción. La versión cambia con
+        cada modificación y nunca se repite para un token.
+        """
+
+    @abstractmethod
+    def update_transaction(self, token: str, **kwargs) -> bool:
+        """Actualiza campos de una transacción existente"""
+
+    @abstractmethod
+    def compare_and_set(self, token: str, expected: Iterable[TransactionStatus],
+                        new_status: TransactionStatus, **kwargs) -> bool:
+        """
+        Cambia el estado a new_status (y aplica kwargs) solo si el estado actual
+        está en expected. La lectura y la escritura son atómicas por token.
+        """
+
+    @abstractmethod
+    def is_token_valid(self, token: str) -> bool:
+        """Verifica si un token existe y no ha expirado"""
+
+    @abstractmethod
+    def list_transactions(self, store_id: Optional[str] = None, cedula: Optional[str] = None,
+                          status: Optional[TransactionStatus] = None, cursor: Optional[str] = None,
+                          limit: int = 50) -> Tuple[List[TransactionSummary], Optional[str]]:
+        """
+        Lista transacciones por índice secundario, más recientes primero.
+        Filtros soportados: store_id, store_id + status, cedula o status.
+        Retorna la página y el cursor de la siguiente (None si no hay más).
+        """
+
+    @abstractmethod
+    def sweep(self, now: float) -> Tuple[int, int]:
+        """Marca expiradas y libera finalizadas. Retorna (expiradas, liberadas)"""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Número de transacciones almacenadas"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Elimina todas las transacciones"""
+
+    def memory_bytes(self) -> Optional[int]:
+        """Tamaño aproximado del almacén en bytes (None si no se puede estimar)"""
+        return None
+
+    def get_response(self, key: str, now: float) -> Optional[Tuple[float, int, bytes]]:
+        """
+        Respuesta de webhook guardada por cualquier worker: (vencimiento epoch,
+        código, cuerpo). None si no existe, venció o el backend no la comparte
+        """
+        return None
+
+    def put_response(self, key: str, expires_at: float, status_code: int, body: bytes) -> None:
+        """Guarda una respuesta de webhook para los demás workers (sin efecto si el backend no la comparte)"""
+
+    def close(self) -> None:
+        """Libera los recursos del backend"""
+
+
+class InMemoryBackend(StorageBackend):
+    """
+    Backend en memoria del proceso con índice de vencimientos (heap).
+    Guarda registros compactos (records.TransactionRecord) y construye los
+    modelos Pydantic solo al entregar una transacción. Con un journal adjunto,
+    cada cambio se registra en disco y el estado se recupera al reiniciar.
+    """
+
+    name = "memory"
+
+    def __init__(self, ttl_minutes: float, retention_seconds: float,
+                 journal: Optional[TransactionJournal] = None):
+        super().__init__(ttl_minutes, retention_seconds)
+        self.transactions: Dict[str, TransactionRecord] = {}
+        self.tokens_by_seq: Dict[int, str] = {}
+        self.index = SecondaryIndex()
+        self.expiry_index = ExpiryIndex()
+        self.locks = TokenLocks()
+        self._seq = itertools.count(1)
+        # Las versiones no se persisten: se numeran desde el instante de arranque
+        # para que una versión anterior a un reinicio no coincida con una nueva
+        self._versions = itertools.count(time.time_ns() // 1000)
+        self.journal = None
+        if journal is not None:
+            self.attach_journal(journal)
+
+    def attach_journal(self, journal: TransactionJournal) -> int:
+        """
+        Recupera el estado desde el journal (snapshot + segmentos posteriores),
+        reconstruye los índices y empieza a registrar los cambios nuevos.
+        Retorna el número de entradas reaplicadas.
+        """
+        transactions = self.transactions
+        for entry in journal.replay():
+            op = entry[0]
+            if op == "c":
+                record = TransactionRecord.from_row(entry[1])
+                transactions[record.token] = record
+            elif op == "u":
+                record = transactions.get(entry[1])
+                if record is not None:
+                    record.set_packed_fields(entry[2])
+            elif op == "d":
+                transactions.pop(entry[1], None)
+
+        self._rebuild_indexes()
+        self.journal = journal
+        journal.start(self._snapshot_rows)
+
+        # Un procesamiento interrumpido por el reinicio no se completará
+        interrupted = [record.token for record in transactions.values() if record.status == _PROCESSING_CODE]
+        for token in interrupted:
+            self.compare_and_set(token, {TransactionStatus.PROCESSING}, TransactionStatus.ERROR)
+        return journal.stats["replayed_entries"]
+
+    def _rebuild_indexes(self) -> None:
+        now = time.time()
+        max_seq = 0
+        for record in sorted(self.transactions.values(), key=lambda r: r.seq):
+            record.version = next(self._versions)
+            self.tokens_by_seq[record.seq] = record.token
+            self.index.add(record.index_keys(), record.seq)
+            if record.status in _FINAL_CODES:
+                self.expiry_index.schedule(now + self.retention_seconds, record.token, EVICT)
+            else:
+                self.expiry_index.schedule(from_seconds(record.expires_at).timestamp(), record.token, EXPIRE)
+            max_seq = record.seq
+        self._seq = itertools.count(max_seq + 1)
+
+    def _snapshot_rows(self):
+        for record in list(self.transactions.values()):
+            yield record.to_row()
+
+    def create_transaction(self, store_id: str, tendero_name: str) -> Transaction:
+        transaction = self._new_transaction(store_id, tendero_name)
+        record = TransactionRecord.from_model(transaction, seq=next(self._seq))
+        record.version = next(self._versions)
+        self.transactions[record.token] = record
+        self.tokens_by_seq[record.seq] = record.token
+        self.index.add(record.index_keys(), record.seq)
+        self.expiry_index.schedule(transaction.expires_at.timestamp(), transaction.token, EXPIRE)
+        if self.journal is not None:
+            self.journal.append(["c", record.to_row()])
+        self._transition(None, transaction.status)
+        return transaction
+
+    def get_transaction(self, token: str) -> Optional[Transaction]:
+        record = self.transactions.get(token)
+        return record.to_model() if record is not None else None
+
+    def get_status_info(self, token: str) -> Optional[StatusInfo]:
+        record = self.transactions.get(token)
+        if record is None:
+            return None
+        return StatusInfo(record.version, STATUS_BY_CODE[record.status], from_seconds(record.expires_at))
+
+    def _apply(self, record: TransactionRecord, kwargs: Dict) -> None:
+        old_status = record.status
+        was_final = old_status in _FINAL_CODES
+        old_keys = record.index_keys()
+        record.apply(kwargs)
+        record.version = next(self._versions)
+        self.index.update(old_keys, record.index_keys(), record.seq)
+        if self.journal is not None:
+            self.journal.append(["u", record.token, record.packed_fields(kwargs)])
+
+        # Programar la liberación cuando la transacción llega a un estado final
+        if not was_final and record.status in _FINAL_CODES:
+            self.expiry_index.schedule(time.time() + self.retention_seconds, record.token, EVICT)
+        if record.status != old_status:
+            self._transition(STATUS_BY_CODE[old_status], record.status_enum)
+
+    def update_transaction(self, token: str, **kwargs) -> bool:
+        with self.locks.for_token(token):
+            record = self.transactions.get(token)
+            if record is None:
+                return False
+            self._apply(record, kwargs)
+        self._notify(token)
+        return True
+
+    def compare_and_set(self, token: str, expected: Iterable[TransactionStatus],
+                        new_status: TransactionStatus, **kwargs) -> bool:
+        with self.locks.for_token(token):
+            record = self.transactions.get(token)
+            if record is None or record.status_enum not in expected:
+                return False
+            self._apply(record, {**kwargs, "status": new_status})
+        self._notify(token)
+        return True
+
+    def is_token_valid(self, token: str) -> bool:
+        record = self.transactions.get(token)
+        if not record:
+            return False
+        return to_seconds(datetime.now()) < record.expires_at
+
+    def sweep(self, now: float) -> Tuple[int, int]:
+        expired = 0
+        evicted = 0
+        for _, token, kind in self.expiry_index.pop_due(now):
+            record = self.transactions.get(token)
+            if record is None:
+                continue
+
+            if kind == EXPIRE:
+                if self.compare_and_set(token, WAITING_STATUSES, TransactionStatus.EXPIRED):
+                    expired += 1
+                elif record.status not in _FINAL_CODES:
+                    # En procesamiento: revisar de nuevo tras la ventana de retención
+                    self.expiry_index.schedule(now + self.retention_seconds, token, EXPIRE)
+            elif kind == EVICT and record.status in _FINAL_CODES:
+                with self.locks.for_token(token):
+                    del self.transactions[token]
+                    del self.tokens_by_seq[record.seq]
+                    self.index.remove(record.index_keys(), record.seq)
+                    if self.journal is not None:
+                        self.journal.append(["d", token])
+                evicted += 1
+        return expired, evicted
+
+    def list_transactions(self, store_id: Optional[str] = None, cedula: Optional[str] = None,
+                          status: Optional[TransactionStatus] = None, cursor: Optional[str] = None,
+                          limit: int = 50) -> Tuple[List[TransactionSummary], Optional[str]]:
+        if store_id is not None:
+            key = ("store", store_id) if status is None else ("store_status", store_id, status_code(status))
+        elif cedula is not None and status is None:
+            key = ("cedula", cedula)
+        elif status is not None and cedula is None:
+            key = ("status", status_code(status))
+        else:
+            raise ValueError("Filtro no soportado: use store_id (con o sin status), cedula o status")
+
+        seqs, has_more = self.index.page(key, self._parse_cursor(cursor), limit)
+        items = []
+        for seq in seqs:
+            token = self.tokens_by_seq.get(seq)
+            record = self.transactions.get(token) if token is not None else None
+            if record is not None:
+                items.append(record.to_summary())
+        next_cursor = str(seqs[-1]) if has_more and seqs else None
+        return items, next_cursor
+
+    def count(self) -> int:
+        return len(self.transactions)
+
+    def memory_bytes(self, sample_size: int = 64) -> Optional[int]:
+        """
+        Estimación: tamaño del diccionario más el tamaño medio de una muestra de
+        registros multiplicado por el número de registros (costo acotado por consulta)
+        """
+        records = self.transactions
+        count = len(records)
+        sample = list(itertools.islice(records.values(), sample_size))
+        if not sample:
+            return sys.getsizeof(records)
+        average = sum(record.approx_size() for record in sample) / len(sample)
+        return int(sys.getsizeof(records) + average * count)
+
+    def clear(self) -> None:
+        self.transactions.clear()
+        self.tokens_by_seq.clear()
+        self.index.clear()
+        self.expiry_index.clear()
+
+    def close(self) -> None:
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+
+# Sentencias SQL constantes: sqlite3 mantiene un caché de sentencias preparadas
+# por conexión, por lo que cada una se compila una sola vez por worker.
+_SQL_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS transactions (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        token TEXT NOT NULL UNIQUE,
+        status TEXT NOT NULL,
+        store_id TEXT,
+        tendero_name TEXT,
+        cedula TEXT,
+        expires_at REAL NOT NULL,
+        finished_at REAL,
+        version INTEGER NOT NULL DEFAULT 0,
+        data TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS webhook_responses (
+        key TEXT PRIMARY KEY,
+        expires_at REAL NOT NULL,
+        status_code INTEGER NOT NULL,
+        body BLOB NOT NULL
+    )
+    """,
+)
+# Columnas agregadas después de la versión inicial de la tabla (migración en caliente)
+_SQL_ADDED_COLUMNS = {
+    "store_id": "TEXT", "tendero_name": "TEXT", "cedula": "TEXT", "version": "INTEGER NOT NULL DEFAULT 0",
+}
+_SQL_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_transactions_expires_at ON transactions (expires_at)",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_finished_at ON transactions (finished_at)",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_status ON transactions (status, seq)",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_store ON transactions (store_id, seq)",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_store_status ON transactions (store_id, status, seq)",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_cedula ON transactions (cedula, seq)",
+    "CREATE INDEX IF NOT EXISTS ix_webhook_responses_expires_at ON webhook_responses (expires_at)",
+)
+_SQL_INSERT = (
+    "INSERT INTO transactions (token, status, store_id, tendero_name, cedula, expires_at, finished_at, data) "
+    "VALUES (?, ?, ?, ?, NULL, ?, NULL, ?)"
+)
+_SQL_SELECT_DATA = "SELECT data FROM transactions WHERE token = ?"
+_SQL_SELECT_EXPIRES = "SELECT expires_at FROM transactions WHERE token = ?"
+_SQL_SELECT_STATUS = "SELECT version, status, expires_at FROM transactions WHERE token = ?"
+# finished_at conserva el instante en que la transacción llegó por primera vez a un estado final
+_SQL_UPDATE = (
+    "UPDATE transactions SET status = ?, store_id = ?, tendero_name = ?, cedula = ?, "
+    "finished_at = CASE WHEN ? THEN COALESCE(finished_at, ?) ELSE NULL END, "
+    "version = version + 1, data = ? WHERE token = ?"
+)
+# Paginación por keyset: seq < cursor usando los índices (filtro, seq)
+_SQL_PAGE_BY = {
+    "store": "SELECT seq, data FROM transactions WHERE store_id = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+    "store_status": (
+        "SELECT seq, data FROM transactions WHERE store_id = ? AND status = ? AND seq < ? "
+        "ORDER BY seq DESC LIMIT ?"
+    ),
+    "cedula": "SELECT seq, data FROM transactions WHERE cedula = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+    "status": "SELECT seq, data FROM transactions WHERE status = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+}
+_MAX_SEQ = 2 ** 63 - 1
+_SQL_SELECT_DUE = "SELECT data FROM transactions WHERE expires_at <= ? AND status IN (?, ?, ?)"
+_SQL_EVICT = "DELETE FROM transactions WHERE finished_at IS NOT NULL AND finished_at <= ?"
+_SQL_COUNT = "SELECT COUNT(*) FROM transactions"
+_SQL_CLEAR = "DELETE FROM transactions"
+# Respuestas de los webhooks compartidas entre workers (deduplicación de reintentos)
+_SQL_SELECT_RESPONSE = "SELECT expires_at, status_code, body FROM webhook_responses WHERE key = ? AND expires_at > ?"
+_SQL_PUT_RESPONSE = "INSERT OR REPLACE INTO webhook_responses (key, expires_at, status_code, body) VALUES (?, ?, ?, ?)"
+_SQL_EVICT_RESPONSES = "DELETE FROM webhook_responses WHERE expires_at <= ?"
+_SQL_CLEAR_RESPONSES = "DELETE FROM webhook_responses"
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Backend durable sobre SQLite en modo WAL.
+    Cada hilo mantiene una conexión persistente, de modo que las peticiones
+    no pagan el costo de abrir conexiones; WAL permite lectores concurrentes
+    mientras un worker escribe.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, ttl_minutes: float, retention_seconds: float):
+        super().__init__(ttl_minutes, retention_seconds)
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        conn = self._connection()
+        for statement in _SQL_SCHEMA:
+            conn.execute(statement)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(transactions)")}
+        for column, column_type in _SQL_ADDED_COLUMNS.items():
+            if column not in columns:
+                conn.execute(f"ALTER TABLE transactions ADD COLUMN {column} {column_type}")
+        for statement in _SQL_INDEXES:
+            conn.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Retorna la conexión persistente del hilo actual"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: las transacciones se controlan explícitamente.
+            # check_same_thread=False solo para permitir que close() las cierre todas.
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None,
+                                   cached_statements=64, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, transaction: Transaction, now: float) -> None:
+        """Persiste el estado completo de una transacción existente"""
+        conn.execute(_SQL_UPDATE, (
+            transaction.status.value,
+            transaction.store_id,
+            transaction.tendero_name,
+            transaction.store_validation.cedula_cliente if transaction.store_validation else None,
+            transaction.status in FINAL_STATUSES,
+            now,
+            transaction.model_dump_json(),
+            transaction.token,
+        ))
+
+    def create_transaction(self, store_id: str, tendero_name: str) -> Transaction:
+        transaction = self._new_transaction(store_id, tendero_name)
+        self._connection().execute(_SQL_INSERT, (
+            transaction.token,
+            transaction.status.value,
+            transaction.store_id,
+            transaction.tendero_name,
+            transaction.expires_at.timestamp(),
+            transaction.model_dump_json(),
+        ))
+        self._transition(None, transaction.status)
+        return transaction
+
+    def get_transaction(self, token: str) -> Optional[Transaction]:
+        row = self._connection().execute(_SQL_SELECT_DATA, (token,)).fetchone()
+        if row is None:
+            return None
+        return Transaction.model_validate_json(row[0])
+
+    def get_status_info(self, token: str) -> Optional[StatusInfo]:
+        row = self._connection().execute(_SQL_SELECT_STATUS, (token,)).fetchone()
+        if row is None:
+            return None
+        return StatusInfo(row[0], TransactionStatus(row[1]), datetime.fromtimestamp(row[2]))
+
+    def _read_modify_write(self, token: str, kwargs: Dict,
+                           expected: Optional[Iterable[TransactionStatus]] = None) -> bool:
+        conn = self._connection()
+        # BEGIN IMMEDIATE toma el lock de escritura antes de leer: la lectura,
+        # la verificación del estado y la escritura son atómicas entre procesos.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(_SQL_SELECT_DATA, (token,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return False
+
+            transaction = Transaction.model_validate_json(row[0])
+            old_status = transaction.status
+            if expected is not None and old_status not in expected:
+                conn.execute("COMMIT")
+                return False
+
+            for key, value in kwargs.items():
+                if isinstance(value, CreditResult):
+                    # La columna guarda el JSON de Transaction, donde el resultado es un diccionario
+                    value = value.model_dump()
+                if hasattr(transaction, key):
+                    setattr(transaction, key, value)
+            self._write(conn, transaction, time.time())
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._transition(old_status, transaction.status)
+        return True
+
+    def update_transaction(self, token: str, **kwargs) -> bool:
+        changed = self._read_modify_write(token, kwargs)
+        if changed:
+            self._notify(token)
+        return changed
+
+    def compare_and_set(self, token: str, expected: Iterable[TransactionStatus],
+                        new_status: TransactionStatus, **kwargs) -> bool:
+        changed = self._read_modify_write(token, {**kwargs, "status": new_status}, expected=set(expected))
+        if changed:
+            self._notify(token)
+        return changed
+
+    def is_token_valid(self, token: str) -> bool:
+        row = self._connection().execute(_SQL_SELECT_EXPIRES, (token,)).fetchone()
+        if row is None:
+            return False
+        return datetime.now().timestamp() < row[0]
+
+    def sweep(self, now: float) -> Tuple[int, int]:
+        conn = self._connection()
+        waiting = tuple(status.value for status in WAITING_STATUSES)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            expired = []
+            for (data,) in conn.execute(_SQL_SELECT_DUE, (now, *waiting)).fetchall():
+                transaction = Transaction.model_validate_json(data)
+                expired.append((transaction.token, transaction.status))
+                transaction.status = TransactionStatus.EXPIRED
+                self._write(conn, transaction, now)
+            evicted = conn.execute(_SQL_EVICT, (now - self.retention_seconds,)).rowcount
+            conn.execute(_SQL_EVICT_RESPONSES, (now,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        for token, old_status in expired:
+            self._transition(old_status, TransactionStatus.EXPIRED)
+            self._notify(token)
+        return len(expired), evicted
+
+    def list_transactions(self, store_id: Optional[str] = None, cedula: Optional[str] = None,
+                          status: Optional[TransactionStatus] = None, cursor: Optional[str] = None,
+                          limit: int = 50) -> Tuple[List[TransactionSummary], Optional[str]]:
+        if store_id is not None:
+            kind, params = ("store", (store_id,)) if status is None else ("store_status", (store_id, status.value))
+        elif cedula is not None and status is None:
+            kind, params = "cedula", (cedula,)
+        elif status is not None and cedula is None:
+            kind, params = "status", (status.value,)
+        else:
+            raise ValueError("Filtro no soportado: use store_id (con o sin status), cedula o status")
+
+        before = self._parse_cursor(cursor)
+        rows = self._connection().execute(
+            _SQL_PAGE_BY[kind], (*params, _MAX_SEQ if before is None else before, limit + 1)
+        ).fetchall()
+        items = [_summary(Transaction.model_validate_json(data)) for _, data in rows[:limit]]
+        next_cursor = str(rows[limit - 1][0]) if len(rows) > limit else None
+        return items, next_cursor
+
+    def count(self) -> int:
+        return self._connection().execute(_SQL_COUNT).fetchone()[0]
+
+    def memory_bytes(self) -> Optional[int]:
+        """Tamaño en disco de la base de datos y su WAL"""
+        return sum(os.path.getsize(path) for path in (self.path, self.path + "-wal") if os.path.exists(path))
+
+    def get_response(self, key: str, now: float) -> Optional[Tuple[float, int, bytes]]:
+        row = self._connection().execute(_SQL_SELECT_RESPONSE, (key, now)).fetchone()
+        return (row[0], row[1], bytes(row[2])) if row is not None else None
+
+    def put_response(self, key: str, expires_at: float, status_code: int, body: bytes) -> None:
+        self._connection().execute(_SQL_PUT_RESPONSE, (key, expires_at, status_code, body))
+
+    def clear(self) -> None:
+        conn = self._connection()
+        conn.execute(_SQL_CLEAR)
+        conn.execute(_SQL_CLEAR_RESPONSES)
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+def _summary(transaction: Transaction) -> TransactionSummary:
+    """Resumen de una transacción para los listados paginados"""
+    return TransactionSummary(
+        token=transaction.token,
+        status=transaction.status,
+        store_id=transaction.store_id,
+        tendero_name=transaction.tendero_name,
+        cedula_cliente=transaction.store_validation.cedula_cliente if transaction.store_validation else None,
+        created_at=transaction.created_at,
+        expires_at=transaction.expires_at,
+        category=(transaction.credit_result or {}).get("category"),
+    )
+
+
+def create_backend(name: str, ttl_minutes: float, retention_seconds: float,
+                   sqlite_path: str = "confianza_vecina.db",
+                   journal: Optional[TransactionJournal] = None) -> StorageBackend:
+    """
+    Construye el backend configurado ("memory" o "sqlite").
+    El journal solo aplica al backend en memoria; SQLite ya es durable.
+    """
+    if name == InMemoryBackend.name:
+        return InMemoryBackend(ttl_minutes, retention_seconds, journal=journal)
+    if name == SQLiteBackend.name:
+        return SQLiteBackend(sqlite_path, ttl_minutes, retention_seconds)
+    raise ValueError(f"Backend de almacenamiento desconocido: {name}")
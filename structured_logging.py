@@ -0,0 +1,251 @@
+"""
+Logging estructurado de la API.
+Cada evento es una línea JSON con nivel, nombre del evento, campos y el token de
+la transacción en curso (correlation ID). Los llamadores solo encolan el
+registro: un QueueListener escribe desde un hilo en segundo plano, así que el
+event loop nunca espera por stdout. Si la cola se llena, los eventos se
+descartan y se cuentan en lugar de bloquear.
+
+Los eventos DEBUG se muestrean (LOG_DEBUG_SAMPLE_RATE) para poder dejarlos
+activos en producción sin multiplicar el volumen.
+
+Uso:
+    log = get_logger("storage")
+    with bind_token(token):
+        log.info("credit_completed", category="A", cupo=50000.0)
+"""
+
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+try:
+    import orjson  # opcional: acelera la serialización de los eventos
+except ImportError:
+    orjson = None
+
+LOGGER_NAME = "confianza_vecina"
+
+# Token de la transacción que se está procesando; viaja con el contexto de la
+# petición y de los trabajos encolados (ver jobs.Job)
+correlation_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("correlation_id", default=None)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional["DroppingQueueHandler"] = None
+_debug_sample_rate = 1.0
+
+stats = {
+    "events_total": 0,
+    "dropped_total": 0,
+    "sampled_out_total": 0,
+}
+
+
+def set_token(token: Optional[str]) -> None:
+    """
+    Asocia al token los eventos del resto de la petición. Cada petición (y cada
+    trabajo encolado) corre en su propio contexto, así que no afecta a las demás.
+    """
+    correlation_id.set(token)
+
+
+@contextmanager
+def bind_token(token: Optional[str]) -> Iterator[None]:
+    """Asocia los eventos emitidos dentro del bloque al token dado"""
+    reset = correlation_id.set(token)
+    try:
+        yield
+    finally:
+        correlation_id.reset(reset)
+
+
+if orjson is not None:
+    def _dumps(event: Dict[str, Any]) -> str:
+        return orjson.dumps(event, default=str).decode("utf-8")
+else:
+    def _dumps(event: Dict[str, Any]) -> str:
+        return json.dumps(event, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por evento: ts, level, logger, event, token y los campos del evento"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        token = getattr(record, "token", None)
+        if token is not None:
+            event["token"] = token
+        fields = getattr(record, "fields", None)
+        if fields:
+            event.update(fields)
+        if record.exc_text:
+            event["exc"] = record.exc_text
+        return _dumps(event)
+
+
+class TextFormatter(logging.Formatter):
+    """Formato legible para desarrollo: hora, nivel, evento y campos clave=valor"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        parts = [time.strftime("%H:%M:%S", time.localtime(record.created)), record.levelname, record.getMessage()]
+        token = getattr(record, "token", None)
+        if token is not None:
+            parts.append(f"token={token}")
+        for key, value in (getattr(record, "fields", None) or {}).items():
+            parts.append(f"{key}={value}")
+        line = " ".join(parts)
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+class ContextFilter(logging.Filter):
+    """Agrega el correlation ID al evento (corre en el hilo que emite, antes de encolar)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.token = correlation_id.get()
+        return True
+
+
+class EventRecord(logging.LogRecord):
+    """
+    LogRecord de un evento con construcción liviana: omite la búsqueda del
+    llamador (findCaller) y los datos de hilo/proceso que LogRecord calcula en
+    cada evento. Los formatters estándar siguen funcionando con estos atributos.
+    """
+
+    def __init__(self, name: str, level: int, event: str, fields: Dict[str, Any], exc_info=None):
+        self.name = name
+        self.msg = event
+        self.args = None
+        self.levelno = level
+        self.levelname = logging.getLevelName(level)
+        self.pathname = self.filename = self.module = "?"
+        self.lineno = 0
+        self.funcName = None
+        self.exc_info = exc_info
+        self.exc_text = None
+        self.stack_info = None
+        self.created = time.time()
+        self.msecs = int(self.created * 1000) % 1000
+        self.relativeCreated = (self.created - logging._startTime) * 1000
+        self.thread = self.threadName = self.process = self.processName = self.taskName = None
+        self.fields = fields
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que nunca bloquea: con la cola llena descarta el evento y lo cuenta"""
+
+    def __init__(self, maxsize: int):
+        super().__init__(queue.SimpleQueue())
+        self.maxsize = maxsize
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # El formato completo se hace en el hilo del listener; aquí solo se fijan
+        # los argumentos del mensaje para que el registro sea independiente del llamador
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.queue.qsize() >= self.maxsize:
+            stats["dropped_total"] += 1
+            return
+        self.queue.put_nowait(record)
+        stats["events_total"] += 1
+
+
+class EventLogger:
+    """Logger de eventos: log.info("evento", campo=valor, ...)"""
+
+    __slots__ = ("_logger",)
+
+    def __init__(self, logger: logging.Logger):
+        self._logger = logger
+
+    def _log(self, level: int, event: str, fields: Dict[str, Any], exc_info: bool = False) -> None:
+        if self._logger.isEnabledFor(level):
+            # El muestreo de DEBUG se decide antes de construir el evento
+            if level <= logging.DEBUG and _debug_sample_rate < 1.0 and random.random() >= _debug_sample_rate:
+                stats["sampled_out_total"] += 1
+                return
+            self._logger.handle(EventRecord(self._logger.name, level, event, fields,
+                                            sys.exc_info() if exc_info else None))
+
+    def debug(self, event: str, **fields: Any) -> None:
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event: str, **fields: Any) -> None:
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event: str, **fields: Any) -> None:
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event: str, **fields: Any) -> None:
+        self._log(logging.ERROR, event, fields)
+
+    def exception(self, event: str, **fields: Any) -> None:
+        self._log(logging.ERROR, event, fields, exc_info=True)
+
+    def is_enabled(self, level: int) -> bool:
+        return self._logger.isEnabledFor(level)
+
+
+def get_logger(name: str) -> EventLogger:
+    return EventLogger(logging.getLogger(f"{LOGGER_NAME}.{name}"))
+
+
+def setup_logging(level: str = "INFO", fmt: str = "json", debug_sample_rate: float = 1.0,
+                  queue_size: int = 10_000, stream: Optional[TextIO] = None) -> None:
+    """
+    Configura el logger de la API: cola acotada + listener en segundo plano.
+    Llamar de nuevo reemplaza la configuración anterior.
+    """
+    global _listener, _queue_handler, _debug_sample_rate
+    shutdown_logging()
+    _debug_sample_rate = debug_sample_rate
+
+    output = logging.StreamHandler(stream if stream is not None else sys.stdout)
+    output.setFormatter(TextFormatter() if fmt == "text" else JsonFormatter())
+
+    _queue_handler = DroppingQueueHandler(queue_size)
+    _queue_handler.addFilter(ContextFilter())
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.handlers = [_queue_handler]
+    logger.setLevel(level.upper())
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, output, respect_handler_level=False)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Escribe los eventos pendientes y detiene el hilo del listener"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger(LOGGER_NAME).removeHandler(_queue_handler)
+        _queue_handler = None
+
+
+def as_dict() -> Dict[str, Any]:
+    pending = _queue_handler.queue.qsize() if _queue_handler is not None else 0
+    return {**stats, "pending": pending, "level": logging.getLevelName(logging.getLogger(LOGGER_NAME).level)}
@@ -0,0 +1,111 @@
+"""
+Pruebas del control de admisión (token buckets y límite de peticiones en curso).
+Ejecutar con: python -m pytest test_admission.py
+"""
+
+import asyncio
+
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+from admission import AdmissionMiddleware, InFlightLimiter, RateLimiter
+
+
+def test_token_bucket_allows_burst_then_refills():
+    limiter = RateLimiter(rate_per_minute=60, burst=3)
+    assert [limiter.acquire("S1", now=0) for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire("S1", now=0) == 1.0  # una ficha por segundo
+    assert limiter.acquire("S2", now=0) == 0  # las claves no comparten bucket
+    assert limiter.acquire("S1", now=0.5) == 0.5
+    assert limiter.acquire("S1", now=1.0) == 0
+    stats = limiter.as_dict()
+    assert stats["allowed_total"] == 5 and stats["rejected_total"] == 2
+
+
+def test_buckets_are_bounded_and_can_be_disabled():
+    limiter = RateLimiter(rate_per_minute=60, burst=1, max_keys=2)
+    for key in ("a", "b", "c"):
+        limiter.acquire(key, now=0)
+    assert limiter.as_dict()["keys"] == 2
+    assert limiter.acquire("a", now=0) == 0  # "a" fue desalojada y empieza lleno
+
+    disabled = RateLimiter(rate_per_minute=0, burst=10)
+    assert all(disabled.acquire("x") == 0 for _ in range(1000))
+
+
+async def _request(app, path, client="10.0.0.1", headers=()):
+    started = asyncio.get_running_loop().create_future()
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+        if not started.done():
+            started.set_result(message)
+
+    scope = {"type": "http", "path": path, "client": (client, 1), "headers": list(headers), "scheme": "http"}
+    task = asyncio.create_task(app(scope, receive, send))
+    return task, await started, messages
+
+
+def test_middleware_sheds_load_and_limits_ips():
+    release = None
+
+    async def slow_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await release.wait()
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        rejections = []
+        in_flight = InFlightLimiter(max_in_flight=2)
+        ip_limiter = RateLimiter(rate_per_minute=60, burst=4)
+        app = AdmissionMiddleware(slow_app, ip_limiter, in_flight, prefixes=("/transactions",),
+                                  long_lived_suffixes=("/events",), on_reject=rejections.append)
+
+        first, _, _ = await _request(app, "/transactions/a/status")
+        second, _, _ = await _request(app, "/transactions/b/status")
+        stream, _, _ = await _request(app, "/transactions/c/events")  # no ocupa capacidad
+        _, shed, _ = await _request(app, "/transactions/d/status")
+        assert shed["status"] == 503 and (b"retry-after", b"1") in shed["headers"]
+
+        _, limited, _ = await _request(app, "/transactions/e/status")  # quinta petición de la IP
+        assert limited["status"] == 429
+        health, exempt, _ = await _request(app, "/health")  # fuera de los prefijos
+        assert exempt["status"] == 200
+
+        release.set()
+        await asyncio.gather(first, second, stream, health)
+        assert in_flight.as_dict() == {"in_flight": 0, "peak_in_flight": 2, "max_in_flight": 2, "shed_total": 1}
+        assert rejections == ["in_flight", "ip"]
+
+    asyncio.run(scenario())
+
+
+def test_ip_limit_behind_a_proxy_uses_forwarded_client():
+    # Con --proxy-headers uvicorn reescribe scope["client"] con X-Forwarded-For antes de la app
+    async def ok_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    def build():
+        return AdmissionMiddleware(ok_app, RateLimiter(rate_per_minute=60, burst=2), InFlightLimiter(0),
+                                   prefixes=("/transactions",))
+
+    async def statuses(app):
+        codes = []
+        for client in ("181.0.0.1", "181.0.0.2", "181.0.0.3"):
+            headers = [(b"x-forwarded-for", client.encode())]
+            _, start, _ = await _request(app, "/transactions/a/status", client="10.0.0.9", headers=headers)
+            codes.append(start["status"])
+        return codes
+
+    async def scenario():
+        proxied = ProxyHeadersMiddleware(build(), trusted_hosts="10.0.0.9")
+        assert await statuses(proxied) == [200, 200, 200]  # un bucket por cliente real
+        assert await statuses(build()) == [200, 200, 429]  # sin proxy headers: un bucket para el proxy
+
+    asyncio.run(scenario())
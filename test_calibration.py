@@ -0,0 +1,41 @@
+"""
+Pruebas del motor de calibración.
+Ejecutar con: python -m pytest test_calibration.py
+"""
+
+import pandas as pd
+
+from calibration import expand_grid, sweep
+from credit_heuristic import heuristic_micro_v2_batch
+from scoring_config import merge_config
+from test_credit_heuristic import _random_rows
+
+
+def test_expand_grid_builds_cartesian_product():
+    variants = expand_grid({"max_cap": [30_000, 50_000], "weights.know_buyer": [0.1, 0.2, 0.3]})
+    assert len(variants) == 6
+    assert variants[0] == {"max_cap": 30_000, "weights": {"know_buyer": 0.1}}
+
+
+def test_sweep_matches_scoring_each_variant_separately():
+    portfolio = pd.DataFrame(_random_rows(2_000, seed=31))
+    variants = expand_grid({
+        "income_prudence": [0.12, 0.18],
+        "weights.psych_plan": [0.08, 0.12],
+        "category_thresholds": [[0.85, 0.70, 0.50, 0.30], [0.80, 0.65, 0.45, 0.25]],
+        "avg_purchase_max": [100_000, 200_000],
+    })
+    # max_cells pequeño para evaluar las variantes en varios bloques
+    results = sweep(portfolio, variants, max_cells=5_000)
+    assert len(results) == len(variants)
+
+    for i, overrides in enumerate(variants):
+        expected = heuristic_micro_v2_batch(portfolio, merge_config(overrides))
+        row = results.iloc[i]
+        shares = expected["category"].value_counts(normalize=True)
+        for category in "ABCDE":
+            assert row[f"pct_{category}"] == shares.get(category, 0.0)
+        approved = expected["category"].isin(["A", "B", "C"])
+        assert row["approval_rate"] == approved.mean()
+        assert row["exposure_total"] == round(expected["cupo_estimated"].sum(), 2)
+        assert row["exposure_approved"] == round(expected["cupo_estimated"][approved].sum(), 2)
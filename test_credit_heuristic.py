@@ -0,0 +1,167 @@
+"""
+Pruebas unitarias del modelo heurístico Micro v2.
+Ejecutar con: python -m pytest test_credit_heuristic.py
+"""
+
+import math
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from credit_heuristic import (
+    DEFAULTS_MICRO_V2, FEATURE_COLUMNS, ScoreMemo, compile_config, get_default_config,
+    heuristic_micro_v2, heuristic_micro_v2_batch, heuristic_micro_v2_fast
+)
+
+
+def _random_rows(n, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        rows.append({
+            "know_buyer": rng.randint(0, 5),
+            "buy_freq": rng.randint(0, 5),
+            "avg_purchase": rng.choice([rng.randint(1, 400_000), rng.uniform(0, 400_000), 0, -5]),
+            "psych_organized": rng.randint(1, 5),
+            "psych_plan": rng.randint(1, 5),
+            "distance_km": rng.choice([None, rng.uniform(0, 80), rng.randint(0, 60)]),
+            "address_verified": rng.random() < 0.5,
+        })
+    return rows
+
+
+def _same(a, b):
+    """Igualdad exacta, considerando NaN/None como el mismo valor ausente"""
+    if a is None or (isinstance(a, float) and math.isnan(a)):
+        return b is None or (isinstance(b, float) and math.isnan(b))
+    return a == b
+
+
+def _assert_batch_matches_scalar(rows, batch):
+    assert len(batch) == len(rows)
+    for row, (_, result) in zip(rows, batch.iterrows()):
+        expected = heuristic_micro_v2(row)
+        features = expected.pop("features")
+        for key, value in expected.items():
+            assert _same(value, result[key]), (key, row, value, result[key])
+        for key in FEATURE_COLUMNS:
+            assert _same(features[key], result[key]), (key, row, features[key], result[key])
+
+
+def test_batch_matches_scalar_bit_for_bit():
+    rows = _random_rows(5_000)
+    _assert_batch_matches_scalar(rows, heuristic_micro_v2_batch(pd.DataFrame(rows)))
+
+
+def test_batch_accepts_column_arrays_and_missing_values():
+    rows = [
+        {"know_buyer": 4, "buy_freq": 3, "avg_purchase": 75000, "psych_organized": 4,
+         "psych_plan": 3, "distance_km": 2.5, "address_verified": True},
+        {"know_buyer": None, "buy_freq": 2, "avg_purchase": 1000, "psych_organized": None,
+         "psych_plan": 5, "distance_km": None, "address_verified": False},
+        # Empates exactos de redondeo (x.xx5) en income_proxy_daily
+        {"know_buyer": 5, "buy_freq": 1, "avg_purchase": 1234.565, "psych_organized": 5,
+         "psych_plan": 5, "distance_km": 60, "address_verified": True},
+    ]
+    columns = {key: np.array([row[key] for row in rows], dtype=object) for key in rows[0]}
+    _assert_batch_matches_scalar(rows, heuristic_micro_v2_batch(columns))
+
+
+def test_batch_and_scalar_normalize_address_verified_alike():
+    base = {"know_buyer": 3, "buy_freq": 2, "avg_purchase": 40000, "psych_organized": 3,
+            "psych_plan": 4, "distance_km": 5.0}
+    values = [float("nan"), np.nan, None, 0, 1, True, False, "si"]
+    rows = [{**base, "address_verified": value} for value in values] + [dict(base)]  # el último sin la clave
+    columns = {key: np.array([row.get(key) for row in rows], dtype=object) for key in rows[0]}
+    batch = heuristic_micro_v2_batch(columns)
+
+    _assert_batch_matches_scalar(rows, batch)
+    assert list(batch["f_address_verified"]) == [0.0, 0.0, 0.0, 0.0, 1.0, 1.0, 0.0, 1.0, 0.0]
+    scorer = compile_config()
+    for row in rows:
+        assert scorer.score(row) == scorer.score_lut(row) == heuristic_micro_v2(row)
+
+
+def test_batch_preserves_dataframe_index():
+    frame = pd.DataFrame(_random_rows(3), index=["a", "b", "c"])
+    assert list(heuristic_micro_v2_batch(frame).index) == ["a", "b", "c"]
+
+
+def _assert_same_result(expected, actual):
+    assert expected.keys() == actual.keys()
+    for key, value in expected.items():
+        if key == "features":
+            assert value.keys() == actual[key].keys()
+            for name, feature in value.items():
+                assert _same(feature, actual[key][name]), (name, feature, actual[key][name])
+        else:
+            assert _same(value, actual[key]), (key, value, actual[key])
+            assert type(value) is type(actual[key]), (key, type(value), type(actual[key]))
+
+
+def _edge_rows():
+    return [
+        {},
+        {"know_buyer": float("nan"), "buy_freq": 2, "avg_purchase": "no-numérico", "distance_km": float("nan")},
+        {"know_buyer": 5, "buy_freq": 5, "avg_purchase": 1e9, "psych_organized": 5, "psych_plan": 5,
+         "distance_km": 0, "address_verified": 1},
+        {"buy_freq": 4, "avg_purchase": 1234.565, "distance_km": 51},
+        {"know_buyer": 4.0, "buy_freq": True, "avg_purchase": 5000, "psych_organized": 2,
+         "psych_plan": 9, "distance_km": 10},
+    ]
+
+
+def test_fast_path_matches_reference_implementation():
+    rows = _random_rows(5_000, seed=11) + _edge_rows()
+    custom = {**DEFAULTS_MICRO_V2, "avg_purchase_max": 50_000, "max_cap": 20_000, "min_cupo_allowed": 1_500.0}
+    for row in rows:
+        _assert_same_result(heuristic_micro_v2(row), heuristic_micro_v2_fast(row))
+        _assert_same_result(heuristic_micro_v2(row, custom), heuristic_micro_v2_fast(row, custom))
+
+
+def test_compiled_scorers_are_cached_by_content_and_immutable():
+    conf = get_default_config()
+    conf["weights"]["know_buyer"] = 0.5
+    assert DEFAULTS_MICRO_V2["weights"]["know_buyer"] == 0.18
+
+    scorer = compile_config(conf)
+    assert compile_config(get_default_config()) is compile_config()
+    assert compile_config({**conf, "weights": dict(conf["weights"])}) is scorer
+    assert scorer.version != compile_config().version
+
+    # Cambiar la configuración original no altera el scorer compilado
+    conf["weights"]["know_buyer"] = 0.9
+    assert scorer.config["weights"]["know_buyer"] == 0.5
+    with pytest.raises(AttributeError):
+        scorer.version = "otra"
+
+    row = _random_rows(1)[0]
+    assert scorer.score(row) == heuristic_micro_v2(row, scorer.config)
+
+
+def test_lookup_table_mode_matches_exact_mode():
+    custom = {**DEFAULTS_MICRO_V2, "weights": {**DEFAULTS_MICRO_V2["weights"], "psych_plan": 0.3}}
+    for scorer in (compile_config(), compile_config(custom)):
+        for row in _random_rows(20_000, seed=13) + _edge_rows():
+            _assert_same_result(scorer.score(row), scorer.score_lut(row))
+
+
+def test_score_memo_counts_hits_and_evicts_least_recently_used():
+    memo = ScoreMemo(maxsize=2)
+    scorer = compile_config()
+    first, second, third = _random_rows(3, seed=17)
+
+    result = memo.score(scorer, first)
+    result["features"]["f_know_buyer"] = -1.0  # el memo entrega copias
+    assert memo.score(scorer, first) == scorer.score(first)
+    memo.score(scorer, second)
+    memo.score(scorer, first)
+    memo.score(scorer, third)  # desaloja `second`
+    memo.score(scorer, second)
+
+    stats = memo.as_dict()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (2, 4, 2, 2)
+    assert memo.score(scorer, first, lut=True) == scorer.score(first)
+    assert ScoreMemo(maxsize=0).score(scorer, first) == scorer.score(first)
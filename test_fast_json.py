@@ -0,0 +1,48 @@
+"""
+Pruebas de las respuestas JSON rápidas.
+Ejecutar con: python -m pytest test_fast_json.py
+"""
+
+import json
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+
+from fast_json import FastJSONResponse, dumps, model_bytes
+from models import (
+    CreditResult, InitiateTransactionResponse, TransactionListResponse, TransactionStatus,
+    TransactionStatusResponse, TransactionSummary
+)
+
+RESULT = CreditResult(
+    category="B", score_conf=0.71, risk_pct=29.0, debt_capacity_pct=0.4, cupo_estimated=35000.0,
+    raw_cupo=41000.5, comp_feature=20000.0, comp_income=15000.0, features={"f_know_buyer": 0.8},
+    clients_per_day=40, income_proxy_daily=120000.0, config_version="v1"
+)
+
+
+def test_model_bytes_match_pydantic_serialization():
+    models = [
+        TransactionStatusResponse(status=TransactionStatus.COMPLETED, result=RESULT.model_dump()),
+        InitiateTransactionResponse(token="t", qr_url="https://wa.me/1?text=ñ",
+                                    expires_at=datetime(2025, 10, 18, 12, 30, 15, 123456)),
+        TransactionListResponse(items=[TransactionSummary(
+            token="t", status=TransactionStatus.PENDING, created_at=datetime(2025, 10, 18, 12, 0),
+            expires_at=datetime(2025, 10, 18, 12, 15))]),
+    ]
+    for model in models:
+        assert model_bytes(model) == model.model_dump_json().encode("utf-8")
+
+
+def test_dicts_encode_like_the_standard_response():
+    content = {
+        "status": TransactionStatus.PROCESSING,
+        "expires_at": datetime(2025, 10, 18, 12, 30, 15, 123456),
+        "result": RESULT,
+        "nested": {"ratio": 0.25, "items": [1, None, "ñ"]},
+    }
+    assert json.loads(dumps(content)) == jsonable_encoder(content)
+    response = FastJSONResponse(content, status_code=202)
+    assert response.status_code == 202
+    assert response.headers["content-type"] == "application/json"
+    assert json.loads(response.body) == jsonable_encoder(content)
@@ -0,0 +1,81 @@
+"""
+Pruebas de la deduplicación de reintentos de los webhooks.
+Ejecutar con: python -m pytest test_idempotency.py
+"""
+
+import asyncio
+import time
+
+from idempotency import REPLAY_HEADER, IdempotencyCache, webhook_key
+from models import POSWebhookRequest, WhatsAppWebhookRequest
+from storage_backends import create_backend
+
+
+def test_entries_expire_and_are_bounded():
+    cache = IdempotencyCache(maxsize=2, ttl_seconds=10)
+    cache.put("a", 200, b"a", now=0)
+    assert cache.get("a", now=5).body == b"a"
+    assert cache.get("a", now=10) is None  # vencida
+
+    cache.put("b", 202, b"b", now=20)
+    cache.put("c", 200, b"c", now=21)
+    cache.get("b", now=22)
+    cache.put("d", 200, b"d", now=23)  # desaloja "c", la menos usada
+    assert cache.get("c", now=24) is None
+    assert cache.get("b", now=24).status_code == 202
+    stats = cache.as_dict()
+    assert stats["expired"] == 1 and stats["evictions"] == 1 and stats["size"] == 2
+    assert stats["hits"] == 3 and stats["misses"] == 2
+
+
+def test_responses_are_shared_between_workers_through_sqlite(tmp_path):
+    path = str(tmp_path / "shared.db")
+    first_backend = create_backend("sqlite", 15, 60, sqlite_path=path)
+    second_backend = create_backend("sqlite", 15, 60, sqlite_path=path)
+    first = IdempotencyCache(maxsize=10, ttl_seconds=60, backend=first_backend)
+    second = IdempotencyCache(maxsize=10, ttl_seconds=60, backend=second_backend)
+
+    first.put("k", 202, b'{"ok":true}')
+    replay = second.get("k")
+    assert (replay.status_code, replay.body) == (202, b'{"ok":true}')
+    assert second.as_dict()["shared_hits"] == 1
+    assert second.get("otra") is None
+
+    # El barrido del backend borra las respuestas vencidas
+    assert second_backend.get_response("k", time.time() + 61) is None
+    second_backend.put_response("vieja", time.time() - 1, 200, b"{}")
+    second_backend.sweep(time.time())
+    assert first_backend.get_response("vieja", 0) is None
+    first_backend.close()
+    second_backend.close()
+
+
+def test_keys_from_header_or_payload():
+    payload = WhatsAppWebhookRequest(token="t1", telefono="300", psych_organized=4, psych_plan=3)
+    same = WhatsAppWebhookRequest(token="t1", telefono="300", psych_organized=4, psych_plan=3)
+    changed = WhatsAppWebhookRequest(token="t1", telefono="300", psych_organized=5, psych_plan=3)
+
+    assert webhook_key("whatsapp", "t1", None, payload) == webhook_key("whatsapp", "t1", None, same)
+    assert webhook_key("whatsapp", "t1", None, payload) != webhook_key("whatsapp", "t1", None, changed)
+    assert webhook_key("whatsapp", "t1", None, payload) != webhook_key("pos", "t1", None, payload)
+    # Con header, la clave no depende del payload pero sí del token
+    assert webhook_key("whatsapp", "t1", "k1", payload) == webhook_key("whatsapp", "t1", "k1", changed)
+    assert webhook_key("whatsapp", "t1", "k1", payload) != webhook_key("whatsapp", "t2", "k1", payload)
+
+
+def test_duplicate_delivery_replays_without_touching_the_store():
+    import main
+    from storage import create_transaction, get_status_info
+
+    token = create_transaction("S1", "Ana").token
+    request = POSWebhookRequest(token=token, cedula_cliente="1", nombre_cliente="Juan", know_buyer=4,
+                                buy_freq=3, avg_purchase=75000)
+
+    first = asyncio.run(main.pos_webhook(request, None))
+    version = get_status_info(token).version
+    replay = asyncio.run(main.pos_webhook(request, None))
+
+    assert replay.status_code == first.status_code == 200
+    assert replay.body == first.body
+    assert replay.headers[REPLAY_HEADER] == "true"
+    assert get_status_info(token).version == version
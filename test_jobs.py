@@ -0,0 +1,100 @@
+"""
+Pruebas de la cola de trabajos en segundo plano.
+Ejecutar con: python -m pytest test_jobs.py
+"""
+
+import asyncio
+
+import pytest
+
+from jobs import JobQueue, QueueFull
+
+
+def test_retries_then_calls_on_failure():
+    async def scenario():
+        queue = JobQueue(maxsize=10, workers=2, max_retries=2, retry_backoff_seconds=0)
+        queue.start()
+        attempts = {"flaky": 0, "broken": 0}
+        failures = []
+
+        def flaky():
+            attempts["flaky"] += 1
+            if attempts["flaky"] < 2:
+                raise RuntimeError("falla transitoria")
+
+        def broken():
+            attempts["broken"] += 1
+            raise RuntimeError("falla permanente")
+
+        queue.submit("flaky", flaky, on_failure=failures.append)
+        queue.submit("broken", broken, on_failure=failures.append)
+        await queue.stop()
+        return queue, attempts, failures
+
+    queue, attempts, failures = asyncio.run(scenario())
+    assert attempts == {"flaky": 2, "broken": 3}
+    assert [str(error) for error in failures] == ["falla permanente"]
+    stats = queue.as_dict()
+    assert stats["completed_total"] == 1
+    assert stats["failed_total"] == 1
+    assert stats["retried_total"] == 3
+    assert stats["depth"] == 0
+    assert not stats["running"]
+
+
+@pytest.mark.parametrize("executor", ["thread", "asyncio"])
+def test_bounded_depth_rejects_when_full(executor):
+    async def scenario():
+        queue = JobQueue(maxsize=2, workers=1, executor=executor)
+        queue.start()
+        done = []
+
+        # Sin ceder el event loop ningún worker toma trabajos: la cola se llena
+        queue.submit("a", done.append, "a")
+        queue.submit("b", done.append, "b")
+        with pytest.raises(QueueFull):
+            queue.submit("c", done.append, "c")
+        assert queue.depth == 2
+        await queue.stop()
+        return queue, done
+
+    queue, done = asyncio.run(scenario())
+    assert done == ["a", "b"]
+    stats = queue.as_dict()
+    assert stats["submitted_total"] == 2
+    assert stats["rejected_total"] == 1
+    assert stats["depth"] == 0
+    assert stats["latency_ms"]["max"] >= stats["latency_ms"]["p50"] >= 0
+
+
+def test_submit_requires_started_queue():
+    with pytest.raises(RuntimeError):
+        JobQueue().submit("x", print)
+
+
+@pytest.mark.parametrize("executor", ["thread", "asyncio"])
+def test_async_jobs_keep_context_in_blocking_steps(executor):
+    import threading
+
+    from structured_logging import correlation_id, set_token
+
+    async def scenario():
+        queue = JobQueue(maxsize=10, workers=1, executor=executor)
+        queue.start()
+        seen = []
+
+        def blocking_step():
+            seen.append((correlation_id.get(), threading.current_thread().name.startswith("job-worker")))
+
+        async def job():
+            await asyncio.sleep(0)
+            await queue.run_blocking(blocking_step)
+
+        set_token("tok-async")
+        queue.submit("async", job)
+        await queue.stop()
+        return queue, seen
+
+    queue, seen = asyncio.run(scenario())
+    assert seen == [("tok-async", executor == "thread")]
+    assert queue.as_dict()["completed_total"] == 1
@@ -0,0 +1,97 @@
+"""
+Pruebas de las métricas en formato de Prometheus.
+Ejecutar con: python -m pytest test_metrics.py
+"""
+
+import asyncio
+
+from metrics import Registry, admission_rejections, record_rejection, registry, shed_requests, status_transitions
+from models import TransactionStatus
+from storage_backends import InMemoryBackend
+
+
+def test_histogram_buckets_are_cumulative_and_labels_escaped():
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latencia", ("stage",), buckets=(0.1, 1.0))
+    child = histogram.labels('a"b')
+    for value in (0.05, 0.1, 0.5, 3.0):
+        child.observe(value)
+    counter = registry.counter("events_total", "Eventos")
+    counter.inc()
+    counter.inc(2)
+    registry.gauge("size_bytes", "Tamaño", lambda: 42)
+    registry.gauge("missing", "Sin dato", lambda: None)
+
+    text = registry.render().decode()
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{stage="a\\"b",le="0.1"} 2' in text  # le es inclusivo
+    assert 'latency_seconds_bucket{stage="a\\"b",le="1.0"} 3' in text
+    assert 'latency_seconds_bucket{stage="a\\"b",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{stage="a\\"b"} 4' in text
+    assert 'latency_seconds_sum{stage="a\\"b"} 3.65' in text
+    assert 'events_total 3.0' in text
+    assert 'size_bytes 42.0' in text
+    assert 'missing' not in text
+    assert histogram.labels('a"b') is child
+
+
+def test_backend_reports_each_status_transition():
+    backend = InMemoryBackend(ttl_minutes=15, retention_seconds=60)
+    seen = []
+    backend.add_transition_listener(lambda old, new: seen.append((old, new)))
+
+    token = backend.create_transaction("S1", "Ana").token
+    backend.compare_and_set(token, {TransactionStatus.PENDING}, TransactionStatus.CLIENT_DATA_RECEIVED)
+    backend.update_transaction(token, tendero_name="Ana María")  # sin cambio de estado
+    backend.compare_and_set(token, {TransactionStatus.PENDING}, TransactionStatus.PROCESSING)  # no gana
+
+    assert seen == [
+        (None, TransactionStatus.PENDING),
+        (TransactionStatus.PENDING, TransactionStatus.CLIENT_DATA_RECEIVED),
+    ]
+    assert backend.memory_bytes() > 0
+
+
+def test_metrics_endpoint_reports_route_templates():
+    import main
+    from storage import create_transaction
+
+    async def get(path):
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": path, "raw_path": path.encode(),
+                 "query_string": b"", "headers": [], "client": ("127.0.0.1", 1), "server": ("test", 80),
+                 "scheme": "http", "http_version": "1.1", "root_path": ""}
+        await main.app(scope, receive, send)
+        return messages[0]["status"], b"".join(m.get("body", b"") for m in messages[1:])
+
+    created = status_transitions.value("none", "pending")
+    token = create_transaction("S1", "Ana").token
+    assert asyncio.run(get(f"/transactions/{token}/status"))[0] == 200
+    status_code, body = asyncio.run(get("/metrics"))
+
+    text = body.decode()
+    assert status_code == 200
+    assert 'route="/transactions/{token}/status",status="200"' in text
+    assert token not in text
+    assert 'confianza_stage_duration_seconds_count{stage="storage_write"}' in text
+    assert status_transitions.value("none", "pending") == created + 1
+    assert "confianza_transactions_storage_bytes" in text
+
+
+def test_admission_rejections_are_exported_as_counters():
+    shed = shed_requests.value()
+    ip = admission_rejections.value("ip")
+    record_rejection("in_flight")
+    record_rejection("ip")
+
+    text = registry.render().decode()
+    assert shed_requests.value() == shed + 1 and admission_rejections.value("ip") == ip + 1
+    assert "# TYPE confianza_shed_requests_total counter" in text
+    assert 'confianza_admission_rejections_total{reason="ip"}' in text
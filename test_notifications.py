@@ -0,0 +1,53 @@
+"""
+Pruebas de las notificaciones de cambios para SSE y long-poll.
+Ejecutar con: python -m pytest test_notifications.py
+"""
+
+import asyncio
+import threading
+
+from models import TransactionStatus
+from notifications import StatusNotifier
+from storage_backends import InMemoryBackend
+
+
+def test_backend_changes_wake_waiters_from_other_threads():
+    backend = InMemoryBackend(ttl_minutes=15, retention_seconds=600)
+    notifier = StatusNotifier()
+    backend.add_change_listener(notifier.notify)
+    token = backend.create_transaction("T1", "Tendero").token
+
+    async def scenario():
+        notifier.bind(asyncio.get_running_loop())
+        future = notifier.watch(token)
+        other = notifier.watch("otro-token")
+        # El cambio llega desde un hilo, como desde un worker de la cola de trabajos
+        worker = threading.Thread(
+            target=backend.compare_and_set,
+            args=(token, {TransactionStatus.PENDING}, TransactionStatus.CLIENT_DATA_RECEIVED)
+        )
+        worker.start()
+        changed = await notifier.wait(future, timeout=2)
+        worker.join()
+        timed_out = not await notifier.wait(other, timeout=0.05)
+        notifier.unwatch(token, future)
+        notifier.unwatch("otro-token", other)
+        return changed, timed_out
+
+    changed, timed_out = asyncio.run(scenario())
+    assert changed and timed_out
+    stats = notifier.as_dict()
+    assert stats["wakeups_total"] == 1
+    assert stats["waiters"] == 0 and stats["watched_tokens"] == 0
+
+
+def test_only_applied_changes_notify():
+    backend = InMemoryBackend(ttl_minutes=15, retention_seconds=600)
+    notified = []
+    backend.add_change_listener(notified.append)
+    token = backend.create_transaction("T1", "Tendero").token
+
+    assert not backend.compare_and_set(token, {TransactionStatus.PROCESSING}, TransactionStatus.COMPLETED)
+    assert backend.update_transaction(token, store_id="T2")
+    assert backend.sweep(float("inf")) == (1, 0)
+    assert notified == [token, token]
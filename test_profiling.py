@@ -0,0 +1,106 @@
+"""
+Pruebas del perfilado bajo demanda (CPU por petición y snapshots de memoria).
+Ejecutar con: python -m pytest test_profiling.py
+"""
+
+import asyncio
+import pstats
+import time
+
+from profiling import FILE_HEADER, MemoryProfiler, ProfileStore, ProfilingMiddleware
+
+
+def busy_handler():
+    deadline = time.perf_counter() + 0.03
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def app(scope, receive, send):
+    busy_handler()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def _call(middleware, headers):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/transactions/abc/status", "headers": headers}
+    asyncio.run(middleware(scope, None, send))
+    return dict(messages[0]["headers"])
+
+
+def test_requests_are_profiled_only_with_header_and_token(tmp_path):
+    store = ProfileStore(str(tmp_path), max_files=1)
+    middleware = ProfilingMiddleware(app, store, token="secreto", sample_interval_seconds=0.001)
+
+    assert FILE_HEADER not in _call(middleware, [])
+    assert FILE_HEADER not in _call(middleware, [(b"x-profile", b"cpu")])  # sin token
+    without_token = ProfilingMiddleware(app, store, token="")
+    assert FILE_HEADER not in _call(without_token, [(b"x-profile", b"cpu"), (b"x-profile-token", b"")])
+
+    headers = _call(middleware, [(b"x-profile", b"cpu"), (b"x-profile-token", b"secreto")])
+    name = headers[FILE_HEADER].decode()
+    assert name.endswith(".prof") and "transactions_abc_status" in name
+    functions = {function for _, _, function in pstats.Stats(str(tmp_path / name)).stats}
+    assert "busy_handler" in functions
+
+    headers = _call(middleware, [(b"x-profile", b"sample"), (b"x-profile-token", b"secreto")])
+    collapsed = (tmp_path / headers[FILE_HEADER].decode()).read_text()
+    assert "busy_handler (test_profiling.py" in collapsed
+    assert store.files() == [headers[FILE_HEADER].decode()]  # max_files=1 borra el anterior
+
+
+def test_memory_snapshot_attributes_allocations_to_project_modules(tmp_path):
+    from storage_backends import InMemoryBackend
+
+    profiler = MemoryProfiler(str(tmp_path), frames=10)
+    started = profiler.start()
+    try:
+        profiler.snapshot(limit=5)
+        backend = InMemoryBackend(ttl_minutes=15, retention_seconds=60)
+        for i in range(500):
+            backend.create_transaction(f"S{i}", "Ana")
+        result = profiler.snapshot(limit=50, save=True)
+    finally:
+        if started:
+            profiler.stop()
+
+    modules = {entry["module"]: entry["bytes"] for entry in result["by_module"]}
+    assert modules.get("storage_backends", 0) + modules.get("records", 0) > 50_000
+    assert result["diff"] and (tmp_path / result["file"]).exists()
+
+
+def test_memory_endpoints_require_the_profiling_token(monkeypatch):
+    import pytest
+    from fastapi import HTTPException
+    from starlette.requests import Request
+
+    import config
+    import main
+
+    monkeypatch.setattr(config, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(config, "PROFILING_TOKEN", "secreto")
+    monkeypatch.setattr(config, "FAST_JSON_RESPONSES", False)
+
+    def request(token=None):
+        headers = [(b"x-profile-token", token.encode())] if token else []
+        return Request({"type": "http", "method": "POST", "path": "/admin/memory/stop", "headers": headers})
+
+    for token in (None, "otro"):
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(main.memory_snapshot(request(token), limit=5, save=False))
+        assert error.value.status_code == 403
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(main.stop_memory_tracing(request(token)))
+        assert error.value.status_code == 403
+    assert asyncio.run(main.stop_memory_tracing(request("secreto"))) == {"tracemalloc": False}
+
+    # Perfilado habilitado sin PROFILING_TOKEN: los endpoints se rechazan
+    monkeypatch.setattr(config, "PROFILING_TOKEN", "")
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(main.memory_snapshot(request(""), limit=5, save=False))
+    assert error.value.status_code == 503
@@ -0,0 +1,67 @@
+"""
+Pruebas del CLI de re-scoring masivo.
+Ejecutar con: python -m pytest test_rescore.py
+"""
+
+import csv
+import json
+
+from credit_heuristic import DEFAULTS_MICRO_V2, config_version, heuristic_micro_v2
+from rescore import RESULT_COLUMNS, rescore
+from test_credit_heuristic import _random_rows
+
+
+def _write_ndjson(path, rows):
+    with open(path, "w") as f:
+        for i, row in enumerate(rows):
+            f.write(json.dumps({"id": i, **row}) + "\n")
+        f.write("esto no es json\n")
+
+
+def _assert_rows_match_scalar(rows, output_rows):
+    assert len(output_rows) == len(rows)
+    for row, output in zip(rows, output_rows):
+        expected = heuristic_micro_v2(row)
+        for key in RESULT_COLUMNS[1:]:
+            assert float(output[key]) == expected[key], (key, row, output[key], expected[key])
+        assert output["category"] == expected["category"]
+        assert output["config_version"] == config_version(DEFAULTS_MICRO_V2)
+
+
+def test_rescore_ndjson_matches_scalar_model(tmp_path):
+    rows = _random_rows(1_000, seed=21)
+    _write_ndjson(tmp_path / "input.ndjson", rows)
+
+    summary = rescore(str(tmp_path / "input.ndjson"), str(tmp_path / "output.ndjson"),
+                      chunk_size=150, workers=2, progress_seconds=0)
+    assert (summary["rows"], summary["invalid"], summary["done"]) == (1_000, 1, True)
+
+    with open(tmp_path / "output.ndjson") as f:
+        output_rows = [json.loads(line) for line in f]
+    assert [row["id"] for row in output_rows] == list(range(1_000))
+    _assert_rows_match_scalar(rows, output_rows)
+
+
+def test_rescore_csv_resumes_from_checkpoint(tmp_path):
+    rows = _random_rows(500, seed=22)
+    with open(tmp_path / "input.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({**row, "distance_km": "" if row["distance_km"] is None else row["distance_km"]})
+    paths = (str(tmp_path / "input.csv"), str(tmp_path / "output.csv"))
+
+    first = rescore(*paths, chunk_size=60, workers=0, max_chunks=3, progress_seconds=0)
+    assert (first["rows"], first["done"]) == (180, False)
+    # Escritura parcial de un chunk que no alcanzó a registrarse en el checkpoint
+    with open(paths[1], "a") as f:
+        f.write("fila,incompleta")
+
+    second = rescore(*paths, chunk_size=60, workers=0, progress_seconds=0)
+    assert (second["rows"], second["rows_this_run"], second["resumed"], second["done"]) == (
+        len(rows), len(rows) - 180, True, True
+    )
+
+    with open(paths[1], newline="") as f:
+        output_rows = list(csv.DictReader(f))
+    _assert_rows_match_scalar(rows, output_rows)
@@ -0,0 +1,101 @@
+"""
+Pruebas de la recarga en caliente de la configuración de scoring.
+Ejecutar con: python -m pytest test_scoring_config.py
+"""
+
+import asyncio
+import json
+import os
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import config
+import main
+import storage
+from credit_heuristic import compile_config
+from models import ClientData, StoreValidation, Transaction, TransactionStatus
+from scoring_config import ScoringConfigSource
+
+
+def _write(path, content):
+    path.write_text(content if isinstance(content, str) else json.dumps(content))
+    # Asegura un mtime distinto aunque el sistema de archivos tenga baja resolución
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_reloads_when_file_changes_and_keeps_previous_on_error(tmp_path):
+    path = tmp_path / "scoring.json"
+    _write(path, {"max_cap": 30_000, "weights": {"know_buyer": 0.2}})
+    source = ScoringConfigSource(str(path), check_interval_seconds=0)
+
+    first = source.current()
+    assert first.config["max_cap"] == 30_000
+    assert first.config["weights"]["know_buyer"] == 0.2
+    assert first.config["weights"]["buy_freq"] == 0.20  # valor por defecto conservado
+    assert source.current() is first
+
+    _write(path, {"max_cap": 40_000})
+    second = source.current()
+    assert second.version != first.version
+    assert second.config["max_cap"] == 40_000
+
+    _write(path, "{no es json")
+    assert source.current() is second
+    _write(path, {"clave_desconocida": 1})
+    assert source.current() is second
+    assert source.as_dict()["reload_errors_total"] == 2
+
+    _write(path, {})
+    assert source.current() is compile_config()
+    assert source.as_dict()["last_error"] is None
+
+
+def test_without_path_uses_defaults():
+    source = ScoringConfigSource("")
+    assert source.current() is compile_config()
+    assert not source.reload(force=True)
+
+
+def test_reload_endpoint_requires_admin_token(monkeypatch, tmp_path):
+    path = tmp_path / "scoring.json"
+    _write(path, {})
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "secreto")
+    monkeypatch.setattr(main, "scoring_config", ScoringConfigSource(str(path)))
+
+    def request(token=None):
+        headers = [(b"x-admin-token", token.encode())] if token else []
+        return Request({"type": "http", "method": "POST", "path": "/admin/scoring/reload", "headers": headers})
+
+    for token in (None, "otro"):
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(main.reload_scoring_config(request(token)))
+        assert error.value.status_code == 403
+    assert "changed" in asyncio.run(main.reload_scoring_config(request("secreto")))
+
+    # Sin ADMIN_TOKEN el endpoint queda deshabilitado
+    monkeypatch.setattr(config, "ADMIN_TOKEN", "")
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(main.reload_scoring_config(request("secreto")))
+    assert error.value.status_code == 503
+
+
+def test_scoring_error_keeps_the_config_version(monkeypatch):
+    class FailingMemo:
+        def score(self, *args, **kwargs):
+            raise ValueError("fallo del modelo")
+
+    monkeypatch.setattr(storage, "score_memo", FailingMemo())
+    transaction = Transaction(
+        token="t1", status=TransactionStatus.PROCESSING, expires_at=datetime.now(),
+        client_data=ClientData(telefono="3000000000", psych_organized=4, psych_plan=3),
+        store_validation=StoreValidation(cedula_cliente="1", nombre_cliente="Ana", know_buyer=4, buy_freq=3,
+                                         avg_purchase=75000, distance_km=2.5, address_verified=True)
+    )
+
+    result = storage.calculate_credit_score(transaction)
+    assert result.category == "E"
+    assert result.config_version == storage.scoring_config.current().version
@@ -0,0 +1,105 @@
+"""
+Pruebas del ejecutor de scoring con micro-batching.
+Ejecutar con: python -m pytest test_scoring_executor.py
+"""
+
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from credit_heuristic import DEFAULT_SCORER, compile_config
+from scoring_config import merge_config
+from scoring_executor import VECTORIZE_MIN_ROWS, ScoringExecutor
+
+
+def _rows(n, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        rows.append({
+            "know_buyer": rng.randint(0, 5),
+            "buy_freq": rng.randint(0, 5),
+            "avg_purchase": round(rng.uniform(1_000, 600_000), 2),
+            "psych_organized": rng.randint(1, 5),
+            "psych_plan": rng.randint(1, 5),
+            "distance_km": rng.choice([None, 0.0, round(rng.uniform(0, 80), 2)]),
+            "address_verified": rng.choice([None, True, False]),
+        })
+    return rows
+
+
+@pytest.mark.parametrize("pool", ["thread", "process"])
+def test_concurrent_calls_are_batched_and_match_scalar(pool):
+    rows = _rows(400)
+    executor = ScoringExecutor(window_ms=20, max_batch=64, pool=pool)
+    try:
+        with ThreadPoolExecutor(max_workers=16) as callers:
+            results = list(callers.map(lambda row: executor.score(DEFAULT_SCORER, row), rows))
+    finally:
+        executor.close()
+
+    assert results == [DEFAULT_SCORER.score(row) for row in rows]
+    stats = executor.as_dict()
+    assert stats["rows_total"] == len(rows)
+    assert stats["batches_total"] < len(rows)
+    assert 1 < stats["max_batch_size"] <= 64
+
+
+def test_batch_with_mixed_config_versions():
+    other = compile_config(merge_config({"max_cap": 20_000, "weights": {"know_buyer": 0.3}}))
+    rows = _rows(50, seed=11)
+    executor = ScoringExecutor(window_ms=50, max_batch=200)
+    try:
+        futures = [executor.submit(DEFAULT_SCORER if i % 2 else other, row) for i, row in enumerate(rows)]
+        results = [future.result() for future in futures]
+    finally:
+        executor.close()
+
+    expected = [(DEFAULT_SCORER if i % 2 else other).score(row) for i, row in enumerate(rows)]
+    assert results == expected
+
+
+@pytest.mark.parametrize("pool", ["thread", "process"])
+def test_large_batches_use_vectorized_path(pool):
+    rows = _rows(VECTORIZE_MIN_ROWS + 44, seed=3)
+    executor = ScoringExecutor(window_ms=500, max_batch=len(rows), pool=pool)
+    try:
+        futures = [executor.submit(DEFAULT_SCORER, row) for row in rows]
+        results = [future.result() for future in futures]
+    finally:
+        executor.close()
+
+    assert executor.as_dict()["max_batch_size"] == len(rows)
+    assert results == [DEFAULT_SCORER.score(row) for row in rows]
+
+
+def test_credit_closes_share_a_batch_without_blocking_the_loop(monkeypatch):
+    import asyncio
+    from datetime import datetime
+
+    import storage
+    from models import ClientData, StoreValidation, Transaction, TransactionStatus
+
+    def transaction(i):
+        return Transaction(
+            token=f"t{i}", status=TransactionStatus.PROCESSING, expires_at=datetime.now(),
+            client_data=ClientData(telefono="3000000000", psych_organized=1 + i % 5, psych_plan=3),
+            store_validation=StoreValidation(cedula_cliente=str(i), nombre_cliente="Ana", know_buyer=4,
+                                             buy_freq=3, avg_purchase=50_000 + i, distance_km=2.5,
+                                             address_verified=True)
+        )
+
+    transactions = [transaction(i) for i in range(20)]
+    executor = ScoringExecutor(window_ms=50, max_batch=64)
+    monkeypatch.setattr(storage, "scoring_executor", executor)
+    try:
+        async def close_all():
+            return await asyncio.gather(*(storage.calculate_credit_score_batched(t) for t in transactions))
+        results = asyncio.run(close_all())
+    finally:
+        executor.close()
+
+    # Las 20 esperas comparten el lote: ninguna bloqueó el event loop durante la ventana
+    assert executor.as_dict()["batches_total"] == 1
+    assert results == [storage.calculate_credit_score(t) for t in transactions]
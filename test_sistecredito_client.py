@@ -0,0 +1,166 @@
+"""
+Pruebas del cliente de Sistecrédito contra el stub local.
+Ejecutar con: python -m pytest test_sistecredito_client.py
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from sistecredito_client import CircuitBreaker, CircuitOpenError, SistecreditoClient, SistecreditoError
+from sistecredito_stub import StubSettings, create_app, start_in_thread
+
+
+@pytest.fixture
+def stub():
+    settings = StubSettings(seed=1)
+    app = create_app(settings)
+    url, stop = start_in_thread(app)
+    yield url, settings, app.state.stats
+    stop()
+
+
+def _payload(i):
+    return {"reference": f"token-{i}", "category": "A", "cupo_estimated": 50000.0}
+
+
+def _run(client, coro):
+    async def scenario():
+        try:
+            return await coro
+        finally:
+            await client.close()
+    return asyncio.run(scenario())
+
+
+def test_concurrent_registrations_reuse_pooled_connections(stub):
+    url, settings, stats = stub
+    settings.latency_ms = 5
+    client = SistecreditoClient(url, max_connections=4)
+
+    async def register_all():
+        return await asyncio.gather(*(client.register(_payload(i)) for i in range(40)))
+
+    results = _run(client, register_all())
+    assert [result["reference"] for result in results] == [f"token-{i}" for i in range(40)]
+    pool = client.as_dict()["pool"]
+    assert pool["opened_total"] <= 4
+    assert pool["reused_total"] >= 36
+    assert stats["registrations"] == 40
+
+
+def test_retries_then_opens_the_circuit_and_recovers(stub):
+    url, settings, stats = stub
+    settings.failure_rate = 1.0
+    client = SistecreditoClient(url, max_retries=2, backoff_base_seconds=0.001,
+                                breaker_threshold=2, breaker_reset_seconds=0.2)
+
+    async def scenario():
+        for i in range(2):
+            with pytest.raises(SistecreditoError):
+                await client.register(_payload(i))
+        assert stats["requests"] == 6  # 2 llamadas x 3 intentos
+        with pytest.raises(CircuitOpenError):
+            await client.register(_payload(2))
+        assert stats["requests"] == 6  # abierto: no se llama al upstream
+
+        settings.failure_rate = 0.0
+        await asyncio.sleep(0.25)
+        assert (await client.register(_payload(3)))["status"] == "registered"  # llamada de prueba
+        return client.as_dict()
+
+    result = _run(client, scenario())
+    assert result["breaker"] == {"state": "closed", "consecutive_failures": 0, "opened_total": 1}
+    assert result["retries_total"] == 4
+    assert result["rejected_open_total"] == 1
+
+
+def test_timeouts_are_bounded(stub):
+    url, settings, _ = stub
+    settings.hang_rate, settings.hang_seconds = 1.0, 2.0
+    client = SistecreditoClient(url, timeout_seconds=0.1, max_retries=1, backoff_base_seconds=0.001)
+
+    started = time.perf_counter()
+    with pytest.raises(SistecreditoError, match="Timeout"):
+        _run(client, client.register(_payload(0)))
+    assert time.perf_counter() - started < 1.0
+
+
+def test_concurrent_registrations_are_batched(stub):
+    url, _, stats = stub
+    client = SistecreditoClient(url, batch_max_size=8, batch_window_ms=20)
+
+    async def register_all():
+        return await asyncio.gather(*(client.register(_payload(i)) for i in range(20)))
+
+    results = _run(client, register_all())
+    assert [result["reference"] for result in results] == [f"token-{i}" for i in range(20)]
+    assert stats["batches"] == 3  # 8 + 8 + 4
+    assert stats["registrations"] == 20
+
+
+def test_breaker_allows_a_single_probe_after_reset():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_seconds=10)
+    breaker.record_failure(now=0)
+    assert breaker.allow(now=0)
+    breaker.record_failure(now=1)
+    assert not breaker.allow(now=5)
+    assert breaker.allow(now=11)  # prueba
+    assert not breaker.allow(now=11)  # solo una prueba a la vez
+    breaker.record_failure(now=12)
+    assert breaker.state == "open" and not breaker.allow(now=13)
+
+
+def test_cancelled_half_open_probe_releases_the_breaker(stub):
+    url, settings, _ = stub
+    settings.failure_rate = 1.0
+    client = SistecreditoClient(url, max_retries=0, breaker_threshold=1, breaker_reset_seconds=0.05)
+
+    async def scenario():
+        with pytest.raises(SistecreditoError):
+            await client.register(_payload(0))
+        assert client.breaker.state == "open"
+        await asyncio.sleep(0.1)
+
+        settings.failure_rate, settings.hang_rate, settings.hang_seconds = 0.0, 1.0, 2.0
+        probe = asyncio.create_task(client.register(_payload(1)))
+        await asyncio.sleep(0.05)
+        assert client.breaker.state == "half_open"
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        settings.hang_rate = 0.0
+        return await client.register(_payload(2))  # nueva prueba: el breaker no quedó tomado
+
+    assert _run(client, scenario())["status"] == "registered"
+    assert client.breaker.state == "closed"
+
+
+def test_call_admitted_while_closed_does_not_release_the_probe(stub):
+    url, settings, _ = stub
+    settings.hang_rate, settings.hang_seconds = 1.0, 2.0
+    client = SistecreditoClient(url, timeout_seconds=5, max_retries=0, breaker_threshold=1,
+                                breaker_reset_seconds=0.05)
+
+    async def scenario():
+        earlier = asyncio.create_task(client.register(_payload(0)))  # admitida con el breaker cerrado
+        await asyncio.sleep(0.05)
+        client.breaker.record_failure()  # otra llamada abrió el breaker
+        await asyncio.sleep(0.1)
+        probe = asyncio.create_task(client.register(_payload(1)))
+        await asyncio.sleep(0.05)
+        assert client.breaker.state == "half_open"
+
+        earlier.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await earlier
+        assert client.breaker.allow() is None  # la prueba sigue tomada: no hay una segunda
+
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        return client.breaker.allow()
+
+    assert _run(client, scenario()) == CircuitBreaker.PROBE
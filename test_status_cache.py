@@ -0,0 +1,35 @@
+"""
+Pruebas del caché de respuestas de estado y de la comparación de ETags.
+Ejecutar con: python -m pytest test_status_cache.py
+"""
+
+from status_cache import StatusCache, etag_for, etag_matches
+
+
+def test_entries_are_invalidated_by_version_and_bounded():
+    cache = StatusCache(maxsize=2)
+    cache.put("a", 1, b'{"status":"pending"}')
+    assert cache.get("a", 1) == b'{"status":"pending"}'
+    assert cache.get("a", 2) is None
+
+    cache.put("b", 1, b"b")
+    cache.get("a", 1)
+    cache.put("c", 1, b"c")  # desaloja "b", el menos usado
+    assert cache.get("b", 1) is None
+    assert cache.get("c", 1) == b"c"
+    stats = cache.as_dict()
+    assert stats["evictions"] == 1 and stats["size"] == 2
+    assert stats["hits"] == 3 and stats["misses"] == 2
+    cache.record_not_modified()
+    assert cache.as_dict()["not_modified"] == 1
+
+
+def test_if_none_match():
+    etag = etag_for(42)
+    assert etag == '"42"'
+    assert etag_matches('"42"', etag)
+    assert etag_matches('W/"42"', etag)
+    assert etag_matches('"7", "42"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"41"', etag)
+    assert not etag_matches(None, etag)
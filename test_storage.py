@@ -0,0 +1,272 @@
+"""
+Pruebas unitarias del almacén de transacciones (sin servidor).
+Ejecutar con: python -m pytest test_storage.py
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from models import ClientData, CreditResult, StoreValidation, Transaction, TransactionStatus
+from expiry import ExpirySweeper
+from journal import TransactionJournal
+from records import TransactionRecord
+from storage_backends import create_backend
+
+RETENTION_SECONDS = 600.0
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    backend = create_backend(
+        request.param,
+        ttl_minutes=15,
+        retention_seconds=RETENTION_SECONDS,
+        sqlite_path=str(tmp_path / "transactions.db")
+    )
+    yield backend
+    backend.close()
+
+
+def test_create_get_update(backend):
+    transaction = backend.create_transaction("TIENDA_001", "María")
+    assert backend.is_token_valid(transaction.token)
+    assert not backend.is_token_valid("token-invalido")
+
+    client_data = ClientData(telefono="3001234567", psych_organized=4, psych_plan=3)
+    assert backend.update_transaction(
+        transaction.token, client_data=client_data, status=TransactionStatus.CLIENT_DATA_RECEIVED
+    )
+    assert not backend.update_transaction("token-invalido", status=TransactionStatus.ERROR)
+
+    stored = backend.get_transaction(transaction.token)
+    assert stored.status == TransactionStatus.CLIENT_DATA_RECEIVED
+    assert stored.client_data == client_data
+    assert backend.count() == 1
+
+
+def test_status_version_changes_with_every_applied_change(backend):
+    token = backend.create_transaction("TIENDA_001", "María").token
+    info = backend.get_status_info(token)
+    assert info.status == TransactionStatus.PENDING
+    assert abs((info.expires_at - backend.get_transaction(token).expires_at).total_seconds()) < 1e-3
+    assert backend.get_status_info("token-invalido") is None
+
+    versions = [info.version]
+    backend.update_transaction(token, store_id="TIENDA_002")
+    versions.append(backend.get_status_info(token).version)
+    assert not backend.compare_and_set(token, {TransactionStatus.PROCESSING}, TransactionStatus.COMPLETED)
+    assert backend.get_status_info(token).version == versions[-1]
+    backend.compare_and_set(token, {TransactionStatus.PENDING}, TransactionStatus.PROCESSING)
+    info = backend.get_status_info(token)
+    versions.append(info.version)
+    assert info.status == TransactionStatus.PROCESSING
+    assert len(set(versions)) == 3
+
+
+def test_sweep_marks_waiting_transactions_expired(backend):
+    transaction = backend.create_transaction("TIENDA_001", "María")
+    deadline = transaction.expires_at.timestamp()
+
+    assert backend.sweep(now=deadline - 1) == (0, 0)
+    assert backend.sweep(now=deadline) == (1, 0)
+    assert backend.get_transaction(transaction.token).status == TransactionStatus.EXPIRED
+
+
+def test_sweep_evicts_finished_transactions_after_retention(backend):
+    transaction = backend.create_transaction("TIENDA_001", "María")
+    backend.update_transaction(transaction.token, status=TransactionStatus.COMPLETED)
+    evict_at = time.time() + RETENTION_SECONDS
+
+    backend.sweep(now=evict_at - 1)
+    assert backend.get_transaction(transaction.token).status == TransactionStatus.COMPLETED
+
+    assert backend.sweep(now=evict_at + 1) == (0, 1)
+    assert backend.get_transaction(transaction.token) is None
+    assert backend.count() == 0
+
+
+def test_processing_transactions_are_not_expired(backend):
+    transaction = backend.create_transaction("TIENDA_001", "María")
+    backend.update_transaction(transaction.token, status=TransactionStatus.PROCESSING)
+
+    backend.sweep(now=transaction.expires_at.timestamp() + 1)
+    assert backend.get_transaction(transaction.token).status == TransactionStatus.PROCESSING
+
+
+def test_sqlite_state_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "shared.db")
+    first = create_backend("sqlite", 15, RETENTION_SECONDS, sqlite_path=path)
+    second = create_backend("sqlite", 15, RETENTION_SECONDS, sqlite_path=path)
+
+    transaction = first.create_transaction("TIENDA_001", "María")
+    second.update_transaction(transaction.token, status=TransactionStatus.COMPLETED)
+    assert first.get_transaction(transaction.token).status == TransactionStatus.COMPLETED
+
+    first.close()
+    second.close()
+
+
+def test_compare_and_set_applies_only_from_expected_status(backend):
+    transaction = backend.create_transaction("TIENDA_001", "María")
+    token = transaction.token
+
+    assert not backend.compare_and_set(token, {TransactionStatus.CLIENT_DATA_RECEIVED}, TransactionStatus.PROCESSING)
+    assert backend.compare_and_set(token, {TransactionStatus.PENDING}, TransactionStatus.CLIENT_DATA_RECEIVED)
+    assert backend.compare_and_set(token, {TransactionStatus.CLIENT_DATA_RECEIVED}, TransactionStatus.PROCESSING)
+    assert not backend.compare_and_set(token, {TransactionStatus.CLIENT_DATA_RECEIVED}, TransactionStatus.PROCESSING)
+    assert not backend.compare_and_set("token-invalido", {TransactionStatus.PENDING}, TransactionStatus.ERROR)
+    assert backend.get_transaction(token).status == TransactionStatus.PROCESSING
+
+
+def test_sweeper_runs_sweep_off_the_event_loop():
+    async def scenario():
+        loop_thread = threading.get_ident()
+        threads = []
+        swept = asyncio.Event()
+
+        def sweep_fn():
+            threads.append(threading.get_ident())
+            loop.call_soon_threadsafe(swept.set)
+            return {"expired": 0, "evicted": 0}
+
+        loop = asyncio.get_running_loop()
+        sweeper = ExpirySweeper(sweep_fn, interval_seconds=0.01)
+        sweeper.start()
+        await asyncio.wait_for(swept.wait(), timeout=5)
+        await sweeper.stop()
+        return loop_thread, threads
+
+    loop_thread, threads = asyncio.run(scenario())
+    assert threads and loop_thread not in threads
+
+
+def test_concurrent_transitions_have_exactly_one_winner(backend):
+    tokens = [backend.create_transaction("TIENDA_001", "María").token for _ in range(50)]
+    for token in tokens:
+        backend.update_transaction(token, status=TransactionStatus.CLIENT_DATA_RECEIVED)
+
+    wins = []
+    barrier = threading.Barrier(4)
+
+    def worker():
+        barrier.wait()
+        for token in tokens:
+            if backend.compare_and_set(token, {TransactionStatus.CLIENT_DATA_RECEIVED}, TransactionStatus.PROCESSING):
+                wins.append(token)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(wins) == sorted(tokens)
+
+
+def test_compact_record_round_trip():
+    transaction = Transaction(
+        token="token-1",
+        status=TransactionStatus.COMPLETED,
+        expires_at=datetime(2025, 10, 18, 12, 30, 15, 123456),
+        client_data=ClientData(telefono="3001234567", psych_organized=4, psych_plan=3),
+        store_validation=StoreValidation(
+            cedula_cliente="12345678", nombre_cliente="Juan Pérez",
+            know_buyer=4, buy_freq=3, avg_purchase=75000, distance_km=2.5, address_verified=True
+        ),
+        credit_result=_sample_credit_result(),
+    )
+
+    record = TransactionRecord.from_model(transaction)
+    assert isinstance(record.credit_result, tuple)
+    assert record.to_model().model_dump() == transaction.model_dump()
+
+
+def _sample_credit_result():
+    from credit_heuristic import heuristic_micro_v2
+    return CreditResult(**heuristic_micro_v2({
+        "know_buyer": 4, "buy_freq": 3, "avg_purchase": 75000,
+        "psych_organized": 4, "psych_plan": 3, "distance_km": 2.5, "address_verified": True,
+    })).model_dump()
+
+
+def test_typed_credit_result_is_stored_like_its_dict(backend):
+    result = CreditResult(**_sample_credit_result())
+    typed = backend.create_transaction("S1", "Ana").token
+    dumped = backend.create_transaction("S1", "Ana").token
+
+    assert backend.update_transaction(typed, credit_result=result)
+    assert backend.update_transaction(dumped, credit_result=result.model_dump())
+    assert backend.get_transaction(typed).credit_result == backend.get_transaction(dumped).credit_result
+
+
+def test_secondary_indexes_paginate_by_store_cedula_and_status(backend):
+    tokens = [backend.create_transaction(f"TIENDA_{i % 2}", "María").token for i in range(7)]
+    store_validation = StoreValidation(
+        cedula_cliente="12345678", nombre_cliente="Juan Pérez",
+        know_buyer=4, buy_freq=3, avg_purchase=75000
+    )
+    backend.update_transaction(tokens[0], store_validation=store_validation,
+                               status=TransactionStatus.STORE_VALIDATION_RECEIVED)
+    backend.update_transaction(tokens[2], store_validation=store_validation,
+                               status=TransactionStatus.STORE_VALIDATION_RECEIVED)
+
+    # TIENDA_0 tiene los tokens 0, 2, 4 y 6; se listan del más reciente al más antiguo
+    page, cursor = backend.list_transactions(store_id="TIENDA_0", limit=3)
+    assert [item.token for item in page] == [tokens[6], tokens[4], tokens[2]]
+    page, cursor = backend.list_transactions(store_id="TIENDA_0", cursor=cursor, limit=3)
+    assert [item.token for item in page] == [tokens[0]]
+    assert cursor is None
+
+    page, _ = backend.list_transactions(store_id="TIENDA_0", status=TransactionStatus.PENDING)
+    assert [item.token for item in page] == [tokens[6], tokens[4]]
+
+    page, _ = backend.list_transactions(cedula="12345678")
+    assert [item.token for item in page] == [tokens[2], tokens[0]]
+    assert page[0].store_id == "TIENDA_0" and page[0].cedula_cliente == "12345678"
+
+    page, _ = backend.list_transactions(status=TransactionStatus.STORE_VALIDATION_RECEIVED)
+    assert {item.token for item in page} == {tokens[0], tokens[2]}
+    page, _ = backend.list_transactions(status=TransactionStatus.PENDING, limit=10)
+    assert len(page) == 5
+
+    with pytest.raises(ValueError):
+        backend.list_transactions()
+
+
+def _journaled_backend(directory, **journal_options):
+    return create_backend("memory", 15, RETENTION_SECONDS,
+                          journal=TransactionJournal(str(directory), **journal_options))
+
+
+def test_journal_recovers_state_after_crash_and_after_snapshot(tmp_path):
+    first = _journaled_backend(tmp_path, fsync_interval_ms=1)
+    pending = first.create_transaction("TIENDA_001", "María").token
+    completed = first.create_transaction("TIENDA_001", "María").token
+    processing = first.create_transaction("TIENDA_002", "Pedro").token
+    first.update_transaction(completed, status=TransactionStatus.COMPLETED,
+                             credit_result=_sample_credit_result())
+    first.update_transaction(processing, status=TransactionStatus.PROCESSING)
+    first.journal.flush()
+
+    # Caída sin snapshot: se recupera solo desde el journal
+    second = _journaled_backend(tmp_path)
+    assert second.get_transaction(pending).model_dump() == first.get_transaction(pending).model_dump()
+    assert second.get_transaction(completed).model_dump() == first.get_transaction(completed).model_dump()
+    assert second.get_transaction(processing).status == TransactionStatus.ERROR
+    page, _ = second.list_transactions(store_id="TIENDA_001")
+    assert [item.token for item in page] == [completed, pending]
+
+    # Cierre ordenado: snapshot + journal posterior
+    newest = second.create_transaction("TIENDA_001", "María").token
+    second.close()
+    third = _journaled_backend(tmp_path)
+    assert third.count() == 4
+    assert third.get_transaction(newest).store_id == "TIENDA_001"
+    assert third.create_transaction("TIENDA_001", "María").token not in (pending, completed, newest)
+    # Las versiones no se persisten, pero nunca repiten las de antes del reinicio
+    assert third.get_status_info(completed).version > second.get_status_info(completed).version
+    third.close()
@@ -0,0 +1,75 @@
+"""
+Pruebas del logging estructurado.
+Ejecutar con: python -m pytest test_structured_logging.py
+"""
+
+import asyncio
+import io
+import json
+
+import structured_logging
+from jobs import JobQueue
+from structured_logging import bind_token, get_logger, set_token, setup_logging, shutdown_logging
+
+
+def _events(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_json_events_with_correlation_id_and_debug_sampling():
+    stream = io.StringIO()
+    setup_logging(level="DEBUG", debug_sample_rate=0.0, stream=stream)
+    log = get_logger("prueba")
+    try:
+        with bind_token("tok-1"):
+            log.info("credit_completed", category="A", cupo_estimated=50000.0)
+            log.debug("waiting_client_data")
+        log.error("sin_token", error="x")
+    finally:
+        shutdown_logging()
+
+    events = _events(stream)
+    assert [event["event"] for event in events] == ["credit_completed", "sin_token"]
+    assert events[0]["token"] == "tok-1"
+    assert events[0]["level"] == "INFO"
+    assert events[0]["logger"] == "confianza_vecina.prueba"
+    assert events[0]["category"] == "A" and events[0]["cupo_estimated"] == 50000.0
+    assert "token" not in events[1]
+    assert structured_logging.stats["sampled_out_total"] >= 1
+
+
+def test_full_queue_drops_instead_of_blocking():
+    stream = io.StringIO()
+    setup_logging(queue_size=1, stream=stream)
+    log = get_logger("prueba")
+    # Sin listener la cola no se vacía: solo cabe un evento
+    structured_logging._listener.stop()
+    structured_logging._listener = None
+    dropped = structured_logging.stats["dropped_total"]
+    log.info("uno")
+    log.info("dos")
+    shutdown_logging()
+    assert structured_logging.stats["dropped_total"] == dropped + 1
+
+
+def test_jobs_keep_the_token_of_the_request_that_enqueued_them():
+    stream = io.StringIO()
+    setup_logging(stream=stream)
+    log = get_logger("prueba")
+
+    async def scenario():
+        queue = JobQueue(workers=2)
+        queue.start()
+
+        async def request(token):
+            set_token(token)
+            queue.submit("job", log.info, "job_event")
+
+        await asyncio.gather(request("tok-a"), request("tok-b"))
+        await queue.stop()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        shutdown_logging()
+    assert sorted(event["token"] for event in _events(stream)) == ["tok-a", "tok-b"]